@@ -5,6 +5,7 @@ __all__ = ["ADMDatamart"]
 import datetime
 import logging
 import os
+import tempfile
 from functools import cached_property
 from pathlib import Path
 from typing import Callable, Dict, Iterable, List, Literal, Optional, Tuple, Union
@@ -59,6 +60,13 @@ class ADMDatamart:
         Whether to extract extra keys from the `pyName` column.
         In older Pega versions, this contained pyTreatment among other
         (customizable) fields. By default True
+    pyname_keys_cache : os.PathLike, optional
+        A parquet file to cache the keys extracted from the `pyName`
+        column in, so later loads only decode the names of new models.
+    materialize : {"memory", "ipc"}, optional
+        If given, parses the source data only once, see :meth:`materialize`.
+        By default, the data stays lazy and is read from the source
+        every time it is collected.
 
     Examples
     --------
@@ -107,6 +115,8 @@ class ADMDatamart:
         *,
         query: Optional[QUERY] = None,
         extract_pyname_keys: bool = True,
+        pyname_keys_cache: Optional[Union[str, os.PathLike]] = None,
+        materialize: Optional[Literal["memory", "ipc"]] = None,
     ) -> None:
         self.context_keys: List[str] = [
             "Channel",
@@ -121,8 +131,19 @@ class ADMDatamart:
         self.agb = AGB(datamart=self)
         self.generate = Reports(datamart=self)
 
+        if materialize is not None:
+            # Parse the source once, validation collects from it a few times
+            model_df = self._materialize_frame(
+                model_df, materialize, "source_model_data"
+            )
+            predictor_df = self._materialize_frame(
+                predictor_df, materialize, "source_predictor_data"
+            )
+
         model_data_validated = self._validate_model_data(
-            model_df, extract_pyname_keys=extract_pyname_keys
+            model_df,
+            extract_pyname_keys=extract_pyname_keys,
+            pyname_keys_cache=pyname_keys_cache,
         )
 
         # First occurence of actions (before filtering!) kept here so we can derive the "New Actions"
@@ -138,6 +159,133 @@ class ADMDatamart:
         )
         self.bin_aggregator = BinAggregator(dm=self)
 
+        if materialize is not None:
+            self.materialize(mode=materialize)
+
+    def materialize(
+        self,
+        mode: Literal["memory", "ipc"] = "memory",
+        cache_dir: Optional[Union[str, os.PathLike]] = None,
+    ) -> "ADMDatamart":
+        """Evaluates the data once, and bases all further queries on the result.
+
+        By default, `model_data` and `predictor_data` are lazy queries on
+        top of the source files, so every collect parses the raw export
+        again. After materializing, all queries start from the parsed and
+        typed data instead.
+
+        Parameters
+        ----------
+        mode : {"memory", "ipc"}, default = "memory"
+            Whether to keep the data in memory, or to write it to Arrow IPC
+            files which are then memory-mapped. The latter is useful for
+            datamarts that are too big to comfortably keep in memory.
+        cache_dir : os.PathLike, optional
+            The directory to write the IPC files to. Defaults to a temporary
+            directory that is removed along with the datamart.
+
+        Returns
+        -------
+        ADMDatamart
+            The datamart itself, to allow chaining
+
+        Examples
+        --------
+        >>> dm = ADMDatamart.from_ds_export(base_path="/my_export_folder")
+        >>> dm.materialize()
+        """
+        if cache_dir is not None:
+            self._materialize_dir = Path(cache_dir)
+            self._materialize_dir.mkdir(parents=True, exist_ok=True)
+
+        self.model_data = self._materialize_frame(self.model_data, mode, "model_data")
+        self.predictor_data = self._materialize_frame(
+            self.predictor_data, mode, "predictor_data"
+        )
+        self.first_action_dates = self._materialize_frame(
+            self.first_action_dates, "memory"
+        )
+        self.combined_data = self.aggregates._combine_data(
+            self.model_data, self.predictor_data
+        )
+        return self
+
+    def _materialize_frame(
+        self,
+        df: Optional[pl.LazyFrame],
+        mode: Literal["memory", "ipc"],
+        name: str = "data",
+    ) -> Optional[pl.LazyFrame]:
+        if mode not in ("memory", "ipc"):
+            raise ValueError(f"Unknown mode {mode}, use 'memory' or 'ipc'.")
+        if df is None:
+            return None
+        if mode == "memory":
+            return df.collect().lazy()
+
+        if getattr(self, "_materialize_dir", None) is None:
+            self._materialize_tempdir = tempfile.TemporaryDirectory(prefix="pdstools-")
+            self._materialize_dir = Path(self._materialize_tempdir.name)
+        # Never overwrite a file that the current data may still be scanning
+        file = self._materialize_dir / f"{name}.arrow"
+        version = 0
+        while file.exists():
+            version += 1
+            file = self._materialize_dir / f"{name}_{version}.arrow"
+        df.sink_ipc(file)
+        return pl.scan_ipc(file, memory_map=True)
+
+    def filter(self, query: QUERY) -> "ADMDatamart":
+        """Derives a datamart with only the models that match the query.
+
+        Unlike constructing a new ADMDatamart from the filtered model data,
+        this does not validate the data again. The derived datamart shares
+        the (validated and possibly materialized) data of this datamart, and
+        only adds the query on top of it. The predictor data is restricted
+        to the remaining models.
+
+        Parameters
+        ----------
+        query : QUERY
+            The query to apply to the model data.
+            For details, see :meth:`pdstools.utils.cdh_utils._apply_query`.
+
+        Returns
+        -------
+        ADMDatamart
+            A new datamart with the filtered data
+
+        Examples
+        --------
+        >>> web_only = dm.filter(pl.col("Channel") == "Web")
+        >>> web_only.plot.bubble_chart()
+        """
+        derived = type(self).__new__(type(self))
+        derived.context_keys = list(self.context_keys)
+        derived.plot = Plots(datamart=derived)
+        derived.aggregates = Aggregates(datamart=derived)
+        derived.agb = AGB(datamart=derived)
+        derived.generate = Reports(datamart=derived)
+        # The first action dates are, as with a query, from before filtering
+        derived.first_action_dates = self.first_action_dates
+        for attr in ("_materialize_dir", "_materialize_tempdir"):
+            if hasattr(self, attr):
+                setattr(derived, attr, getattr(self, attr))
+
+        derived.model_data = cdh_utils._apply_query(self.model_data, query)
+        derived.predictor_data = self.predictor_data
+        if self.predictor_data is not None and derived.model_data is not None:
+            derived.predictor_data = self.predictor_data.join(
+                derived.model_data.select("ModelID").unique(),
+                on="ModelID",
+                how="semi",
+            )
+        derived.combined_data = derived.aggregates._combine_data(
+            derived.model_data, derived.predictor_data
+        )
+        derived.bin_aggregator = BinAggregator(dm=derived)
+        return derived
+
     def _get_first_action_dates(
         self, df: Optional[pl.LazyFrame]
     ) -> Optional[pl.LazyFrame]:
@@ -395,6 +543,7 @@ class ADMDatamart:
         self,
         df: Optional[pl.LazyFrame],
         extract_pyname_keys: bool = True,
+        pyname_keys_cache: Optional[Union[str, os.PathLike]] = None,
     ) -> Optional[pl.LazyFrame]:
         """Internal method to validate model data"""
         if df is None:
@@ -404,7 +553,7 @@ class ADMDatamart:
         df = _polars_capitalize(df)
         schema = df.collect_schema()
         if extract_pyname_keys and "Name" in schema.names():
-            df = cdh_utils._extract_keys(df)
+            df = cdh_utils._extract_keys(df, cache_file=pyname_keys_cache)
 
         if "Treatment" in schema.names():
             self.context_keys.append("Treatment")
@@ -822,21 +971,18 @@ class ADMDatamart:
             - idx_max - The maximum bin index that can be reached given the current binning of all predictors
 
         """
-        import numpy as np
-
-        def find_binindex(bounds, score):
-            if len(bounds) == 1:
-                return 0
-            # Polars has search_sorted but it seems it doesn't do
-            # the exact same thing as numpy searchsorted. We could
-            # also use python's native bisect but that seems slower.
-            return min(
-                max(1, np.searchsorted(bounds, score, side="right").item()), len(bounds)
-            )
-
-        def auc_from_active_bins(pos, neg, idx_min, idx_max):
-            return cdh_utils.auc_from_bincounts(
-                pos[idx_min:idx_max], neg[idx_min:idx_max]
+        bounds = pl.col("BinLowerBound").cast(pl.Float64)
+        pos = pl.col("BinPositives").cast(pl.Float64)
+        neg = pl.col("BinNegatives").cast(pl.Float64)
+
+        def find_binindex(score: str) -> pl.Expr:
+            # Equivalent of numpy's searchsorted(side="right") on the sorted
+            # classifier bounds, clamped to [1, nBins].
+            return (
+                pl.when(pl.len() == 1)
+                .then(0)
+                .otherwise((bounds <= pl.col(score)).sum().clip(1, pl.len()))
+                .cast(pl.Int32)
             )
 
         if isinstance(model_ids, str):
@@ -864,83 +1010,54 @@ class ADMDatamart:
             allow_empty=True,
         )
 
+        scores = self._minMaxScoresPerModel(most_recent_binning_data)
+
+        in_active_range = (
+            pl.int_range(pl.len())
+            .over("ModelID")
+            .is_between(pl.col("idx_min"), pl.col("idx_max"), closed="left")
+        )
+
+        # All models are processed at once in a single aggregation. Bins outside
+        # of the active range are zeroed out, empty bins do not contribute to the AUC.
         classifier_info = (
             most_recent_binning_data.filter(EntryType="Classifier")
+            .join(
+                scores.select("ModelID", "score_min", "score_max"),
+                on="ModelID",
+                how="left",
+            )
             .sort("BinIndex")
-            .group_by("ModelID", maintain_order=True)
+            .with_columns(
+                idx_min=(find_binindex("score_min") - 1).over("ModelID"),
+                idx_max=find_binindex("score_max").over("ModelID"),
+            )
+            .with_columns(
+                activePos=pl.when(in_active_range).then(pos).otherwise(0.0),
+                activeNeg=pl.when(in_active_range).then(neg).otherwise(0.0),
+            )
+            .group_by("ModelID")
             .agg(
                 AUC_Datamart=pl.col("Performance").first(),
+                AUC_FullRange=cdh_utils.auc_from_bincounts_polars(pos, neg),
+                AUC_ActiveRange=cdh_utils.auc_from_bincounts_polars(
+                    "activePos", "activeNeg"
+                ),
                 Bins=pl.len(),
-                classifierBounds=pl.col("BinLowerBound").cast(pl.Float64),
-                classifierPos=pl.col("BinPositives").cast(pl.Float64),
-                classifierNeg=pl.col("BinNegatives").cast(pl.Float64),
+                idx_min=pl.col("idx_min").first(),
+                idx_max=pl.col("idx_max").first(),
             )
         )
 
-        scores = self._minMaxScoresPerModel(most_recent_binning_data)
-
         return (
             classifier_info.join(scores, on="ModelID", how="left")
-            .with_columns(
-                AUC_FullRange=pl.map_groups(
-                    exprs=[
-                        pl.col("classifierPos").explode(),
-                        pl.col("classifierNeg").explode(),
-                    ],
-                    function=lambda data: cdh_utils.auc_from_bincounts(
-                        data[0], data[1]
-                    ),
-                    return_dtype=pl.Float64,
-                    returns_scalar=True,
-                ).over("ModelID"),
-                idx_min=(
-                    pl.map_groups(
-                        exprs=[
-                            pl.col("classifierBounds"),
-                            pl.col("score_min"),
-                        ],
-                        function=lambda data: find_binindex(
-                            data[0].to_list()[0],
-                            data[1].item(),
-                        ),
-                        return_dtype=pl.Int32,
-                        returns_scalar=True,
-                    )
-                    - 1
-                ).over("ModelID"),
-                idx_max=pl.map_groups(
-                    exprs=[
-                        pl.col("classifierBounds"),
-                        pl.col("score_max"),
-                    ],
-                    function=lambda data: find_binindex(
-                        data[0].to_list()[0],
-                        data[1].item(),
-                    ),
-                    return_dtype=pl.Int32,
-                    returns_scalar=True,
-                ).over("ModelID"),
-            )
-            .with_columns(
-                AUC_ActiveRange=pl.map_groups(
-                    exprs=[
-                        pl.col("classifierPos"),
-                        pl.col("classifierNeg"),
-                        pl.col("idx_min"),
-                        pl.col("idx_max"),
-                    ],
-                    function=lambda data: auc_from_active_bins(
-                        data[0].to_list()[0],
-                        data[1].to_list()[0],
-                        data[2].item(),
-                        data[3].item(),
-                    ),
-                    return_dtype=pl.Float64,
-                    returns_scalar=True,
-                ).over("ModelID"),
-            )
             .sort("ModelID")
-            .drop("classifierBounds", "classifierPos", "classifierNeg")
-            .select(cs.starts_with("AUC"), ~cs.starts_with("AUC"))
-            .select("ModelID", ~cs.starts_with("ModelID"))
+            .select(
+                "ModelID",
+                cs.starts_with("AUC"),
+                "Bins",
+                ~cs.starts_with("AUC", "ModelID", "Bins", "idx"),
+                "idx_min",
+                "idx_max",
+            )
         )
@@ -6,14 +6,18 @@ import base64
 import collections
 import copy
 import functools
+import hashlib
 import json
 import logging
 import multiprocessing
 import operator
+import os
 import zlib
+from contextlib import nullcontext
 from dataclasses import dataclass
 from functools import cached_property, lru_cache
 from math import exp
+from pathlib import Path
 from statistics import mean
 from typing import (
     TYPE_CHECKING,
@@ -33,6 +37,7 @@ from ..utils.namespaces import MissingDependenciesException
 from ..utils.types import QUERY
 
 if TYPE_CHECKING:  # pragma: no cover
+    import numpy as np
     import pydot  # type: ignore[import-untyped]
 
     from .ADMDatamart import ADMDatamart
@@ -184,7 +189,43 @@ class ADMTrees:  # pragma: no cover
         return ADMTreesModel(file, **kwargs)
 
     @staticmethod
-    def get_multi_trees(file: pl.DataFrame, n_threads=1, verbose=True, **kwargs):
+    def get_multi_trees(
+        file: pl.DataFrame,
+        n_threads=1,
+        verbose=True,
+        *,
+        streaming: bool = False,
+        cache_dir: Optional[Union[str, os.PathLike]] = None,
+        **kwargs,
+    ):
+        """Decode the AGB models of every snapshot into MultiTrees per configuration.
+
+        Parameters
+        ----------
+        file : pl.DataFrame
+            Model data with Configuration, SnapshotTime and Modeldata columns
+        n_threads : int, default = 1
+            The number of worker processes to decode the models with
+        verbose : bool, default = True
+            Whether to print out information while decoding
+        streaming : bool, default = False
+            Whether to decode, decompress and parse each snapshot inside the
+            worker processes, rather than decoding all of them up front.
+            Snapshots with identical payloads are only decoded once and
+            share the same ADMTreesModel.
+        cache_dir : Optional[Union[str, os.PathLike]], default = None
+            A directory to cache the parsed models in, keyed by the digest
+            of their payload. Implies `streaming`.
+
+        Returns
+        -------
+        Dict[str, MultiTrees]
+            The decoded models per configuration, keyed by snapshot time
+        """
+        if streaming or cache_dir is not None:
+            return ADMTrees._get_multi_trees_streaming(
+                file, n_threads=n_threads, verbose=verbose, cache_dir=cache_dir
+            )
         out = {}
         df = file.filter(pl.col("Modeldata").is_not_null()).select(
             pl.col("SnapshotTime")
@@ -226,6 +267,120 @@ class ADMTrees:  # pragma: no cover
             for key, value in dict_per_config.items()
         }
 
+    @staticmethod
+    def _get_multi_trees_streaming(
+        file: pl.DataFrame,
+        n_threads: int = 1,
+        verbose: bool = True,
+        cache_dir: Optional[Union[str, os.PathLike]] = None,
+    ):
+        rows = file.filter(pl.col("Modeldata").is_not_null()).select(
+            pl.col("Configuration").cast(pl.Utf8),
+            pl.col("SnapshotTime")
+            .dt.round("1s")
+            .cast(pl.Utf8)
+            .str.strip_chars_end(".000000000"),
+            pl.col("Modeldata").cast(pl.Utf8),
+        )
+        if cache_dir is not None:
+            cache_dir = Path(cache_dir)
+            cache_dir.mkdir(parents=True, exist_ok=True)
+
+        snapshots = []
+        payloads: Dict[str, str] = {}
+        for configuration, timestamp, payload in rows.iter_rows():
+            digest = hashlib.sha256(payload.encode()).hexdigest()
+            snapshots.append((configuration, timestamp, digest))
+            payloads.setdefault(digest, payload)
+        logger.info(f"{len(payloads)} unique models in {len(snapshots)} snapshots")
+
+        parsed: Dict[str, Any] = {}
+        if cache_dir is not None:
+            for digest in list(payloads):
+                cached = cache_dir / f"{digest}.json"
+                if cached.exists():
+                    with open(cached) as f:
+                        parsed[digest] = json.load(f)
+                    del payloads[digest]
+            logger.info(f"{len(parsed)} models read from the cache")
+
+        if verbose and len(payloads) > 50 and n_threads == 1:
+            print(
+                f"""Decoding {len(payloads)} models,
+            setting n_threads to a higher value may speed up processing time."""
+            )
+        tasks = ((digest, payload, cache_dir) for digest, payload in payloads.items())
+        n_tasks = len(payloads)
+        del payloads
+        with multiprocessing.Pool(n_threads) if n_threads > 1 else nullcontext() as p:
+            results = (
+                map(_decode_agb_payload, tasks)
+                if p is None
+                else p.imap_unordered(_decode_agb_payload, tasks)
+            )
+            if verbose:
+                try:
+                    from tqdm import tqdm
+
+                    results = tqdm(results, total=n_tasks)
+                except ImportError:
+                    pass
+            for digest, trees in results:
+                parsed[digest] = trees
+
+        models = {
+            digest: ADMTreesModel._from_decoded(trees)
+            for digest, trees in parsed.items()
+        }
+        dict_per_config: Dict[Any, Any] = {}
+        for configuration, timestamp, digest in snapshots:
+            dict_per_config.setdefault(configuration, {})[timestamp] = models[digest]
+        return {
+            key: MultiTrees(value, model_name=key)
+            for key, value in dict_per_config.items()
+        }
+
+
+def _decode_agb_payload(task):
+    """Decode a single base64 encoded model payload in a worker process.
+
+    Returns the digest along with the parsed model, with its splits decoded,
+    and writes the parsed model to the cache directory if one is given.
+    """
+    digest, payload, cache_dir = task
+    trees = ADMTreesModel(base64.b64decode(payload)).trees
+    if cache_dir is not None:
+        target = Path(cache_dir) / f"{digest}.json"
+        tmp = target.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(trees, f)
+        os.replace(tmp, target)
+    return digest, trees
+
+
+@dataclass
+class _CompiledTrees:
+    """Flattened representation of all trees of an AGB model, used for batch scoring.
+
+    All nodes of all trees are stored in one set of arrays, indexed by a global
+    node id. Leaf nodes have a condition index of -1. Splits are deduplicated into
+    conditions, so a split that occurs in many trees is only evaluated once.
+    """
+
+    features: List[str]
+    # Per condition: feature index, kind ("<", ">", "==" or "in"), threshold and set id
+    condition_feature: "np.ndarray"
+    condition_kind: List[str]
+    condition_threshold: "np.ndarray"
+    condition_set: "np.ndarray"
+    category_sets: List[Set[str]]
+    # Per node: condition index (-1 for leaves), child node ids and the score
+    node_condition: "np.ndarray"
+    left_child: "np.ndarray"
+    right_child: "np.ndarray"
+    node_score: "np.ndarray"
+    roots: "np.ndarray"
+
 
 class ADMTreesModel:
     """Functions for ADM Gradient boosting
@@ -273,6 +428,16 @@ class ADMTreesModel:
         if self.trees is None:  # pragma: no cover
             raise ValueError("Import unsuccessful.")
 
+    @classmethod
+    def _from_decoded(cls, trees: dict, **kwargs) -> "ADMTreesModel":
+        """Create a model from an already parsed and decoded model dict."""
+        self = cls.__new__(cls)
+        self.trees = trees
+        self.raw_model = trees
+        self.nospaces = True
+        self._post_import_cleanup(decode=False, **kwargs)
+        return self
+
     def _read_model(self, file, **kwargs):
         def _import(file):
             logger.info("Trying regular import.")
@@ -931,6 +1096,7 @@ class ADMTreesModel:
             nodeinfo[ID]["right_child"] = children["right"]
         return nodeinfo
 
+    @lru_cache
     def get_tree_representation(self, tree_number: int) -> Dict:
         """Generates a more usable tree representation.
 
@@ -1123,6 +1289,203 @@ class ADMTreesModel:
         score = self.get_all_visited_nodes(x)["score"].sum()
         return 1 / (1 + exp(-score))
 
+    @cached_property
+    def _compiled_trees(self) -> _CompiledTrees:
+        """Compiles the trees into flat node arrays, once per model."""
+        try:
+            import numpy as np
+        except ImportError:  # pragma: no cover
+            raise MissingDependenciesException(["numpy"], "AGB")
+
+        features: Dict[str, int] = {}
+        conditions: Dict[Tuple, int] = {}
+        category_sets: Dict[frozenset, int] = {}
+        node_condition, left_child, right_child, node_score, roots = [], [], [], [], []
+
+        def add_condition(split: str) -> int:
+            variable, sign, values = self.parse_split_values(split)
+            feature = features.setdefault(variable, len(features))
+            if sign in {"<", ">"}:
+                key = (feature, sign, float(next(iter(values))), -1)
+            else:
+                # "is Missing" is a set membership test on the value "Missing"
+                sign = "in" if sign == "is" else sign
+                values = frozenset(values)
+                key = (
+                    feature,
+                    sign,
+                    np.nan,
+                    category_sets.setdefault(values, len(category_sets)),
+                )
+            return conditions.setdefault(key, len(conditions))
+
+        for tree in self.model:
+            roots.append(len(node_score))
+            stack = [(tree, None, None)]
+            while stack:
+                node, parent, side = stack.pop()
+                node_id = len(node_score)
+                if parent is not None:
+                    (left_child if side == "left" else right_child)[parent] = node_id
+                node_score.append(node["score"])
+                left_child.append(node_id)
+                right_child.append(node_id)
+                if "split" in node:
+                    node_condition.append(add_condition(node["split"]))
+                    stack.append((node["right"], node_id, "right"))
+                    stack.append((node["left"], node_id, "left"))
+                else:
+                    node_condition.append(-1)
+
+        condition_keys = list(conditions.keys())
+        return _CompiledTrees(
+            features=list(features.keys()),
+            condition_feature=np.array([c[0] for c in condition_keys], dtype=np.int32),
+            condition_kind=[c[1] for c in condition_keys],
+            condition_threshold=np.array(
+                [c[2] for c in condition_keys], dtype=np.float64
+            ),
+            condition_set=np.array([c[3] for c in condition_keys], dtype=np.int32),
+            category_sets=[set(values) for values in category_sets.keys()],
+            node_condition=np.array(node_condition, dtype=np.int32),
+            left_child=np.array(left_child, dtype=np.int32),
+            right_child=np.array(right_child, dtype=np.int32),
+            node_score=np.array(node_score, dtype=np.float64),
+            roots=np.array(roots, dtype=np.int32),
+        )
+
+    def score_batch(
+        self, df: Union[pl.DataFrame, pl.LazyFrame], chunk_size: int = 100_000
+    ) -> pl.Series:
+        """Computes the score for every row of a dataframe at once.
+
+        Vectorized counterpart of :meth:`score`. The trees are compiled into flat
+        node arrays once per model, after which every unique split condition is
+        evaluated over whole columns and the rows are routed through the trees
+        with numpy, instead of walking the trees one record at a time.
+
+        Parameters
+        ----------
+        df: Union[pl.DataFrame, pl.LazyFrame]
+            The data to score, with a column for every predictor used in the splits.
+            Symbolic values are compared as strings, null values of symbolic
+            predictors are treated as "Missing".
+        chunk_size: int, default = 100_000
+            The number of rows to score at a time, which bounds the memory use
+
+        Returns
+        -------
+        pl.Series
+            The score (propensity) for every row
+
+        Examples
+        --------
+        >>> trees = ADMTrees("agb_model.json")
+        >>> trees.score_batch(pl.read_parquet("interactions.parquet"))
+        """
+        try:
+            import numpy as np
+        except ImportError:  # pragma: no cover
+            raise MissingDependenciesException(["numpy"], "AGB")
+
+        compiled = self._compiled_trees
+        if isinstance(df, pl.LazyFrame):
+            df = df.collect()
+        missing = [f for f in compiled.features if f not in df.columns]
+        if missing:
+            raise ValueError(f"Missing predictors in the data to score: {missing}")
+
+        numeric_features, symbolic_features = set(), set()
+        vocabulary: Dict[int, Set[str]] = collections.defaultdict(set)
+        for feature, kind, set_id in zip(
+            compiled.condition_feature.tolist(),
+            compiled.condition_kind,
+            compiled.condition_set.tolist(),
+        ):
+            if kind in {"<", ">"}:
+                numeric_features.add(feature)
+            else:
+                symbolic_features.add(feature)
+                vocabulary[feature] |= compiled.category_sets[set_id]
+        # Symbolic values are coded by their index in the sorted values used in
+        # the splits of that feature, all other values get the last code
+        vocabulary = {feature: sorted(values) for feature, values in vocabulary.items()}
+        membership = [
+            (
+                np.array(
+                    [v in compiled.category_sets[set_id] for v in vocabulary[feature]]
+                    + [False]
+                )
+                if set_id >= 0
+                else None
+            )
+            for feature, set_id in zip(
+                compiled.condition_feature.tolist(), compiled.condition_set.tolist()
+            )
+        ]
+
+        tree_scores = []
+        for chunk in df.iter_slices(chunk_size):
+            columns = {}
+            for feature in numeric_features:
+                name = compiled.features[feature]
+                columns[feature] = (
+                    chunk.get_column(name)
+                    .cast(pl.Float64, strict=False)
+                    .fill_null(np.nan)
+                    .to_numpy()
+                )
+            for feature in symbolic_features:
+                name = compiled.features[feature]
+                values = vocabulary[feature]
+                columns[feature] = (
+                    chunk.get_column(name)
+                    .cast(pl.Utf8)
+                    .fill_null("Missing")
+                    .replace_strict(
+                        values,
+                        list(range(len(values))),
+                        default=len(values),
+                        return_dtype=pl.Int32,
+                    )
+                    .to_numpy()
+                )
+
+            conditions = []
+            for condition, kind in enumerate(compiled.condition_kind):
+                column = columns[compiled.condition_feature[condition]]
+                if kind == "<":
+                    passed = column < compiled.condition_threshold[condition]
+                elif kind == ">":
+                    passed = column > compiled.condition_threshold[condition]
+                else:
+                    passed = membership[condition][column]
+                conditions.append((passed, ~passed))
+
+            total = np.zeros(chunk.height)
+            for root in compiled.roots.tolist():
+                stack = [(root, None)]
+                while stack:
+                    node, mask = stack.pop()
+                    condition = compiled.node_condition[node]
+                    if condition < 0:
+                        if mask is None:
+                            total += compiled.node_score[node]
+                        else:
+                            np.add(
+                                total, compiled.node_score[node], out=total, where=mask
+                            )
+                        continue
+                    passed, failed = conditions[condition]
+                    if mask is not None:
+                        passed, failed = mask & passed, mask & failed
+                    stack.append((compiled.right_child[node], failed))
+                    stack.append((compiled.left_child[node], passed))
+            tree_scores.append(total)
+
+        total = np.concatenate(tree_scores) if tree_scores else np.zeros(0)
+        return pl.Series("Score", 1 / (1 + np.exp(-total)))
+
     def plot_contribution_per_tree(self, x: Dict, show=True):
         """Plots the contribution of each tree towards the final propensity."""
         try:
@@ -1,6 +1,16 @@
 __all__ = ["Aggregates"]
 import datetime
-from typing import TYPE_CHECKING, Dict, List, Literal, Optional, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import polars as pl
 import polars.selectors as cs
@@ -15,6 +25,17 @@ from ..utils.types import QUERY
 if TYPE_CHECKING:  # pragma: no cover
     from .ADMDatamart import ADMDatamart
 
+# Summaries that stay lazy all the way, so they can be collected together
+_BATCHABLE_SUMMARIES = (
+    "last",
+    "model_summary",
+    "summary_by_channel",
+    "summary_by_configuration",
+    "overall_summary",
+    "predictors_overview",
+    "predictors_global_overview",
+)
+
 
 class Aggregates:
     def __init__(self, datamart: "ADMDatamart"):
@@ -667,9 +688,6 @@ class Aggregates:
                 .map_batches(cdh_utils.overlap_lists_polars, return_dtype=pl.Float64)
                 .alias("OmniChannel"),
             )
-            # collect/lazy seems to resolve some polars issues
-            .collect()
-            .lazy()
             .drop(["literal"] if every is None else [])
             .explode(["Channel", "Direction", "OmniChannel"])
         )
@@ -688,6 +706,11 @@ class Aggregates:
                     "ChannelDirection"
                 ),
             )
+            # Period breaks the ties when periods are shorter than a day
+            .sort(
+                ["Channel", "Direction", "DateRange Min"]
+                + ([] if every is None else ["Period"])
+            )
             .drop(
                 []
                 if debug
@@ -696,7 +719,6 @@ class Aggregates:
                     + ([] if every is None else ["Period"])
                 )
             )
-            .sort("Channel", "Direction", "DateRange Min")
             .with_columns(pl.col("OmniChannel").cast(pl.Float64))
         )
 
@@ -997,20 +1019,15 @@ class Aggregates:
             self.datamart.model_data, start_date, end_date, window
         )
 
-        overall_summary = (
-            self._adm_model_summary(
-                query=pl.col("SnapshotTime").is_between(start_date, end_date),
-                every=every,
-                by_channel=False,
-                debug=debug,
-            )
-            .drop(
-                "Configuration",
-                "AllActions",
-                "isValid",
-            )
-            .collect()
-            .lazy()
+        overall_summary = self._adm_model_summary(
+            query=pl.col("SnapshotTime").is_between(start_date, end_date),
+            every=every,
+            by_channel=False,
+            debug=debug,
+        ).drop(
+            "Configuration",
+            "AllActions",
+            "isValid",
         )
 
         best_worst_channel_summary = (
@@ -1039,8 +1056,6 @@ class Aggregates:
                 .alias("OmniChannel"),
             )
             .drop(["literal"] if every is None else [])
-            .collect()
-            .lazy()
         )
 
         if every is None:
@@ -1068,8 +1083,66 @@ class Aggregates:
                     cs.categorical().cast(pl.Utf8),
                     pl.col("Number of Valid Channels").fill_null(0),
                 )
-                .sort("DateRange Min")
+                # Period breaks the ties when periods are shorter than a day
+                .sort("DateRange Min", "Period")
                 .drop(
                     [] if debug else ["TotalPositives", "TotalResponseCount", "Period"]
                 )
             )
+
+    def compute_many(
+        self,
+        summaries: Union[
+            Iterable[str], Dict[str, Union[str, Tuple[str, Dict[str, Any]]]]
+        ],
+    ) -> Dict[str, Optional[pl.DataFrame]]:
+        """Computes several summaries in one go
+
+        All requested summaries are built as lazy queries first, then collected
+        together with `pl.collect_all`. Polars then recognizes the parts the
+        queries have in common, like scanning the model data or filtering the
+        last snapshot, and computes those only once.
+
+        Parameters
+        ----------
+        summaries : Union[Iterable[str], Dict[str, Union[str, Tuple[str, Dict]]]]
+            The summaries to compute, by method name of this class. Pass a
+            dictionary to choose the keys of the result, with as values either
+            the method name, or a tuple of the method name and its arguments.
+
+        Returns
+        -------
+        Dict[str, Optional[pl.DataFrame]]
+            The collected summaries by key. Summaries that are not available
+            for the data, like `predictors_overview` without predictor data,
+            are None.
+
+        Examples
+        --------
+        >>> summaries = dm.aggregates.compute_many(
+        ...     {
+        ...         "channels": "summary_by_channel",
+        ...         "trend": ("overall_summary", {"every": "1w"}),
+        ...         "predictors": "predictors_global_overview",
+        ...     }
+        ... )
+        >>> summaries["trend"]
+        """
+        if not isinstance(summaries, dict):
+            summaries = {name: name for name in summaries}
+
+        queries: Dict[str, Optional[pl.LazyFrame]] = {}
+        for key, summary in summaries.items():
+            name, kwargs = (summary, {}) if isinstance(summary, str) else summary
+            if name not in _BATCHABLE_SUMMARIES:
+                raise ValueError(
+                    f"Can not compute {name} in a batch, choose from {_BATCHABLE_SUMMARIES}"
+                )
+            if name.startswith("predictors") and self.datamart.predictor_data is None:
+                queries[key] = None
+            else:
+                queries[key] = getattr(self, name)(**kwargs)
+
+        available = {key: query for key, query in queries.items() if query is not None}
+        results = dict(zip(available.keys(), pl.collect_all(available.values())))
+        return {key: results.get(key) for key in queries}
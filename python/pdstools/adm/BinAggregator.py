@@ -1,5 +1,6 @@
 __all__ = ["BinAggregator"]
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from functools import cached_property
 from typing import TYPE_CHECKING, Any, Literal, Optional, Union
 
@@ -26,6 +27,7 @@ class BinAggregator(LazyNamespace):
 
     def __init__(self, dm: "ADMDatamart") -> None:
         self.dm = dm
+        self._materialized = False
         super().__init__()
 
     @cached_property
@@ -45,6 +47,7 @@ class BinAggregator(LazyNamespace):
         maximum: Optional[float] = None,
         aggregation: Optional[str] = None,
         as_numeric: Optional[bool] = None,
+        method: Literal["iterative", "vectorized"] = "iterative",
         return_df: bool = False,
         verbose: bool = False,
     ) -> Union[pl.DataFrame, Figure]:
@@ -90,6 +93,12 @@ class BinAggregator(LazyNamespace):
             override in the (exceptional) situation that a predictor with the same
             name is numeric in some and symbolic in some other models. By default None
             which means the type is taken from the first predictor in the data.
+        method : str, optional
+            How numeric binnings are combined. By default "iterative", which
+            combines the binnings of the models one by one. With "vectorized" the
+            binnings of all models are collected at once and combined in a single
+            interval join, which is much faster for many models and gives the
+            same results. Symbolic predictors are always combined in one go.
         return_df : bool, optional
             Return the underlying binning instead of a plot.
         verbose : bool, optional
@@ -102,6 +111,8 @@ class BinAggregator(LazyNamespace):
             to True, it returns the actual binning with the lift aggregated over
             all the models, optionally per predictor and per set of models.
         """
+        if method not in ["iterative", "vectorized"]:
+            raise ValueError(f"Invalid method: {method}")
         if not isinstance(predictors, list):
             predictors = [predictors]
 
@@ -183,7 +194,14 @@ class BinAggregator(LazyNamespace):
                         .to_list()
                     )
 
-                if is_numeric:
+                if is_numeric and method == "vectorized":
+                    cum_binning = self.combine_numbinnings(
+                        self.get_source_numbinnings(predictor, ids),
+                        empty_numeric_binning.clone(),
+                        n_models=len(ids),
+                        verbose=verbose,
+                    )
+                elif is_numeric:
                     cum_binning = self.accumulate_num_binnings(
                         predictor,
                         ids,
@@ -213,6 +231,201 @@ class BinAggregator(LazyNamespace):
                 pl.concat(all_binnings, how="vertical_relaxed")
             )
 
+    def materialize(self) -> "BinAggregator":
+        """Evaluates the normalized binning once, and bases all further roll-ups on it.
+
+        By default `all_predictorbinning` is a lazy query, so every roll-up
+        (and every step within one) evaluates the full datamart again.
+
+        Returns
+        -------
+        BinAggregator
+            The aggregator itself, to allow chaining
+        """
+        if not self._materialized:
+            self.all_predictorbinning = self.all_predictorbinning.collect().lazy()
+            self._materialized = True
+        return self
+
+    def roll_up_many(
+        self,
+        predictors: Union[str, list],
+        *,
+        n: int = 10,
+        distribution: Literal["lin", "log"] = "lin",
+        boundaries: Optional[Union[float, list]] = None,
+        symbols: Optional[Union[str, list]] = None,
+        minimum: Optional[float] = None,
+        maximum: Optional[float] = None,
+        aggregation: Optional[str] = None,
+        as_numeric: Optional[bool] = None,
+        max_workers: int = 1,
+    ) -> pl.DataFrame:
+        """Roll up many predictors across all topics in one pass.
+
+        Gives the same binning as `roll_up` with `return_df=True`, but is
+        meant for building roll-ups of many predictors at once, for example
+        the top predictors per channel. The binning is materialized once, the
+        predictor types, numeric ranges and the models per topic are looked
+        up in one go, and all numeric predictors and topics are combined in
+        a single grouped interval join. Symbolic predictors are rolled up per
+        predictor and topic, optionally in parallel.
+
+        Parameters
+        ----------
+        predictors : str | list
+            Names of the predictors to roll up.
+        n, distribution, boundaries, symbols, minimum, maximum, aggregation, as_numeric
+            See `roll_up`.
+        max_workers : int, default=1
+            The number of threads to roll up the symbolic predictors with.
+
+        Returns
+        -------
+        pl.DataFrame
+            The binning with the lift aggregated over all the models, per
+            predictor and per set of models.
+
+        Examples
+        --------
+        >>> top_predictors = ["Customer.Age", "Customer.AnnualIncome"]
+        >>> dm.bin_aggregator.roll_up_many(top_predictors, aggregation="Channel")
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers should be at least 1")
+        if not isinstance(predictors, list):
+            predictors = [predictors]
+        self.materialize()
+        topic_col = aggregation if aggregation is not None else "Topic"
+
+        predictor_types = (
+            self.all_predictorbinning.filter(pl.col("PredictorName").is_in(predictors))
+            .group_by("PredictorName")
+            .agg(pl.first("isNumeric"))
+            .collect()
+        )
+        is_numeric = dict(predictor_types.iter_rows())
+        missing = [p for p in predictors if p not in is_numeric]
+        if missing:
+            raise ValueError(f"Predictors not found in the binning: {missing}")
+        if as_numeric is not None:
+            is_numeric = {p: as_numeric for p in predictors}
+        numeric_predictors = [p for p in predictors if is_numeric[p]]
+        symbolic_predictors = [p for p in predictors if not is_numeric[p]]
+
+        if aggregation is None:
+            topic_models = self.all_predictorbinning.select(
+                pl.lit("All").alias(topic_col), pl.col("ModelID").unique()
+            )
+        else:
+            topic_models = (
+                self.all_predictorbinning.select(aggregation, "ModelID")
+                .unique()
+                .filter(pl.col(aggregation).is_not_null())
+            )
+        topic_models = topic_models.collect()
+        topic_ids = {
+            topic: ids
+            for topic, ids in topic_models.group_by(topic_col)
+            .agg(pl.col("ModelID").sort())
+            .iter_rows()
+        }
+        topic_ids = {topic: topic_ids[topic] for topic in sorted(topic_ids)}
+
+        all_binnings = []
+        if numeric_predictors:
+            boundaries = (
+                []
+                if boundaries is None
+                else (boundaries if isinstance(boundaries, list) else [boundaries])
+            )
+            minmax = {
+                p: (lo, hi)
+                for p, lo, hi in self._numbinning_minmax(numeric_predictors).iter_rows()
+            }
+            targets = pl.concat(
+                [
+                    self.create_empty_numbinning(
+                        predictor=predictor,
+                        n=n,
+                        distribution=distribution,
+                        boundaries=boundaries.copy(),
+                        minimum=(
+                            minimum
+                            if minimum is not None
+                            else minmax.get(predictor, (None, None))[0]
+                        ),
+                        maximum=(
+                            maximum
+                            if maximum is not None
+                            else minmax.get(predictor, (None, None))[1]
+                        ),
+                    )
+                    for predictor in numeric_predictors
+                ],
+                how="vertical_relaxed",
+            ).join(
+                pl.DataFrame(
+                    {
+                        topic_col: list(topic_ids.keys()),
+                        "TopicModels": [len(ids) for ids in topic_ids.values()],
+                    },
+                    schema_overrides={topic_col: topic_models.schema[topic_col]},
+                ),
+                how="cross",
+            )
+            sources = self.get_source_numbinnings(numeric_predictors).join(
+                topic_models, on="ModelID"
+            )
+            all_binnings.append(
+                self.combine_numbinnings(
+                    sources,
+                    targets,
+                    n_models=pl.col("TopicModels"),
+                    by=["PredictorName", topic_col],
+                ).drop("TopicModels")
+            )
+
+        def roll_up_symbolic(predictor: str) -> pl.DataFrame:
+            symbol_list = self.create_symbol_list(
+                predictor=predictor,
+                n_symbols=n,
+                musthave_symbols=(
+                    []
+                    if symbols is None
+                    else (symbols if isinstance(symbols, list) else [symbols])
+                ),
+            )
+            return pl.concat(
+                [
+                    self.accumulate_sym_binnings(
+                        predictor, ids, symbol_list
+                    ).with_columns(pl.lit(topic).alias(topic_col))
+                    for topic, ids in topic_ids.items()
+                ],
+                how="vertical_relaxed",
+            )
+
+        if max_workers > 1 and len(symbolic_predictors) > 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                all_binnings.extend(pool.map(roll_up_symbolic, symbolic_predictors))
+        else:
+            all_binnings.extend(map(roll_up_symbolic, symbolic_predictors))
+
+        predictor_order = {predictor: i for i, predictor in enumerate(predictors)}
+        return (
+            pl.concat(all_binnings, how="vertical_relaxed")
+            .with_columns(
+                pl.col(topic_col).cast(pl.Utf8),
+                pl.col("Models").cast(pl.Int32),
+            )
+            .sort(
+                pl.col("PredictorName").replace_strict(predictor_order),
+                topic_col,
+                maintain_order=True,
+            )
+        )
+
     def accumulate_num_binnings(
         self, predictor, modelids, target_binning, verbose=False
     ) -> pl.DataFrame:
@@ -501,6 +714,21 @@ class BinAggregator(LazyNamespace):
 
         return binnings
 
+    def _numbinning_minmax(self, predictors: list) -> pl.DataFrame:
+        """The numeric range of predictors across all models, in one collect."""
+        return (
+            self.all_predictorbinning.filter(pl.col("Type") == "numeric")
+            .filter(pl.col("PredictorName").is_in(predictors))
+            .filter(pl.col("BinLowerBound").is_not_null())
+            .filter(pl.col("BinUpperBound").is_not_null())
+            .group_by("PredictorName")
+            .agg(
+                pl.min("BinLowerBound").alias("Minimum"),
+                pl.max("BinUpperBound").alias("Maximum"),
+            )
+            .collect()
+        )
+
     def create_empty_numbinning(
         self,
         predictor: str,
@@ -512,26 +740,13 @@ class BinAggregator(LazyNamespace):
     ) -> pl.DataFrame:
         import numpy as np
 
-        # take min/max across all models
-        bins_minmax = (
-            self.all_predictorbinning.filter(pl.col("Type") == "numeric")
-            .filter(pl.col("PredictorName") == predictor)
-            .filter(pl.col("BinLowerBound").is_not_null())
-            .filter(pl.col("BinUpperBound").is_not_null())
-            .group_by("ModelID", "PredictorName")
-            .agg(
-                (
-                    pl.min("BinLowerBound").alias("Minimum"),
-                    pl.max("BinUpperBound").alias("Maximum"),
-                    # pl.max("BinIndex").alias("Bins"),
-                )
-            )
-            .collect()
-        )
-        if minimum is None:
-            minimum = bins_minmax.select(pl.col("Minimum").min()).item()
-        if maximum is None:
-            maximum = bins_minmax.select(pl.col("Maximum").max()).item()
+        if minimum is None or maximum is None:
+            # take min/max across all models
+            bins_minmax = self._numbinning_minmax([predictor])
+            if minimum is None:
+                minimum = bins_minmax["Minimum"].min()
+            if maximum is None:
+                maximum = bins_minmax["Maximum"].max()
         if boundaries is None:
             boundaries = []
 
@@ -596,14 +811,29 @@ class BinAggregator(LazyNamespace):
         return target_binning
 
     def get_source_numbinning(self, predictor: str, modelid: str) -> pl.DataFrame:
+        return self.get_source_numbinnings(predictor, [modelid])
+
+    def get_source_numbinnings(
+        self, predictors: Union[str, list], modelids: Optional[list] = None
+    ) -> pl.DataFrame:
+        """The numeric binning of predictors for a set of models, in one collect.
+
+        Without modelids, the binning of all models is returned.
+        """
+        if not isinstance(predictors, list):
+            predictors = [predictors]
         is_model_immature = (
             (pl.sum("BinPositives") + pl.sum("BinNegatives")) < 200
         ) | (pl.max("BinIndex") < 2)
 
+        binning = self.all_predictorbinning.filter(
+            pl.col("Type") == "numeric"
+        ).filter(pl.col("PredictorName").is_in(predictors))
+        if modelids is not None:
+            binning = binning.filter(pl.col("ModelID").is_in(modelids))
+
         return (
-            self.all_predictorbinning.filter(pl.col("Type") == "numeric")
-            .filter(pl.col("PredictorName") == predictor)
-            .filter(pl.col("ModelID") == modelid)
+            binning
             .select(
                 "ModelID",
                 "PredictorName",
@@ -614,7 +844,7 @@ class BinAggregator(LazyNamespace):
                 "BinSymbol",
                 "Lift",
                 # Set bin response count to 0 for immature models
-                pl.when(is_model_immature)
+                pl.when(is_model_immature.over("ModelID", "PredictorName"))
                 .then(pl.lit(0.0))
                 .otherwise(pl.col("BinPositives") + pl.col("BinNegatives"))
                 .alias("BinResponses"),
@@ -622,6 +852,96 @@ class BinAggregator(LazyNamespace):
             .collect()
         )
 
+    def combine_numbinnings(
+        self,
+        sources: pl.DataFrame,
+        target: pl.DataFrame,
+        n_models: Union[int, pl.Expr],
+        by: Optional[list] = None,
+        verbose=False,
+    ) -> pl.DataFrame:
+        """Combines the numeric binnings of many models into the target binning.
+
+        Vectorized equivalent of folding combine_two_numbinnings over the
+        models. All overlapping source and target intervals are found in one
+        range join. The lift of a target bin is the mean of the source lifts
+        weighted by the fraction of the target bin they cover, and source
+        responses are attributed proportionally to the overlap.
+
+        Parameters
+        ----------
+        sources : pl.DataFrame
+            The source binnings of all models, as from get_source_numbinnings
+        target : pl.DataFrame
+            The (empty) target binning, as from create_empty_numbinning
+        n_models : int | pl.Expr
+            The number of models combined, including models without binning.
+            Can be an expression on the target, when combining several groups.
+        by : list, optional
+            Columns present in both sources and target. When given, source bins
+            only attribute to the target bins of the same group, so many
+            predictors and topics are combined at once.
+        verbose : bool, optional
+            Show the attribution of all source bins, by default False
+        """
+        by = [] if by is None else by
+        keys = ["BinIndex"] + by
+        overlap = pl.min_horizontal(
+            "BinUpperBound", "BinUpperBound_target"
+        ) - pl.max_horizontal("BinLowerBound", "BinLowerBound_target")
+        attribution = (
+            sources.join_where(
+                target.select(
+                    *[pl.col(col).alias(f"{col}_target") for col in keys],
+                    pl.col("BinLowerBound").alias("BinLowerBound_target"),
+                    pl.col("BinUpperBound").alias("BinUpperBound_target"),
+                ),
+                *[pl.col(col) == pl.col(f"{col}_target") for col in by],
+                pl.col("BinLowerBound") < pl.col("BinUpperBound_target"),
+                pl.col("BinLowerBound_target") < pl.col("BinUpperBound"),
+            )
+            # Zero-width and inverted source bins pass the range join without
+            # overlapping, combine_two_numbinnings skips these as well
+            .filter(overlap > 0)
+            .with_columns(
+                TargetAttribution=overlap
+                / (pl.col("BinUpperBound_target") - pl.col("BinLowerBound_target")),
+                SourceFraction=overlap
+                / (pl.col("BinUpperBound") - pl.col("BinLowerBound")),
+            )
+            .sort(*by, "ModelID", "BinIndex", "BinIndex_target")
+        )
+
+        if verbose:
+            print(attribution)
+
+        attributed = attribution.group_by(f"{col}_target" for col in keys).agg(
+            Coverage=pl.sum("TargetAttribution"),
+            WeightedLift=(pl.col("TargetAttribution") * pl.col("Lift")).sum(),
+            Responses=(pl.col("SourceFraction") * pl.col("BinResponses")).sum(),
+        )
+
+        return (
+            target.join(
+                attributed,
+                left_on=keys,
+                right_on=[f"{col}_target" for col in keys],
+                how="left",
+            )
+            .with_columns(
+                Lift=pl.when(pl.col("Coverage") > 0)
+                .then(
+                    (pl.col("BinCoverage") * pl.col("Lift") + pl.col("WeightedLift"))
+                    / (pl.col("BinCoverage") + pl.col("Coverage"))
+                )
+                .otherwise(pl.col("Lift")),
+                BinResponses=pl.col("BinResponses") + pl.col("Responses").fill_null(0),
+                BinCoverage=pl.col("BinCoverage") + pl.col("Coverage").fill_null(0),
+                Models=pl.col("Models") + n_models,
+            )
+            .select(target.columns)
+        )
+
     def combine_two_numbinnings(
         self, source: pl.DataFrame, target: pl.DataFrame, verbose=False
     ) -> pl.DataFrame:
@@ -2,9 +2,10 @@ __all__ = ["Reports"]
 import logging
 import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from os import PathLike
 from pathlib import Path
-from typing import TYPE_CHECKING, Callable, List, Literal, Optional, Union
+from typing import TYPE_CHECKING, Callable, Dict, List, Literal, Optional, Tuple, Union
 
 import polars as pl
 
@@ -12,6 +13,14 @@ from ..utils import cdh_utils
 from ..utils.namespaces import LazyNamespace
 from ..utils.types import QUERY
 from ..utils.report_utils import (
+    EXCEL_ROW_LIMIT,
+    ReportExecutor,
+    health_check_active_models_filter,
+    health_check_excluded_filter,
+    health_check_last_data,
+    read_health_check_bundle,
+    write_excel_streaming,
+    write_health_check_bundle,
     serialize_query,
     run_quarto,
     copy_quarto_file,
@@ -47,6 +56,8 @@ class Reports(LazyNamespace):
         keep_temp_files: bool = False,
         verbose: bool = False,
         progress_callback: Optional[Callable[[int, int], None]] = None,
+        max_workers: int = 1,
+        executor: Optional[ReportExecutor] = None,
         model_file_path: Optional[PathLike] = None,
         predictor_file_path: Optional[PathLike] = None,
         qmd_file: Optional[PathLike] = None,
@@ -82,6 +93,15 @@ class Reports(LazyNamespace):
         progress_callback : Callable[[int, int], None], optional
             A callback function to report progress. Used only in the Streamlit app.
             The function should accept two integers: the current progress and the total.
+            It is called from the calling thread once per finished report, also when
+            rendering in parallel.
+        max_workers : int, default=1
+            The number of reports to render concurrently. With more than one worker,
+            every report is rendered in its own subdirectory of the temp directory.
+        executor : ReportExecutor, optional
+            Executes the reports in a kernel that stays alive across reports instead
+            of starting a new one for every report. Reports are then executed one at
+            a time, only the final rendering by Quarto happens in parallel.
         model_file_path : Union[str, Path, None], optional
             Optional name of the actual model data file, so it does not get copied
         predictor_file_path : Union[str, Path, None], optional
@@ -117,6 +137,8 @@ class Reports(LazyNamespace):
             or not all(isinstance(i, str) for i in model_ids)
         ):
             raise ValueError("No valid model IDs")
+        if max_workers < 1:
+            raise ValueError("max_workers should be at least 1")
         output_dir, temp_dir = cdh_utils.create_working_and_temp_dir(name, output_dir)
 
         try:
@@ -129,60 +151,74 @@ class Reports(LazyNamespace):
                 # Copy the custom qmd file to temp directory
                 shutil.copy(qmd_file, temp_dir / qmd_filename)
 
-            # Copy data to a temp dir only if the files are not passed in already
+            # Copy data to a temp dir only if the files are not passed in already.
+            # Every model gets its own slice so each render only reads its own rows.
             if (
                 (model_file_path is None) and (self.datamart.model_data is not None)
             ) or (
                 (predictor_file_path is None)
                 and (self.datamart.predictor_data is not None)
             ):
-                model_file_path, predictor_file_path = self.datamart.save_data(
-                    temp_dir, selected_model_ids=model_ids
-                )
-
-            output_file_paths = []
-            for i, model_id in enumerate(model_ids):
-                output_filename = get_output_filename(
-                    name, "ModelReport", model_id, output_type
-                )
-                run_quarto(
-                    qmd_file=qmd_filename,
-                    output_filename=output_filename,
+                data_files = self._save_model_slices(temp_dir / "data", model_ids)
+            else:
+                data_files = {
+                    model_id: (model_file_path, predictor_file_path)
+                    for model_id in model_ids
+                }
+
+            def render(i: int, model_id: str) -> Path:
+                work_dir = temp_dir
+                if max_workers > 1:
+                    # Quarto writes its params and project files into the
+                    # working directory, so concurrent renders need their own
+                    work_dir = temp_dir / f"model_{i}"
+                    work_dir.mkdir()
+                    shutil.copy(temp_dir / qmd_filename, work_dir / qmd_filename)
+                    if (temp_dir / "assets").exists():
+                        shutil.copytree(temp_dir / "assets", work_dir / "assets")
+                return self._render_model_report(
+                    model_id,
+                    *data_files[model_id],
+                    work_dir=work_dir,
+                    qmd_filename=qmd_filename,
+                    name=name,
+                    title=title,
+                    subtitle=subtitle,
+                    disclaimer=disclaimer,
+                    only_active_predictors=only_active_predictors,
                     output_type=output_type,
-                    params={
-                        "report_type": "ModelReport",
-                        "model_file_path": str(model_file_path),
-                        "predictor_file_path": str(predictor_file_path),
-                        "model_id": model_id,
-                        "only_active_predictors": only_active_predictors,
-                        "title": title,
-                        "subtitle": subtitle,
-                        "disclaimer": disclaimer,
-                    },
-                    project={"title": title, "type": "default"},
-                    analysis={
-                        "predictions": False,
-                        "predictors": (self.datamart.predictor_data is not None),
-                        "models": (self.datamart.model_data is not None),
-                    },
-                    temp_dir=temp_dir,
                     verbose=verbose,
                     size_reduction_method=size_reduction_method,
+                    executor=executor,
                 )
-                output_path = temp_dir / output_filename
-                if verbose or not output_path.exists():
-                    # print parameters so they can be copy/pasted into the quarto docs for debugging
-                    if model_file_path is not None:
-                        print(f'model_file_path = "{model_file_path}"')
-                    if predictor_file_path is not None:
-                        print(f'predictor_file_path = "{predictor_file_path}"')
-                    print(f'model_id = "{model_id}"')
-                    print(f"output_path = {output_path}")
-                if not output_path.exists():
-                    raise ValueError(f"Failed to write the report: {output_filename}")
-                output_file_paths.append(output_path)
-                if progress_callback:
-                    progress_callback(i + 1, len(model_ids))
+
+            output_file_paths: List[Optional[Path]] = [None] * len(model_ids)
+            if max_workers > 1:
+                # Quarto runs as a subprocess, so threads are enough to keep
+                # several renders going at once
+                with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                    futures = {
+                        pool.submit(render, i, model_id): i
+                        for i, model_id in enumerate(model_ids)
+                    }
+                    try:
+                        for completed, future in enumerate(
+                            as_completed(futures), start=1
+                        ):
+                            output_file_paths[futures[future]] = future.result()
+                            if progress_callback:
+                                progress_callback(completed, len(model_ids))
+                    except BaseException:
+                        for future in futures:
+                            future.cancel()
+                        raise
+            else:
+                for i, model_id in enumerate(model_ids):
+                    output_file_paths[i] = render(i, model_id)
+                    if progress_callback:
+                        progress_callback(i + 1, len(model_ids))
+            output_path = output_file_paths[-1]
+            output_filename = output_path.name
             # Is this just a difficult way to copy the file? Why not shutil.copy? Or
             # even pass in the output-dir property to the quarto project?
             file_data, file_name = cdh_utils.process_files_to_bytes(
@@ -204,6 +240,123 @@ class Reports(LazyNamespace):
                 if temp_dir.exists() and temp_dir.is_dir():
                     shutil.rmtree(temp_dir, ignore_errors=True)
 
+    def _save_model_slices(
+        self, path: Path, model_ids: List[str]
+    ) -> Dict[str, Tuple[Optional[Path], Optional[Path]]]:
+        """Writes the model and predictor data of every model to its own files.
+
+        The data is filtered and collected once, then split per model, so
+        the report for a single model does not need to scan the rows of all
+        the others.
+
+        Parameters
+        ----------
+        path : Path
+            The directory to write the files to
+        model_ids : List[str]
+            The model IDs to write a slice for
+
+        Returns
+        -------
+        Dict[str, Tuple[Optional[Path], Optional[Path]]]
+            The paths to the model and predictor data file, per model ID
+        """
+        from ..pega_io import cache_to_file
+
+        def slices(df: Optional[pl.LazyFrame], prefix: str) -> List[Optional[Path]]:
+            if df is None:
+                return [None] * len(model_ids)
+            df = df.filter(pl.col("ModelID").is_in(model_ids)).collect()
+            parts = {
+                key[0]: part
+                for key, part in df.partition_by("ModelID", as_dict=True).items()
+            }
+            return [
+                cache_to_file(
+                    parts.get(model_id, df.clear()),
+                    path,
+                    name=f"{prefix}_{i}",
+                    cache_type="parquet",
+                )
+                for i, model_id in enumerate(model_ids)
+            ]
+
+        return dict(
+            zip(
+                model_ids,
+                zip(
+                    slices(self.datamart.model_data, "cached_model_data"),
+                    slices(self.datamart.predictor_data, "cached_predictor_data"),
+                ),
+            )
+        )
+
+    def _render_model_report(
+        self,
+        model_id: str,
+        model_file_path: Optional[PathLike],
+        predictor_file_path: Optional[PathLike],
+        *,
+        work_dir: Path,
+        qmd_filename: str,
+        name: Optional[str],
+        title: str,
+        subtitle: str,
+        disclaimer: str,
+        only_active_predictors: bool,
+        output_type: str,
+        verbose: bool,
+        size_reduction_method: Optional[Literal["strip", "cdn"]],
+        executor: Optional[ReportExecutor] = None,
+    ) -> Path:
+        """Renders the report of a single model in `work_dir`.
+
+        Returns
+        -------
+        Path
+            The path to the rendered report
+        """
+        output_filename = get_output_filename(
+            name, "ModelReport", model_id, output_type
+        )
+        run_quarto(
+            qmd_file=qmd_filename,
+            output_filename=output_filename,
+            output_type=output_type,
+            params={
+                "report_type": "ModelReport",
+                "model_file_path": str(model_file_path),
+                "predictor_file_path": str(predictor_file_path),
+                "model_id": model_id,
+                "only_active_predictors": only_active_predictors,
+                "title": title,
+                "subtitle": subtitle,
+                "disclaimer": disclaimer,
+            },
+            project={"title": title, "type": "default"},
+            analysis={
+                "predictions": False,
+                "predictors": (self.datamart.predictor_data is not None),
+                "models": (self.datamart.model_data is not None),
+            },
+            temp_dir=work_dir,
+            verbose=verbose,
+            size_reduction_method=size_reduction_method,
+            executor=executor,
+        )
+        output_path = work_dir / output_filename
+        if verbose or not output_path.exists():
+            # print parameters so they can be copy/pasted into the quarto docs for debugging
+            if model_file_path is not None:
+                print(f'model_file_path = "{model_file_path}"')
+            if predictor_file_path is not None:
+                print(f'predictor_file_path = "{predictor_file_path}"')
+            print(f'model_id = "{model_id}"')
+            print(f"output_path = {output_path}")
+        if not output_path.exists():
+            raise ValueError(f"Failed to write the report: {output_filename}")
+        return output_path
+
     def health_check(
         self,
         name: Optional[
@@ -222,10 +375,13 @@ class Reports(LazyNamespace):
         model_file_path: Optional[PathLike] = None,
         predictor_file_path: Optional[PathLike] = None,
         prediction_file_path: Optional[PathLike] = None,
+        bundle_file_path: Optional[PathLike] = None,
+        materialize: Optional[Literal["memory", "ipc"]] = None,
         qmd_file: Optional[PathLike] = None,
         size_reduction_method: Optional[
             Literal["strip", "cdn"]
         ] = "cdn",  # TODO: temporary default to support DJS use cases
+        executor: Optional[ReportExecutor] = None,
     ) -> Path:
         """
         Generates Health Check report for ADM models, optionally including predictor and prediction sections.
@@ -260,6 +416,16 @@ class Reports(LazyNamespace):
         prediction_file_path : Union[str, Path, None], optional
             Optional name of the actual predictions data file. If not provided but prediction object
             is given, the data will be automatically cached from the prediction object.
+        bundle_file_path : Union[str, Path, None], optional
+            Optional bundle of precomputed tables, created with `health_check_bundle`.
+            The report uses the tables from the bundle instead of computing them.
+            The remaining tables and the plots still come from the datamart.
+            The report uses the thresholds the bundle was created with.
+        materialize : {"memory", "ipc"}, optional
+            If given, the report parses the data only once, keeping it in memory
+            or spilling it to Arrow IPC files, see `ADMDatamart.materialize`.
+            By default the data is read lazily from the files, which uses the
+            least memory but parses the files again for every table.
         qmd_file : Union[str, Path, None], optional
             Optional path to the Quarto file to use for the health check report.
             If None, defaults to "HealthCheck.qmd".
@@ -267,6 +433,9 @@ class Reports(LazyNamespace):
             When None will fully embed all resources into the HTML output.
             When "cdn" will pass this on to Quarto and Plotly so Javascript libraries will be loaded from the internet.
             When "strip" the HTML will be post-processed to remove duplicate Javascript that would otherwise get embedded multiple times.
+        executor : ReportExecutor, optional
+            Executes the report in the warm kernel of this executor instead of
+            letting Quarto start a new one.
 
         Returns
         -------
@@ -310,6 +479,15 @@ class Reports(LazyNamespace):
             if (prediction_file_path is None) and (prediction is not None):
                 prediction_file_path = prediction.save_data(temp_dir)
 
+            # The tables in a bundle depend on the thresholds it was created with
+            bundle_parameters = (
+                read_health_check_bundle(bundle_file_path, names=["parameters"])[
+                    "parameters"
+                ].row(0, named=True)
+                if bundle_file_path is not None
+                else {}
+            )
+
             serialized_query = serialize_query(query)
             run_quarto(
                 qmd_file=qmd_filename,
@@ -326,10 +504,15 @@ class Reports(LazyNamespace):
                     "prediction_file_path": str(prediction_file_path)
                     if prediction_file_path is not None
                     else "",
+                    "bundle_file_path": str(Path(bundle_file_path).resolve())
+                    if bundle_file_path is not None
+                    else "",
+                    "materialize": materialize or "",
                     "query": serialized_query,
                     "title": title,
                     "subtitle": subtitle,
                     "disclaimer": disclaimer,
+                    **bundle_parameters,
                 },
                 project={"title": title, "type": "default"},
                 analysis={
@@ -340,6 +523,7 @@ class Reports(LazyNamespace):
                 temp_dir=temp_dir,
                 verbose=verbose,
                 size_reduction_method=size_reduction_method,
+                executor=executor,
             )
 
             # TODO why not print paths earlier, before the quarto call?
@@ -365,10 +549,128 @@ class Reports(LazyNamespace):
             if not keep_temp_files and temp_dir.exists() and temp_dir.is_dir():
                 shutil.rmtree(temp_dir, ignore_errors=True)
 
+    def health_check_bundle(
+        self,
+        path: PathLike,
+        *,
+        query: Optional[QUERY] = None,
+        threshold_updated_days: int = 30,
+        configuration_responses_threshold: int = 10000,
+    ) -> Path:
+        """
+        Precomputes the tables of the Health Check into a single bundle file.
+
+        The Health Check computes its tables from the raw data while it renders.
+        This computes them up front, batching everything that can be computed
+        together into one `pl.collect_all` so scans of the data are shared. Pass
+        the bundle to `health_check` with `bundle_file_path` to render (or re-render)
+        the report without recomputing these tables.
+
+        The report excludes invalid channels and unused configurations half-way,
+        so the bundle follows the same steps and stores the tables as they are at
+        the point the report uses them. The last snapshots are stored once per
+        step: ``last_data_all`` before any exclusions, ``last_data_valid_channels``
+        after excluding invalid channels and ``last_data_valid_configurations``
+        after also excluding unused configurations. The latter two are only
+        stored when the report excludes anything at that step.
+
+        The bundle holds the summary tables only: the channel, configuration and
+        trend overviews, the last snapshots and the global predictor overview.
+        The plots, bubble chart data and gains tables are still computed from
+        the datamart while rendering, so the report needs the source data too.
+        It reads that data lazily, unless asked to materialize it.
+
+        Parameters
+        ----------
+        path : Union[str, Path]
+            The file to write the bundle to
+        query : QUERY, optional
+            Optional extra filter on the datamart data. Pass the same query to
+            `health_check` when rendering from the bundle.
+        threshold_updated_days : int, default=30
+            Models without updates in this number of days are considered inactive
+        configuration_responses_threshold : int, default=10000
+            Configurations with fewer responses (or no positives) are excluded
+            from the detailed analyses
+
+        Returns
+        -------
+        Path
+            The path to the bundle
+        """
+        datamart = self.datamart if query is None else self.datamart.filter(query)
+        active_models_filter = health_check_active_models_filter(threshold_updated_days)
+        tables: Dict[str, pl.DataFrame] = {}
+
+        def collect(**frames: pl.LazyFrame):
+            tables.update(zip(frames.keys(), pl.collect_all(frames.values())))
+
+        collect(
+            channel_overview=datamart.aggregates.summary_by_channel(
+                query=active_models_filter
+            ),
+            overall_summary=datamart.aggregates.overall_summary(every="1w"),
+            last_data_all=health_check_last_data(datamart),
+        )
+
+        channel_tables: Dict[str, pl.LazyFrame] = {}
+        unused_channels = tables["channel_overview"].filter(pl.col("isValid").not_())
+        if unused_channels.height > 0:
+            datamart = datamart.filter(
+                health_check_excluded_filter(
+                    unused_channels, on=["Channel", "Direction"]
+                )
+            )
+            channel_tables["last_data_valid_channels"] = health_check_last_data(
+                datamart
+            )
+        collect(
+            model_overview=datamart.aggregates.summary_by_configuration(),
+            configuration_overview=datamart.aggregates.last(table="model_data")
+            .group_by("Configuration")
+            .agg(pl.sum("ResponseCount").alias("Responses"), pl.sum("Positives")),
+            **channel_tables,
+        )
+
+        final_tables: Dict[str, pl.LazyFrame] = {}
+        configuration_overview = tables["configuration_overview"]
+        unused_configurations = configuration_overview.filter(
+            (pl.col("Responses") < configuration_responses_threshold)
+            | (pl.col("Positives") == 0)
+        )["Configuration"].unique()
+        if 0 < unused_configurations.len() != configuration_overview.height:
+            datamart = datamart.filter(
+                health_check_excluded_filter(
+                    unused_configurations.to_frame(), on=["Configuration"]
+                )
+            )
+            final_tables["last_data_valid_configurations"] = health_check_last_data(
+                datamart
+            )
+        if datamart.predictor_data is not None:
+            final_tables["predictors_global_overview"] = (
+                datamart.aggregates.predictors_global_overview()
+            )
+        collect(**final_tables)
+
+        tables["parameters"] = pl.DataFrame(
+            {
+                "threshold_updated_days": [threshold_updated_days],
+                "configuration_responses_threshold": [
+                    configuration_responses_threshold
+                ],
+            }
+        )
+        return write_health_check_bundle(tables, path)
+
     def excel_report(
         self,
         name: Union[Path, str] = Path("Tables.xlsx"),
         predictor_binning: bool = False,
+        *,
+        streaming: bool = False,
+        batch_size: int = 50_000,
+        overflow: Literal["sheets", "parquet", "csv"] = "sheets",
     ) -> tuple[Optional[Path], list[str]]:
         """
         Export raw data to an Excel file.
@@ -388,6 +690,18 @@ class Reports(LazyNamespace):
             If True, include predictor_binning data in the export.
             This is the last snapshot of the raw data, so it can be big.
             Defaults to False.
+        streaming: bool, optional
+            If True, the tables are written in batches of rows instead of collected
+            in full first, so memory use stays bounded by `batch_size`. Tables that
+            do not fit in a single sheet are handled according to `overflow` rather
+            than skipped. Defaults to False.
+        batch_size: int, optional
+            The number of rows to collect at a time when streaming.
+            Defaults to 50,000.
+        overflow: Literal["sheets", "parquet", "csv"], optional
+            When streaming, what to do with tables that exceed Excel's row limit:
+            continue on extra sheets, or also write the full table to a parquet or
+            CSV file next to the Excel file. Defaults to "sheets".
 
         Returns
         -------
@@ -398,7 +712,6 @@ class Reports(LazyNamespace):
         """
         from xlsxwriter import Workbook
 
-        EXCEL_ROW_LIMIT = 1048576
         # Standard ZIP format limit is 4gb but 3gb would already crash most laptops
         ZIP_SIZE_LIMIT_MB = 3000
         warning_messages = []
@@ -470,6 +783,33 @@ class Reports(LazyNamespace):
             print("No data available to export.")
             return None, warning_messages
 
+        # Excel has no list type, so lists are written as comma separated strings
+        tabs = {
+            tab: data.with_columns(
+                pl.col(pl.List(pl.Categorical), pl.List(pl.Utf8))
+                .list.eval(pl.element().cast(pl.Utf8))
+                .list.join(", ")
+            )
+            for tab, data in tabs.items()
+        }
+
+        if streaming:
+            try:
+                warning_messages.extend(
+                    write_excel_streaming(
+                        tabs, name, batch_size=batch_size, overflow=overflow
+                    )
+                )
+            except Exception as e:
+                warning_msg = f"Error creating Excel file: {str(e)}. Try exporting to CSV instead."
+                warning_messages.append(warning_msg)
+                print(warning_msg)
+                return None, warning_messages
+            for warning_msg in warning_messages:
+                print(warning_msg)
+            print(f"Data exported to {name}")
+            return name, warning_messages
+
         try:
             with Workbook(
                 name, options={"nan_inf_to_errors": True, "remove_timezone": True}
@@ -478,11 +818,6 @@ class Reports(LazyNamespace):
                 wb.use_zip64()
 
                 for tab, data in tabs.items():
-                    data = data.with_columns(
-                        pl.col(pl.List(pl.Categorical), pl.List(pl.Utf8))
-                        .list.eval(pl.element().cast(pl.Utf8))
-                        .list.join(", ")
-                    )
                     data = data.collect()
 
                     # Check data size (with a multiplication factor for Excel XML overhead)
@@ -503,7 +838,8 @@ class Reports(LazyNamespace):
                             f"The data for sheet '{tab}' exceeds Excel's row limit "
                             f"({data.shape[0]:,} rows > {EXCEL_ROW_LIMIT:,} rows). "
                             "This sheet will not be written to the Excel file. "
-                            "Please filter your data before generating the Excel report."
+                            "Please filter your data before generating the Excel report, "
+                            "or use streaming=True to split it over multiple sheets."
                         )
                         warning_messages.append(warning_msg)
                         print(warning_msg)
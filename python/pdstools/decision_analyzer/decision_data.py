@@ -1,6 +1,8 @@
+import json
 from bisect import bisect_left
+from concurrent.futures import Future, ThreadPoolExecutor
 from functools import cached_property
-from typing import List, Literal, Optional, Union, Dict
+from typing import Dict, Iterable, List, Literal, Optional, Tuple, Union
 import warnings
 
 import polars as pl
@@ -17,6 +19,51 @@ from .utils import (
     rename_and_cast_types,
 )
 
+# Expression nodes that combine rows, so their result on the pre-aggregated
+# cube differs from their result on the raw data
+_NON_ROWWISE_NODES = {
+    "Agg",
+    "Len",
+    "Window",  # .over() before polars 1.34
+    "Over",
+    "Rolling",
+    "RollingExpr",
+    "RollingExprBy",
+    "CumCount",
+    "CumSum",
+    "CumProd",
+    "CumMin",
+    "CumMax",
+    "Diff",
+    "Shift",
+    "Rank",
+    "IsDuplicated",
+    "IsUnique",
+    "IsFirstDistinct",
+    "IsLastDistinct",
+}
+
+
+def _expression_nodes(expr: pl.Expr) -> Optional[set]:
+    """The names of all nodes in the tree of an expression, or None when the
+    expression cannot be inspected (e.g. because it calls Python functions)."""
+    try:
+        tree = json.loads(expr.meta.serialize(format="json"))
+    except Exception:
+        return None
+    nodes = set()
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            nodes.update(node.keys())
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+        elif isinstance(node, str):
+            nodes.add(node)
+    return nodes
+
 
 class DecisionAnalyzer:
     """
@@ -46,6 +93,26 @@ class DecisionAnalyzer:
     # Also never access directly, use getPreaggregatedRemainingView.
     preaggregated_decision_data_remainingview: pl.LazyFrame = None
 
+    # The filter view over the unfiltered data. Built once on first use and kept
+    # when the global filters change, so filters that only touch its dimensions
+    # can be answered from it without rescanning the raw data.
+    _preaggregation_cube: pl.LazyFrame = None
+
+    # The global filters currently applied to decision_data, if any.
+    _global_filters: Optional[Union[pl.Expr, List[pl.Expr]]] = None
+
+    # Sampling hash per interaction, computed once over the unfiltered data and
+    # kept across global filter changes. Use interaction_hashes to access.
+    _interaction_hashes: pl.DataFrame = None
+
+    # Largest sample drawn so far per stratification for the current global
+    # filters. Smaller samples are nested in it and derived without a rescan.
+    _sample_cache: Dict[Tuple[str, ...], Tuple[int, pl.DataFrame]] = None
+
+    # Interaction-level columns stored with the sampling hash, so samples can
+    # be stratified on them without reading the data again.
+    sample_strata_columns = ["pyChannel", "pyDirection"]
+
     # Superset of all fields available for data filtering in various places.
     fields_for_data_filtering = [
         "pxDecisionTime",
@@ -239,6 +306,9 @@ class DecisionAnalyzer:
         # Also reset num_sample_interactions so it gets recalculated with new filters
         if hasattr(self, "_num_sample_interactions"):
             delattr(self, "_num_sample_interactions")
+        # A fresh dict rather than clearing it, so a background sample started
+        # for the previous filters can not write into it
+        self._sample_cache = {}
 
     def applyGlobalDataFilters(
         self, filters: Optional[Union[pl.Expr, List[pl.Expr]]] = None
@@ -251,27 +321,46 @@ class DecisionAnalyzer:
             self.decision_data = apply_filter(
                 self.unfiltered_raw_decision_data, filters
             )
+            self._global_filters = filters
 
     def resetGlobalDataFilters(self):
         self.decision_data = self.unfiltered_raw_decision_data
+        self._global_filters = None
         self._invalidate_cached_properties()
 
-    @cached_property
-    def getPreaggregatedFilterView(self):
-        """Pre-aggregates the full dataset over customers and interactions providing
-        a view of what is filtered at a stage.
+    @property
+    def _preaggregation_dimensions(self) -> set:
+        return self.preaggregation_columns.union(
+            {self.level, "StageOrder", "pxRecordType"}
+        )
 
-        This pre-aggregation is pretty similar to what "VBD" does to interaction
-        history. It aggregates over individual customers and interactions giving
-        summary statistics that are sufficient to drive most of the analyses
-        (but not all). The results of this pre-aggregation are much smaller
-        than the original data and is expected to easily fit in memory. We therefore
-        use polars caching to efficiently cache this.
+    def _filters_on_preaggregation_dimensions(
+        self, filters: Union[pl.Expr, List[pl.Expr]]
+    ) -> bool:
+        """True if all filters are row-wise predicates that only reference
+        columns the filter view is grouped by.
 
-        This "filter" view keeps the same organization as the decision analyzer data
-        in that it records the actions that get filtered out at stages. From this
-        a "remaining" view is easily derived.
+        Such predicates keep or drop complete groups, so filtering the
+        unfiltered filter view gives the same result as aggregating the
+        filtered raw data. Filters without any columns, or with aggregations
+        or windows, depend on the number of rows and do not qualify.
         """
+        filters = [filters] if isinstance(filters, pl.Expr) else filters
+        dimensions = self._preaggregation_dimensions
+
+        def on_dimensions(f: pl.Expr) -> bool:
+            columns = set(f.meta.root_names())
+            nodes = _expression_nodes(f)
+            return (
+                0 < len(columns)
+                and columns <= dimensions
+                and nodes is not None
+                and not nodes & _NON_ROWWISE_NODES
+            )
+
+        return all(on_dimensions(f) for f in filters)
+
+    def _preaggregate_filter_view(self, df: pl.LazyFrame) -> pl.LazyFrame:
         num_samples = 1  # TODO: when > 1 this breaks the .explode() I'm doing in some places(thresholding analysis e.g.), need to solve
         stats_cols = ["pxDecisionTime", "Value", "Propensity", "Priority"]
         exprs = [
@@ -289,13 +378,43 @@ class DecisionAnalyzer:
             pl.count().alias("Decisions"),
         ]
 
-        self.preaggregated_decision_data_filterview = (
-            self.decision_data.group_by(
-                self.preaggregation_columns.union(
-                    {self.level, "StageOrder", "pxRecordType"}
-                )
+        return df.group_by(self._preaggregation_dimensions).agg(exprs).collect().lazy()
+
+    @cached_property
+    def getPreaggregatedFilterView(self):
+        """Pre-aggregates the full dataset over customers and interactions providing
+        a view of what is filtered at a stage.
+
+        This pre-aggregation is pretty similar to what "VBD" does to interaction
+        history. It aggregates over individual customers and interactions giving
+        summary statistics that are sufficient to drive most of the analyses
+        (but not all). The results of this pre-aggregation are much smaller
+        than the original data and is expected to easily fit in memory. We therefore
+        use polars caching to efficiently cache this.
+
+        This "filter" view keeps the same organization as the decision analyzer data
+        in that it records the actions that get filtered out at stages. From this
+        a "remaining" view is easily derived.
+
+        The view over the unfiltered data is computed once and kept across
+        changes of the global filters. When the global filters only reference
+        the pre-aggregation dimensions, the view is derived by filtering that
+        cube instead of rescanning the raw data.
+        """
+        if self._global_filters is not None and not (
+            self._filters_on_preaggregation_dimensions(self._global_filters)
+        ):
+            self.preaggregated_decision_data_filterview = (
+                self._preaggregate_filter_view(self.decision_data)
             )
-            .agg(exprs)
+            return self.preaggregated_decision_data_filterview
+
+        if self._preaggregation_cube is None:
+            self._preaggregation_cube = self._preaggregate_filter_view(
+                self.unfiltered_raw_decision_data
+            )
+        self.preaggregated_decision_data_filterview = (
+            apply_filter(self._preaggregation_cube, self._global_filters)
             .collect()
             .lazy()
         )
@@ -338,12 +457,115 @@ class DecisionAnalyzer:
         )
         return self.preaggregated_decision_data_remainingview
 
+    @property
+    def interaction_hashes(self) -> pl.DataFrame:
+        """Sampling hash per interaction, with the interaction-level strata columns.
+
+        Computed once over the unfiltered data. The hash is a full 64 bit hash
+        of the interaction ID, and samples take the interactions with the
+        smallest hashes, so any sample is a subset of every larger sample.
+        """
+        if self._interaction_hashes is None:
+            available_columns = set(
+                self.unfiltered_raw_decision_data.collect_schema().names()
+            )
+            strata = [c for c in self.sample_strata_columns if c in available_columns]
+            self._interaction_hashes = (
+                self.unfiltered_raw_decision_data.group_by("pxInteractionID")
+                .agg(pl.first(strata))
+                .with_columns(SampleHash=pl.col("pxInteractionID").hash(seed=0))
+                .sort("SampleHash", "pxInteractionID")
+                .collect()
+            )
+        return self._interaction_hashes
+
     @cached_property
-    def sample(self):
+    def _sampling_frame(self) -> pl.DataFrame:
+        """The interaction hashes restricted to the interactions in decision_data."""
+        if self._global_filters is None:
+            return self.interaction_hashes
+        return self.interaction_hashes.join(
+            self.decision_data.select("pxInteractionID").unique().collect(),
+            on="pxInteractionID",
+            how="semi",
+            maintain_order="left",
+        )
+
+    @staticmethod
+    def _select_sample_interactions(
+        candidates: pl.DataFrame, size: int, stratify_by: Optional[List[str]] = None
+    ) -> pl.Series:
+        """Interaction IDs with the smallest sampling hashes.
+
+        When stratified, every stratum gets its proportional share of the sample
+        (rounded up), again taking the smallest hashes within the stratum.
         """
-        Create a sample of the data by taking the first 50,000 interactions.
-        If there are fewer than 50,000 total interactions, no sampling is performed.
+        if size >= candidates.height:
+            return candidates.get_column("pxInteractionID")
+        if not stratify_by:
+            return (
+                candidates.sort("SampleHash", "pxInteractionID")
+                .head(size)
+                .get_column("pxInteractionID")
+            )
+        quota = (pl.len().over(stratify_by) * size / candidates.height).ceil()
+        return (
+            candidates.sort("SampleHash", "pxInteractionID")
+            .filter(pl.int_range(1, pl.len() + 1).over(stratify_by) <= quota)
+            .get_column("pxInteractionID")
+        )
+
+    def draw_sample(
+        self, size: Optional[int] = None, stratify_by: Optional[List[str]] = None
+    ) -> pl.LazyFrame:
+        """Draws a reproducible sample of interactions from the decision data.
+
+        Samples are nested: a sample of a given size is a subset of any larger
+        sample with the same stratification. The largest sample drawn so far is
+        kept, so smaller samples are derived from it without reading the data
+        again.
+
+        Parameters
+        ----------
+        size : int, optional
+            Number of interactions to sample, defaults to sample_size
+        stratify_by : List[str], optional
+            Interaction-level columns, like pyChannel and pyDirection, to
+            stratify the sample on
+
+        Returns
+        -------
+        pl.LazyFrame
+            All decision data rows of the sampled interactions
         """
+        size = self.sample_size if size is None else size
+        stratify_by = list(stratify_by or [])
+        # Take references up front, so a background sample keeps working on the
+        # data it was started for even when the global filters change
+        decision_data = self.decision_data
+        sample_cache = self._sample_cache
+        candidates = self._sampling_frame
+
+        missing_strata = [c for c in stratify_by if c not in candidates.columns]
+        if missing_strata:
+            candidates = candidates.join(
+                decision_data.group_by("pxInteractionID")
+                .agg(pl.first(missing_strata))
+                .collect(),
+                on="pxInteractionID",
+                how="left",
+            )
+        interactions = self._select_sample_interactions(candidates, size, stratify_by)
+
+        key = tuple(stratify_by)
+        cached = sample_cache.get(key)
+        if cached is not None and cached[0] >= size:
+            return (
+                cached[1]
+                .filter(pl.col("pxInteractionID").is_in(interactions.implode()))
+                .lazy()
+            )
+
         needed_columns = [
             "pxInteractionID",
             "pyChannel",
@@ -364,43 +586,63 @@ class DecisionAnalyzer:
             "day",
             "is_mandatory",
         ]
-
         # Filter to only keep columns that exist in the data
-        available_cols = set(self.decision_data.collect_schema().names())
+        available_cols = set(decision_data.collect_schema().names())
         columns_to_keep = [col for col in needed_columns if col in available_cols]
 
-        print("In sample function")
-        total_interaction_count = (
-            self.decision_data.set_sorted("pxInteractionID")
-            .select(pl.n_unique("pxInteractionID").alias("unique_count"))
-            .collect()
-            .item()
-        )
-        print(f"Total interaction count: {total_interaction_count}")
-        # Set num_sample_interactions attribute - use sample_size if we have more interactions than sample_size
-        self.sample_size = min(total_interaction_count, self.sample_size)
-        target_sample_size = self.sample_size
-        sample_rate = min(1.0, target_sample_size / max(1, total_interaction_count))
-
-        # Use hash-based sampling for efficiency - this is deterministic per interaction ID
-        # but doesn't require collecting all unique IDs first, 15x faster than collecting 50k interactions first.
         df = (
-            self.decision_data.select(columns_to_keep)
-            .with_columns(
-                [
-                    (
-                        pl.col("pxInteractionID").hash() % 1000 < 1000 * sample_rate
-                    ).alias("_sample")
-                ]
-            )
-            .filter(pl.col("_sample"))
-            .drop("_sample")
+            decision_data.select(columns_to_keep)
+            .filter(pl.col("pxInteractionID").is_in(interactions.implode()))
             .collect()
             .shrink_to_fit()
-            .lazy()
         )
+        sample_cache[key] = (size, df)
+        return df.lazy()
+
+    def progressive_sample(
+        self,
+        initial_size: int = 5000,
+        size: Optional[int] = None,
+        stratify_by: Optional[List[str]] = None,
+    ) -> Tuple[pl.LazyFrame, "Future[pl.LazyFrame]"]:
+        """Draws a small sample right away and the full sample in the background.
 
-        return df
+        The small sample is nested in the full one, so results shown on it are
+        refined rather than replaced once the full sample is available.
+
+        Parameters
+        ----------
+        initial_size : int, default 5000
+            Number of interactions in the sample that is returned right away
+        size : int, optional
+            Number of interactions in the full sample, defaults to sample_size
+        stratify_by : List[str], optional
+            Interaction-level columns to stratify both samples on
+
+        Returns
+        -------
+        Tuple[pl.LazyFrame, Future[pl.LazyFrame]]
+            The small sample, and a future resolving to the full sample
+        """
+        initial_sample = self.draw_sample(initial_size, stratify_by)
+        executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            full_sample = executor.submit(self.draw_sample, size, stratify_by)
+        finally:
+            executor.shutdown(wait=False)
+        return initial_sample, full_sample
+
+    @cached_property
+    def sample(self):
+        """
+        A sample of sample_size interactions, drawn with draw_sample.
+        If there are fewer than sample_size interactions, no sampling is performed.
+        """
+        total_interaction_count = self._sampling_frame.height
+        # Set num_sample_interactions attribute - use sample_size if we have more interactions than sample_size
+        self.sample_size = min(total_interaction_count, self.sample_size)
+        self._num_sample_interactions = self.sample_size
+        return self.draw_sample(self.sample_size)
 
     def getAvailableFieldsForFiltering(self, categoricalOnly=False):
         available_fields = []
@@ -578,6 +820,44 @@ class DecisionAnalyzer:
 
         return result
 
+    # Columns that decide the ranking order next to the priority. Overrides of
+    # these invalidate the precomputed tie-breaker of the ranking sample.
+    _rank_tie_break_columns = {
+        "pxInteractionID",
+        "is_mandatory",
+        "StageOrder",
+        "pyIssue",
+        "pyGroup",
+        "pyName",
+    }
+
+    @staticmethod
+    def _sort_for_ranking(df: pl.LazyFrame) -> pl.LazyFrame:
+        """Adds the ranking tie-breaker and sorts on it within the interactions.
+
+        The tie-breaker is a single integer ordinal for StageOrder (descending)
+        and pyIssue, pyGroup, pyName (ascending). The stable sort keeps the
+        original row order for complete ties, as the ordinal rank did.
+        """
+        return df.with_columns(
+            RankTieBreaker=pl.struct(
+                "StageOrder",
+                pl.col("pyIssue").rank() * -1,
+                pl.col("pyGroup").rank() * -1,
+                pl.col("pyName").rank() * -1,
+            ).rank(descending=True, method="dense")
+        ).sort(
+            ["pxInteractionID", "is_mandatory", "RankTieBreaker"],
+            descending=[False, True, False],
+            nulls_last=True,
+            maintain_order=True,
+        )
+
+    @cached_property
+    def _ranking_sample(self) -> pl.LazyFrame:
+        """The sample sorted for reRank, computed once per sample."""
+        return self._sort_for_ranking(self.sample).collect().lazy()
+
     def reRank(
         self,
         additional_filters: Optional[Union[pl.Expr, List[pl.Expr]]] = None,
@@ -585,30 +865,32 @@ class DecisionAnalyzer:
     ) -> pl.LazyFrame:
         """
         Calculates prio and rank for all PVCL combinations
+
+        Actions are ranked within the interactions on is_mandatory, the
+        priority and then the tie-breaker of _sort_for_ranking. The sample is
+        sorted once on is_mandatory and the tie-breaker, so each of the
+        priority variants only needs a numeric rank within the interaction.
         """
         # TODO: make generic to support situations where P, V, C or L are missing?
         # NOTE: Should we calculate for different stages?
+        prio_variants = ["prio_PVCL", "prio_VCL", "prio_PCL", "prio_PVL", "prio_PVC"]
+        rank_group = ["pxInteractionID", "is_mandatory"]
         rank_exprs = [
-            pl.struct(
-                [
-                    "is_mandatory",
-                    x,
-                    "StageOrder",
-                    pl.col("pyIssue").rank() * -1,
-                    pl.col("pyGroup").rank() * -1,
-                    pl.col("pyName").rank() * -1,
-                ]
+            (
+                pl.col(x)
+                .fill_null(float("-inf"))
+                .rank(descending=True, method="ordinal")
+                .over(rank_group)
+                + pl.col("RankOffset")
             )
-            .rank(descending=True, method="ordinal", seed=1)
-            .over(["pxInteractionID"])
             .cast(pl.Int16)
             .alias(f"rank_{x.split('_')[1]}")
-            for x in ["prio_PVCL", "prio_VCL", "prio_PCL", "prio_PVL", "prio_PVC"]
+            for x in prio_variants
         ]
 
         rank_df = (
             apply_filter(
-                self.sample.with_columns(
+                self._ranking_sample.with_columns(
                     pl.col("Value").fill_null(1),
                     pl.col("Levers").fill_null(1),
                     pl.col("Context Weight").fill_null(1),
@@ -617,7 +899,15 @@ class DecisionAnalyzer:
             )
             .with_columns(overrides)
             .filter(pl.col("Priority").is_not_null())
-            .with_columns(
+        )
+        overridden = {
+            o.meta.output_name(raise_if_undetermined=False) for o in overrides
+        }
+        if None in overridden or overridden & self._rank_tie_break_columns:
+            rank_df = self._sort_for_ranking(rank_df)
+
+        rank_df = (
+            rank_df.with_columns(
                 prio_PVCL=(
                     pl.col("Propensity")
                     * pl.col("Value")
@@ -634,8 +924,12 @@ class DecisionAnalyzer:
                 prio_PVC=(
                     pl.col("Propensity") * pl.col("Value") * pl.col("Context Weight")
                 ),
+                # Number of higher ranked mandatory actions in the interaction
+                RankOffset=pl.int_range(pl.len()).over("pxInteractionID"),
             )
+            .with_columns(pl.col("RankOffset").min().over(rank_group))
             .with_columns(*rank_exprs)
+            .drop("RankTieBreaker", "RankOffset")
         )
 
         return rank_df
@@ -1381,6 +1675,209 @@ class DecisionAnalyzer:
 
         return trend_data
 
+    def _lever_thresholds(
+        self,
+        lever_condition: pl.Expr,
+        win_rank: int = 1,
+        use_sample: bool = True,
+    ) -> Tuple[pl.DataFrame, int]:
+        """
+        Lever value at which each selected action starts to win.
+
+        Setting the lever of the selected actions to L scales their priority
+        with L, while the priority of all other actions stays the same. Within
+        an interaction the order of the selected actions amongst themselves
+        therefore does not depend on the lever, so the j-th selected action
+        (counting from 0) is in the top `win_rank` when it beats the
+        (win_rank - j)-th best other action. That happens from a single
+        lever value onwards, which follows directly from the two priorities.
+
+        Returns the threshold of every selected action, with whether it also
+        wins when the lever is exactly at that threshold (decided by the tie
+        breakers of the ranking), and the number of winning actions over all
+        interactions, which does not depend on the lever. Actions with a
+        negative priority before the lever lose ground when the lever goes up,
+        so these are flagged as decreasing: they win below their threshold.
+        Without any priority, the lever makes no difference at all.
+        """
+        data = self.sample if use_sample else self.decision_data
+        df = (
+            data.filter(pl.col(self.level).is_in(self.stages_from_arbitration_down))
+            .with_columns(
+                pl.col("Value").fill_null(1),
+                pl.col("Levers").fill_null(1),
+                pl.col("Context Weight").fill_null(1),
+            )
+            .filter(pl.col("Priority").is_not_null())
+            .with_row_index("_row")
+            .select(
+                "pxInteractionID",
+                "_row",
+                pl.col("is_mandatory").alias("_mandatory"),
+                lever_condition.fill_null(False).alias("_selected"),
+                (
+                    pl.col("Propensity") * pl.col("Value") * pl.col("Context Weight")
+                ).alias("_slope"),
+                pl.struct(
+                    "StageOrder",
+                    pl.col("pyIssue").rank() * -1,
+                    pl.col("pyGroup").rank() * -1,
+                    pl.col("pyName").rank() * -1,
+                )
+                .rank("dense")
+                .alias("_tie"),
+                pl.col("Levers"),
+            )
+            .with_columns(
+                _priority=pl.when(pl.col("_selected"))
+                .then(pl.col("_slope"))
+                .otherwise(pl.col("_slope") * pl.col("Levers"))
+            )
+            .sort(
+                [
+                    "pxInteractionID",
+                    "_selected",
+                    "_mandatory",
+                    "_priority",
+                    "_tie",
+                    "_row",
+                ],
+                descending=[False, False, True, True, True, False],
+            )
+            .with_columns(
+                _position=pl.int_range(pl.len()).over("pxInteractionID", "_selected"),
+                _wins=pl.len().over("pxInteractionID").clip(upper_bound=win_rank),
+            )
+            .collect()
+        )
+        total = (
+            df.group_by("pxInteractionID").agg(pl.col("_wins").first())["_wins"].sum()
+        )
+
+        competitors = df.filter(~pl.col("_selected")).select(
+            "pxInteractionID", "_position", "_mandatory", "_priority", "_tie", "_row"
+        )
+        selected = (
+            df.filter(pl.col("_selected"))
+            .with_columns(_position=win_rank - 1 - pl.col("_position"))
+            .join(competitors, on=["pxInteractionID", "_position"], how="left")
+        )
+        beats_on_ties = (pl.col("_tie") > pl.col("_tie_right")) | (
+            (pl.col("_tie") == pl.col("_tie_right"))
+            & (pl.col("_row") < pl.col("_row_right"))
+        )
+        thresholds = selected.select(
+            Threshold=pl.when(pl.col("_position") < 0)
+            .then(float("inf"))
+            .when(pl.col("_priority_right").is_null())
+            .then(float("-inf"))
+            .when(pl.col("_mandatory") != pl.col("_mandatory_right"))
+            .then(
+                pl.when(pl.col("_mandatory") > pl.col("_mandatory_right"))
+                .then(float("-inf"))
+                .otherwise(float("inf"))
+            )
+            .when(pl.col("_slope") != 0)
+            .then(pl.col("_priority_right") / pl.col("_slope"))
+            .when(
+                (pl.col("_priority_right") < 0)
+                | ((pl.col("_priority_right") == 0) & beats_on_ties)
+            )
+            .then(float("-inf"))
+            .otherwise(float("inf")),
+            Inclusive=beats_on_ties.fill_null(True),
+            _slope=pl.col("_slope"),
+        ).select(
+            "Threshold",
+            "Inclusive",
+            Decreasing=pl.col("Threshold").is_finite() & (pl.col("_slope") < 0),
+        )
+        return thresholds, total
+
+    @staticmethod
+    def _lever_wins(
+        thresholds: pl.DataFrame, lever_values: pl.Series, just_above: bool = False
+    ) -> pl.Series:
+        """
+        Number of selected actions that win at each of the lever values.
+
+        With `just_above`, counts the wins for a lever value just above each
+        of the values instead, so excluding the actions that only win up to
+        and including their threshold, and including those that only win
+        above it.
+        """
+        wins = pl.zeros(len(lever_values), dtype=pl.Int64, eager=True)
+        for (decreasing, inclusive), group in thresholds.group_by(
+            ["Decreasing", "Inclusive"]
+        ):
+            # Increasing actions win from their threshold upwards, so count
+            # the thresholds below the lever value, decreasing ones vice versa
+            if just_above or (inclusive != decreasing):
+                side = "right"
+            else:
+                side = "left"
+            below = (
+                group["Threshold"]
+                .sort()
+                .search_sorted(lever_values, side=side)
+                .cast(pl.Int64)
+            )
+            wins += group.height - below if decreasing else below
+        return wins
+
+    def get_lever_response_curve(
+        self,
+        lever_condition: pl.Expr,
+        win_rank: int = 1,
+        lever_values: Optional[Iterable[float]] = None,
+        use_sample: bool = True,
+    ) -> pl.DataFrame:
+        """
+        Win percentage of the selected actions as a function of their lever.
+
+        Instead of re-ranking all interactions for every lever value, this
+        derives the lever value at which each selected action starts to win,
+        so the whole curve follows from a single sort of those breakpoints.
+        This makes it cheap enough to run on the full data rather than the sample.
+
+        Parameters
+        ----------
+        lever_condition : pl.Expr
+            Polars expression that defines which actions should receive the lever
+        win_rank : int, default 1
+            Consider actions winning if they rank <= this value
+        lever_values : Iterable[float], optional
+            The (positive) lever values to calculate the win percentage for.
+            Defaults to all lever values at which the win percentage changes.
+        use_sample : bool, default True
+            Whether to use the sample, or all of the decision data
+
+        Returns
+        -------
+        pl.DataFrame
+            The lever values with the resulting number of wins of the
+            selected actions, and the percentage of all wins that they make up
+        """
+        thresholds, total = self._lever_thresholds(
+            lever_condition, win_rank=win_rank, use_sample=use_sample
+        )
+        if lever_values is None:
+            lever_values = (
+                thresholds.filter(pl.col("Threshold").is_finite())["Threshold"]
+                .unique()
+                .sort()
+            )
+        lever_values = pl.Series("Lever", lever_values, dtype=pl.Float64)
+
+        wins = self._lever_wins(thresholds, lever_values)
+        return pl.DataFrame(
+            {
+                "Lever": lever_values,
+                "Wins": wins,
+                "Win Percentage": wins / max(total, 1) * 100,
+            }
+        )
+
     def find_lever_value(
         self,
         lever_condition: pl.Expr,
@@ -1390,9 +1887,14 @@ class DecisionAnalyzer:
         high: float = 100,
         precision: float = 0.01,
         ranking_stages: List[str] = None,
+        use_sample: bool = True,
     ) -> float:
         """
-        Binary search algorithm to find lever value needed to achieve a desired win percentage.
+        Find the lever value needed to achieve a desired win percentage.
+
+        Uses the lever response curve (see :meth:`get_lever_response_curve`)
+        to find the lowest lever value at which the selected actions reach
+        the target win percentage.
 
         Parameters
         ----------
@@ -1407,9 +1909,11 @@ class DecisionAnalyzer:
         high : float, default 100
             Upper bound for lever search range
         precision : float, default 0.01
-            Search precision - smaller values give more accurate results
+            Not used anymore, the lever value is calculated exactly
         ranking_stages : List[str], optional
             List of stages to include in analysis. Defaults to ["Arbitration"]
+        use_sample : bool, default True
+            Whether to use the sample, or all of the decision data
 
         Returns
         -------
@@ -1421,61 +1925,50 @@ class DecisionAnalyzer:
         ValueError
             If the target win percentage cannot be achieved within the search range
         """
-        if ranking_stages is None:
-            ranking_stages = ["Arbitration"]
-
-        def _calculate_action_win_percentage(lever: float) -> float:
-            """Calculate win percentage for a given lever value"""
-            ranked_df = self.reRank(
-                overrides=[
-                    (
-                        pl.when(lever_condition)
-                        .then(pl.lit(lever))
-                        .otherwise(pl.col("Levers"))
-                    ).alias("Levers")
-                ],
-                additional_filters=pl.col(self.level).is_in(
-                    self.stages_from_arbitration_down
-                ),
-            ).filter(pl.col("rank_PVCL") <= win_rank)
-
-            selected_wins = (
-                ranked_df.filter(lever_condition)
-                .select("pxInteractionID")
-                .collect()
-                .height
-            )
-            selected_total = ranked_df.select("pxInteractionID").collect().height
-            percentage = (selected_wins / selected_total) * 100
-            return percentage
+        thresholds, total = self._lever_thresholds(
+            lever_condition, win_rank=win_rank, use_sample=use_sample
+        )
 
-        beginning_high = high
-        beginning_low = low
+        def _win_percentage(wins: int) -> float:
+            return wins / max(total, 1) * 100
 
-        # Check if target is achievable within bounds
-        low_percentage = _calculate_action_win_percentage(beginning_low)
-        high_percentage = _calculate_action_win_percentage(beginning_high)
+        low_wins, high_wins = self._lever_wins(
+            thresholds, pl.Series([low, high], dtype=pl.Float64)
+        )
+        low_percentage = _win_percentage(low_wins)
+        high_percentage = _win_percentage(high_wins)
 
         if target_win_percentage < low_percentage:
             raise ValueError(
-                f"Target {target_win_percentage}% is too low. Even at lever {beginning_low}, your actions win in {low_percentage:.1f}% of interactions at arbitration."
+                f"Target {target_win_percentage}% is too low. Even at lever {low}, your actions win in {low_percentage:.1f}% of interactions at arbitration."
                 "You might have interactions where only your selected actions survive until arbitration. So they will win no matter what."
             )
         elif target_win_percentage > high_percentage:
             raise ValueError(
-                f"Target {target_win_percentage}% is too high. Even at lever {beginning_high}, you only get {high_percentage:.1f}%. "
+                f"Target {target_win_percentage}% is too high. Even at lever {high}, you only get {high_percentage:.1f}%. "
                 f"You can increase the search range."
             )
 
-        while high - low > precision:
-            mid = (low + high) / 2
-
-            current_win_percentage = _calculate_action_win_percentage(mid)
+        if low_percentage >= target_win_percentage:
+            return float(low)
 
-            if current_win_percentage < target_win_percentage:
-                low = mid
-            else:
-                high = mid
-
-        final_lever = (low + high) / 2
-        return final_lever
+        # The wins only change at the thresholds. Just above a threshold, the
+        # (increasing) actions with that threshold win too, so the lowest
+        # threshold at which the target is reached is the lever needed
+        breakpoints = (
+            thresholds.filter(pl.col("Threshold").is_between(low, high))["Threshold"]
+            .unique()
+            .sort()
+        )
+        reached = (
+            (self._lever_wins(thresholds, breakpoints) / max(total, 1) * 100)
+            >= target_win_percentage
+        ) | (
+            (
+                self._lever_wins(thresholds, breakpoints, just_above=True)
+                / max(total, 1)
+                * 100
+            )
+            >= target_win_percentage
+        )
+        return max(float(low), breakpoints.filter(reached).min())
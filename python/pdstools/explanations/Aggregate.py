@@ -9,6 +9,7 @@ import polars as pl
 from ..utils.namespaces import LazyNamespace
 from .ExplanationsUtils import (
     _COL,
+    _CONTEXT_STORE,
     _CONTRIBUTION_TYPE,
     _DEFAULT,
     _PREDICTOR_TYPE,
@@ -34,6 +35,7 @@ class Aggregate(LazyNamespace):
         self.data_pattern = None
         self.df_contextual = None
         self.df_overall = None
+        self.context_index: Optional[pl.DataFrame] = None
         self.context_operations = ContextOperations(aggregate=self)
         self.initialized = False
         super().__init__()
@@ -43,6 +45,20 @@ class Aggregate(LazyNamespace):
         self._load_data()
         return self.df_contextual
 
+    def get_context_partitions(self) -> List[str]:
+        """Get the partition keys of all contexts, read from the context index if available."""
+        self._load_data()
+        if self.context_index is not None:
+            return self.context_index[_COL.PARTITON.value].to_list()
+
+        return (
+            self.df_contextual.select(_COL.PARTITON.value)
+            .unique()
+            .collect()
+            .to_series()
+            .to_list()
+        )
+
     def get_predictor_contributions(
         self,
         context: Optional[dict[str, str]] = None,
@@ -182,6 +198,26 @@ class Aggregate(LazyNamespace):
             logger.error("Error validating aggregates folder: %s", e)
             raise
 
+        # Aggregates are stored per context, with an index of the contexts.
+        # Older aggregates, or an explicit data pattern, are read from the batch files.
+        context_index_file = pathlib.Path(self.data_folderpath) / _CONTEXT_STORE.INDEX.value
+        if self.data_pattern is None and context_index_file.exists():
+            self.context_index = pl.read_parquet(context_index_file)
+            context_ = f"{self.data_folderpath}/{_CONTEXT_STORE.FOLDER.value}/**/*.parquet"
+        else:
+            self.context_index = None
+            context_ = f"{self.data_folderpath}/{self.data_pattern if self.data_pattern else '*_BATCH_*.parquet'}"
+
+        self.df_contextual = self._scan_aggregates(context_)
+
+        self.df_overall = self._scan_aggregates(
+            f"{self.data_folderpath}/*_OVERALL.parquet"
+        )
+
+        self.initialized = True
+
+    @staticmethod
+    def _scan_aggregates(source) -> pl.LazyFrame:
         selected_columns = [
             _COL.PARTITON.value,
             _COL.CONTRIBUTION.value,
@@ -195,21 +231,41 @@ class Aggregate(LazyNamespace):
             _COL.CONTRIBUTION_MAX.value,
         ]
 
-        context_ = f"{self.data_folderpath}/{self.data_pattern if self.data_pattern else '*_BATCH_*.parquet'}"
-
-        self.df_contextual = (
-            pl.scan_parquet(context_)
+        return (
+            pl.scan_parquet(source, hive_partitioning=False)
             .select(selected_columns)
             .sort(by=_COL.PREDICTOR_NAME.value)
         )
 
-        self.df_overall = (
-            pl.scan_parquet(f"{self.data_folderpath}/*_OVERALL.parquet")
-            .select(selected_columns)
-            .sort(by=_COL.PREDICTOR_NAME.value)
+    def _scan_contexts(self, partitions: List[str]) -> pl.LazyFrame:
+        """Scan only the aggregates of the given contexts.
+
+        Uses the context index to find the partition folders of the contexts,
+        so only their files are read. Without an index all contextual data is scanned.
+        """
+        if self.context_index is None:
+            return self.df_contextual
+
+        context_ids = self.context_index.filter(
+            pl.col(_COL.PARTITON.value).is_in(partitions)
+        )[_CONTEXT_STORE.ID.value].to_list()
+
+        contexts_folderpath = (
+            pathlib.Path(self.data_folderpath) / _CONTEXT_STORE.FOLDER.value
         )
+        files = [
+            str(file)
+            for context_id in context_ids
+            for file in sorted(
+                (
+                    contexts_folderpath / f"{_CONTEXT_STORE.ID.value}={context_id}"
+                ).glob("*.parquet")
+            )
+        ]
+        if len(files) == 0:
+            return self.df_contextual.clear()
 
-        self.initialized = True
+        return self._scan_aggregates(files)
 
     def _get_predictor_contributions(
         self,
@@ -458,7 +514,10 @@ class Aggregate(LazyNamespace):
         if df_filtered_contexts is None:
             return self.df_overall
         else:
-            return self.df_contextual.join(
+            df_contextual = self._scan_contexts(
+                df_filtered_contexts[_COL.PARTITON.value].to_list()
+            )
+            return df_contextual.join(
                 df_filtered_contexts.lazy(), on=_COL.PARTITON.value, how="inner"
             )
 
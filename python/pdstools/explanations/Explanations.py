@@ -49,6 +49,19 @@ class Explanations:
     PROGRESS_BAR: int
         Show progress bar when running duckdb queries.
         0 = no progress bar, 1 = show progress bar. Default is 0.
+    STREAMING: int
+        Query the explanation files directly instead of loading them into memory first.
+        0 = in-memory tables, 1 = streaming. Default is 0.
+    QUERY_WORKERS: int
+        The number of context batches to aggregate concurrently when streaming.
+        Default is THREAD_COUNT.
+    INCREMENTAL: int
+        Aggregate the date range from daily partial aggregates, which are only
+        computed once per day. 0 = aggregate the files at once, 1 = incremental.
+        Default is 0.
+    SKETCH_BINS: int
+        The number of quantile bins kept per numeric predictor and day in the
+        partial aggregates. Default is 100.
     """
 
     def __init__(
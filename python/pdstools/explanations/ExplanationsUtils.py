@@ -5,6 +5,7 @@ __all__ = [
     "_COL",
     "_DEFAULT",
     "_SPECIAL",
+    "_CONTEXT_STORE",
     "ContextInfo",
     "ContextOperations",
 ]
@@ -44,6 +45,13 @@ class _TABLE_NAME(Enum):
     SYMBOLIC_OVERALL = "symbolic_overall"
     CREATE = "create"
     MODEL_CONTEXTS = "model_contexts"
+    CONTEXTS = "contexts"
+    NUMERIC_PARTIAL = "numeric_partial"
+    SYMBOLIC_PARTIAL = "symbolic_partial"
+    MODEL_CONTEXTS_PARTIAL = "model_contexts_partial"
+    NUMERIC_COMBINE = "numeric_combine"
+    SYMBOLIC_COMBINE = "symbolic_combine"
+    MODEL_CONTEXTS_COMBINE = "model_contexts_combine"
 
 
 # can also be sort order
@@ -111,6 +119,12 @@ class _SPECIAL(Enum):
     MISSING = "missing"
 
 
+class _CONTEXT_STORE(Enum):
+    FOLDER = "contexts"
+    INDEX = "context_index.parquet"
+    ID = "context_id"
+
+
 class _DEFAULT(Enum):
     TOP_N = 20
     TOP_K = 20
@@ -189,12 +203,7 @@ class ContextOperations(LazyNamespace):
             self._df = pl.from_dicts(
                 [
                     {**json.loads(ck)[_COL.PARTITON.value], _COL.PARTITON.value: ck}
-                    for ck in self.aggregate.get_df_contextual()
-                    .select(_COL.PARTITON.value)
-                    .unique()
-                    .collect()
-                    .to_series()
-                    .to_list()
+                    for ck in self.aggregate.get_context_partitions()
                 ]
             )
         if self._context_keys is None:
@@ -1,8 +1,11 @@
 __all__ = ["Preprocess"]
 
+import json
 import logging
 import os
 import pathlib
+import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import timedelta
 from glob import glob
 from importlib.resources import files as resources_files
@@ -12,7 +15,7 @@ import duckdb
 import polars as pl
 
 from ..utils.namespaces import LazyNamespace
-from .ExplanationsUtils import _COL, _PREDICTOR_TYPE, _TABLE_NAME
+from .ExplanationsUtils import _COL, _CONTEXT_STORE, _PREDICTOR_TYPE, _TABLE_NAME
 from .resources import queries as queries_data
 
 logger = logging.getLogger(__name__)
@@ -39,10 +42,18 @@ class Preprocess(LazyNamespace):
         self.data_folderpath = pathlib.Path(
             os.path.join(self.explanations.root_dir, self.data_foldername)
         )
+        self.aggregates_info_filename = f"{self.data_folderpath}/aggregates_info.json"
 
         self.from_date = explanations.from_date
         self.to_date = explanations.to_date
         self.model_name = explanations.model_name
+        self.partials_folderpath = pathlib.Path(
+            os.path.join(
+                self.explanations.root_dir,
+                "partial_aggregates",
+                f"model={self.model_name}",
+            )
+        )
 
         # set duckdb query parameters
         self.model_context_limit = int(os.getenv("MODEL_CONTEXT_LIMIT", "2500"))
@@ -51,21 +62,31 @@ class Preprocess(LazyNamespace):
         self.memory_limit = int(os.getenv("MEMORY_LIMIT", "8"))
         self.thread_count = int(os.getenv("THREAD_COUNT", "4"))
         self.progress_bar = os.getenv("PROGRESS_BAR", "0") == "1"
+        self.streaming = os.getenv("STREAMING", "0") == "1"
+        self.query_workers = int(os.getenv("QUERY_WORKERS", str(self.thread_count)))
+        self.incremental = os.getenv("INCREMENTAL", "0") == "1"
+        self.sketch_bins = int(os.getenv("SKETCH_BINS", "100"))
 
         logger.debug(
-            "Using QUERY_BATCH_LIMIT=%s, FILE_BATCH_LIMIT=%s, MEMORY_LIMIT=%sGB, THREAD_COUNT=%s, PROGRESS_BAR=%s, MODEL_CONTEXT_LIMIT=%s",
+            "Using QUERY_BATCH_LIMIT=%s, FILE_BATCH_LIMIT=%s, MEMORY_LIMIT=%sGB, THREAD_COUNT=%s, PROGRESS_BAR=%s, MODEL_CONTEXT_LIMIT=%s, STREAMING=%s, QUERY_WORKERS=%s, INCREMENTAL=%s, SKETCH_BINS=%s",
             self.query_batch_limit,
             self.file_batch_limit,
             self.memory_limit,
             self.thread_count,
             self.progress_bar,
             self.model_context_limit,
+            self.streaming,
+            self.query_workers,
+            self.incremental,
+            self.sketch_bins,
         )
 
         self._conn = None
 
         self.selected_files: list[str] = []
+        self.selected_files_by_date: dict[str, str] = {}
         self.contexts: Optional[dict[str, dict[str, list[str]]]] = None
+        self.context_ids: dict[str, int] = {}
         self.unique_contexts_filename = f"{self.data_folderpath}/unique_contexts.json"
 
         super().__init__()
@@ -92,7 +113,30 @@ class Preprocess(LazyNamespace):
             The average contribution towards predicted model propensity
             for each symoblic predictor value, grouped by context key partition.
 
-        Each of the aggregates are written to parquet files to a temporary output dirtectory
+        Each of the aggregates are written to parquet files to a temporary output dirtectory.
+        The context specific aggregates are stored per context, in a hive partitioned
+        folder `contexts/context_id=<id>`, with a `context_index.parquet` file mapping
+        the context partition keys to their ids. Looking up a single context then
+        only reads that context's small files.
+
+        The aggregates are reused as long as they were generated for the same model
+        and date range. When these change, and the explanation files are available,
+        the aggregates are generated again.
+
+        By default the selected explanation files are first loaded into in-memory
+        DuckDB tables. With the environment variable `STREAMING=1` the files are
+        queried directly through views instead, so DuckDB only reads the columns
+        and row groups needed for each batch of contexts. The batches then run
+        concurrently and each result is written as soon as it is ready, so memory
+        use scales with the batch size rather than with the date range.
+
+        With the environment variable `INCREMENTAL=1`, each day is first summarized
+        into partial aggregates per model and date, which are kept in the
+        `partial_aggregates` folder and only computed for days that do not have them
+        yet. The partials hold sums, counts and minimum/maximum values, and for numeric
+        predictors a sketch of `SKETCH_BINS` quantile bins. The aggregates for the date
+        range are then combined from the daily partials, with the numeric deciles
+        approximated from the merged sketches.
         """
 
         if self._is_cached():
@@ -109,6 +153,22 @@ class Preprocess(LazyNamespace):
             raise
 
         self._conn = duckdb.connect(database=":memory:")
+        if self.streaming:
+            self._execute_query("SET preserve_insertion_order = false;")
+
+        if self.incremental and len(self.selected_files_by_date) == 0:
+            logger.warning(
+                "Incremental aggregation needs daily files from the data folder, aggregating the data file at once."
+            )
+            self.incremental = False
+
+        if self.incremental:
+            try:
+                self._update_partials()
+            except Exception as e:
+                logger.error("Failed to create daily partial aggregates, err=%s", e)
+                self._conn.close()
+                return
 
         try:
             self._run_agg(_PREDICTOR_TYPE.NUMERIC)
@@ -125,6 +185,7 @@ class Preprocess(LazyNamespace):
             return
 
         self._conn.close()
+        self._create_aggregates_info_file()
 
     @staticmethod
     def _clean_query(query):
@@ -138,10 +199,44 @@ class Preprocess(LazyNamespace):
     def _is_cached(self):
         if self.data_folderpath.exists() and self.data_folderpath.is_dir():
             if any(self.data_folderpath.iterdir()):
-                return True
+                if not self._is_stale():
+                    return True
+                logger.info(
+                    "Aggregates in %s are for a different model or date range, regenerating.",
+                    self.data_folderpath,
+                )
+                shutil.rmtree(self.data_folderpath)
         self.data_folderpath.mkdir(parents=True, exist_ok=True)
         return False
 
+    def _get_aggregates_info(self) -> dict[str, Optional[str]]:
+        return {
+            "model_name": self.model_name,
+            "data_file": self.data_file,
+            "from_date": self.from_date.strftime("%Y%m%d") if self.from_date else None,
+            "to_date": self.to_date.strftime("%Y%m%d") if self.to_date else None,
+        }
+
+    def _create_aggregates_info_file(self):
+        with open(self.aggregates_info_filename, "w") as f:
+            json.dump(self._get_aggregates_info(), f)
+
+    def _is_stale(self) -> bool:
+        """Whether the cached aggregates are for other settings and can be regenerated.
+
+        Aggregates without info file (from older versions) are never stale, and
+        neither are aggregates for which the explanation files are not available,
+        e.g. when only reading them back for a report.
+        """
+        if not pathlib.Path(self.aggregates_info_filename).exists():
+            return False
+
+        with open(self.aggregates_info_filename, "r") as f:
+            if json.load(f) == self._get_aggregates_info():
+                return False
+
+        return bool(self.data_file) or self._validate_explanations_folder()
+
     def _validate_explanations_folder(self):
         if self.explanations_folder.exists() and self.explanations_folder.is_dir():
             if any(self.explanations_folder.iterdir()):
@@ -165,10 +260,17 @@ class Preprocess(LazyNamespace):
 
     def _create_in_mem_table(self, predictor_type: _PREDICTOR_TYPE):
         table_name = self._get_table_name(predictor_type)
-        query = self._get_create_table_sql_formatted(table_name, predictor_type)
+        if self.incremental:
+            query = self._get_create_partials_view_sql(
+                table_name, predictor_type.value
+            )
+        else:
+            query = self._get_create_table_sql_formatted(table_name, predictor_type)
 
         self._execute_query(query)
-        logger.info("Created in-memory table %s", table_name.value)
+        logger.info(
+            "Created in-memory %s %s", self._get_table_type(), table_name.value
+        )
 
     @staticmethod
     def _create_unique_contexts_file(filename, data):
@@ -214,21 +316,45 @@ class Preprocess(LazyNamespace):
             return self.contexts
 
         table_name = self._get_table_name(predictor_type)
-        query = self._get_model_contexts_sql_formatted(table_name)
+        if self.incremental:
+            self._execute_query(
+                self._get_create_partials_view_sql(_TABLE_NAME.CONTEXTS, "CONTEXTS")
+            )
+            query = self._get_model_contexts_sql_formatted(
+                _TABLE_NAME.CONTEXTS, _TABLE_NAME.MODEL_CONTEXTS_COMBINE
+            )
+        else:
+            query = self._get_model_contexts_sql_formatted(table_name)
 
         data = self._execute_query(query).pl()[_COL.PARTITON.value].to_list()
         logger.info("Received %s unique model contexts", len(data))
 
         self.contexts = self._create_context_batches(data)
         self._create_unique_contexts_file(self.unique_contexts_filename, self.contexts)
+        self._create_context_index(data)
         return self.contexts
 
+    def _create_context_index(self, all_contexts: list[str]):
+        self.context_ids = {context: idx for idx, context in enumerate(all_contexts)}
+
+        df = pl.DataFrame(
+            {
+                _COL.PARTITON.value: all_contexts,
+                _CONTEXT_STORE.ID.value: list(range(len(all_contexts))),
+            },
+            schema={_COL.PARTITON.value: pl.Utf8, _CONTEXT_STORE.ID.value: pl.Int64},
+        )
+        self._write_to_parquet(df, _CONTEXT_STORE.INDEX.value)
+
     def _agg_in_batches(self, predictor_type: _PREDICTOR_TYPE):
         if self.contexts is None:
             self._get_contexts(predictor_type=predictor_type)
 
         for file_batch_nb, query_batches in self.contexts.items():
-            self._parquet_in_batches(file_batch_nb, query_batches, predictor_type)
+            if self.streaming:
+                self._stream_in_batches(file_batch_nb, query_batches, predictor_type)
+            else:
+                self._parquet_in_batches(file_batch_nb, query_batches, predictor_type)
 
         logger.info("Processed all batches for %s", predictor_type)
 
@@ -244,7 +370,7 @@ class Preprocess(LazyNamespace):
         table_name = self._get_table_name(predictor_type)
 
         query = f"""
-            DROP TABLE {table_name.value};
+            DROP {self._get_table_type()} {table_name.value};
         """
 
         self._execute_query(query)
@@ -257,8 +383,15 @@ class Preprocess(LazyNamespace):
             else _TABLE_NAME.SYMBOLIC
         )
 
+    def _get_table_type(self) -> str:
+        return "VIEW" if self.streaming or self.incremental else "TABLE"
+
     def _get_create_table_sql_formatted(
-        self, tbl_name: _TABLE_NAME, predictor_type: _PREDICTOR_TYPE
+        self,
+        tbl_name: _TABLE_NAME,
+        predictor_type: _PREDICTOR_TYPE,
+        table_type: Optional[str] = None,
+        selected_files: Optional[list[str]] = None,
     ):
         sql = self._read_resource_file(
             package_name=queries_data,
@@ -270,14 +403,104 @@ class Preprocess(LazyNamespace):
                 MEMORY_LIMIT=self.memory_limit,
                 THREAD_COUNT=self.thread_count,
                 ENABLE_PROGRESS_BAR="true" if self.progress_bar else "false",
+                TABLE_TYPE=table_type or self._get_table_type(),
                 TABLE_NAME=tbl_name.value,
-                SELECTED_FILES=self._get_selected_files(),
+                SELECTED_FILES=self._get_selected_files(selected_files),
                 PREDICTOR_TYPE=predictor_type.value,
             )
         }"""
 
         return self._clean_query(f_sql)
 
+    def _get_create_partials_view_sql(self, tbl_name: _TABLE_NAME, partial_name: str):
+        """A view over the daily partials of the selected dates."""
+        partial_files = [
+            str(self._get_partials_folderpath(date) / f"{partial_name}.parquet")
+            for date in self.selected_files_by_date
+        ]
+
+        return self._clean_query(f"""
+            CREATE VIEW {tbl_name.value} AS
+            SELECT * FROM read_parquet([{self._get_selected_files(partial_files)}]);
+        """)
+
+    def _get_partials_folderpath(self, date: str) -> pathlib.Path:
+        return self.partials_folderpath / f"date={date}"
+
+    def _update_partials(self):
+        """Create the partial aggregates for the selected days that do not have them yet."""
+        for date, file in self.selected_files_by_date.items():
+            partials_folderpath = self._get_partials_folderpath(date)
+            if self._is_partial_current(partials_folderpath, file):
+                logger.debug("Using cached partial aggregates for %s", date)
+                continue
+
+            partials_folderpath.mkdir(parents=True, exist_ok=True)
+            for predictor_type in _PREDICTOR_TYPE:
+                table_name = self._get_table_name(predictor_type)
+                self._execute_query(
+                    self._get_create_table_sql_formatted(
+                        table_name,
+                        predictor_type,
+                        table_type="VIEW",
+                        selected_files=[file],
+                    )
+                )
+
+                partials = {predictor_type.value: self._get_partial_sql_name(predictor_type)}
+                if predictor_type == _PREDICTOR_TYPE.NUMERIC:
+                    partials["CONTEXTS"] = _TABLE_NAME.MODEL_CONTEXTS_PARTIAL
+                for partial_name, sql_name in partials.items():
+                    query = self._get_partial_sql_formatted(sql_name, table_name)
+                    self._execute_query(query).pl().write_parquet(
+                        partials_folderpath / f"{partial_name}.parquet",
+                        statistics=False,
+                    )
+
+                self._execute_query(f"DROP VIEW {table_name.value};")
+
+            logger.info("Created partial aggregates for %s", date)
+
+    @staticmethod
+    def _is_partial_current(partials_folderpath: pathlib.Path, file: str) -> bool:
+        partial_files = [
+            partials_folderpath / f"{partial_name}.parquet"
+            for partial_name in ["CONTEXTS", *[t.value for t in _PREDICTOR_TYPE]]
+        ]
+        if not all(partial_file.exists() for partial_file in partial_files):
+            return False
+
+        source_mtime = pathlib.Path(file).stat().st_mtime
+        return all(
+            partial_file.stat().st_mtime >= source_mtime for partial_file in partial_files
+        )
+
+    @staticmethod
+    def _get_partial_sql_name(predictor_type: _PREDICTOR_TYPE) -> _TABLE_NAME:
+        return (
+            _TABLE_NAME.NUMERIC_PARTIAL
+            if predictor_type == _PREDICTOR_TYPE.NUMERIC
+            else _TABLE_NAME.SYMBOLIC_PARTIAL
+        )
+
+    def _get_partial_sql_formatted(self, sql_name: _TABLE_NAME, tbl_name: _TABLE_NAME):
+        sql = self._read_resource_file(
+            package_name=queries_data, filename_w_ext=f"{sql_name.value}.sql"
+        )
+
+        f_sql = f"""{
+            sql.format(
+                THREAD_COUNT=self.thread_count,
+                MEMORY_LIMIT=self.memory_limit,
+                LEFT_PREFIX=self.LEFT_PREFIX,
+                ENABLE_PROGRESS_BAR="true" if self.progress_bar else "false",
+                TABLE_NAME=tbl_name.value,
+                SKETCH_BINS=self.sketch_bins,
+            )
+        }"""
+
+        return self._clean_query(f_sql)
+
     def _parquet_in_batches(
         self,
         file_batch_nb: str,
@@ -292,9 +515,7 @@ class Preprocess(LazyNamespace):
                 if len(selected_contexts) == 0:
                     continue
 
-                where_condition = self._clean_query(f"""
-                    {self.LEFT_PREFIX}.{_COL.PARTITON.value} IN ({self.SEP.join([f"'{row}'" for row in selected_contexts])})
-                """)
+                where_condition = self._get_contexts_condition(selected_contexts)
                 query = self._get_batch_sql_formatted(sql, table_name, where_condition)
 
                 df = self._execute_query(query).pl()
@@ -310,10 +531,48 @@ class Preprocess(LazyNamespace):
 
             df_ = pl.concat(df_list)
 
-            self._write_to_parquet(
-                df_,
-                f"{predictor_type.value}_BATCH_{file_batch_nb}.parquet",
+            self._write_contexts_to_parquet(df_, predictor_type)
+
+            logger.info("Processed %s file batch %s", predictor_type, file_batch_nb)
+
+        except Exception as e:
+            logger.error(
+                "Failed batch for predictor type=%s, err=%s", predictor_type, e
             )
+            raise
+
+    def _stream_in_batches(
+        self,
+        file_batch_nb: str,
+        query_batches: dict[str, list[str]],
+        predictor_type: _PREDICTOR_TYPE,
+    ):
+        """Run the query batches concurrently, writing each result when it completes."""
+        table_name = self._get_table_name(predictor_type)
+        sql = self._read_batch_sql_file(predictor_type)
+
+        def run_query_batch(selected_contexts: list[str]) -> pl.DataFrame:
+            where_condition = self._get_contexts_condition(selected_contexts)
+            query = self._get_batch_sql_formatted(sql, table_name, where_condition)
+            with self._conn.cursor() as cursor:
+                return self._execute_query(query, conn=cursor).pl()
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.query_workers) as pool:
+                futures = {
+                    pool.submit(run_query_batch, selected_contexts): query_batch_nb
+                    for query_batch_nb, selected_contexts in query_batches.items()
+                    if len(selected_contexts) > 0
+                }
+                for future in as_completed(futures):
+                    self._write_contexts_to_parquet(future.result(), predictor_type)
+
+                    logger.debug(
+                        "Processed %s file batch %s, query batch %s",
+                        predictor_type,
+                        file_batch_nb,
+                        futures[future],
+                    )
 
             logger.info("Processed %s file batch %s", predictor_type, file_batch_nb)
 
@@ -323,6 +582,11 @@ class Preprocess(LazyNamespace):
             )
             raise
 
+    def _get_contexts_condition(self, selected_contexts: list[str]) -> str:
+        return self._clean_query(f"""
+            {self.LEFT_PREFIX}.{_COL.PARTITON.value} IN ({self.SEP.join([f"'{row}'" for row in selected_contexts])})
+        """)
+
     def _parquet_overall(self, predictor_type: _PREDICTOR_TYPE, where_condition="TRUE"):
         sql = self._read_overall_sql_file(predictor_type)
 
@@ -334,7 +598,29 @@ class Preprocess(LazyNamespace):
     def _write_to_parquet(self, df: pl.DataFrame, file_name: str):
         df.write_parquet(f"{self.data_folderpath}/{file_name}", statistics=False)
 
+    def _write_contexts_to_parquet(
+        self, df: pl.DataFrame, predictor_type: _PREDICTOR_TYPE
+    ):
+        """Write the aggregates of each context to its own partition, sorted by predictor."""
+        df_contexts = df.sort(_COL.PREDICTOR_NAME.value, maintain_order=True)
+        for (context,), df_context in df_contexts.partition_by(
+            _COL.PARTITON.value, as_dict=True
+        ).items():
+            context_folderpath = (
+                self.data_folderpath
+                / _CONTEXT_STORE.FOLDER.value
+                / f"{_CONTEXT_STORE.ID.value}={self.context_ids[context]}"
+            )
+            context_folderpath.mkdir(parents=True, exist_ok=True)
+            df_context.write_parquet(
+                context_folderpath / f"{predictor_type.value}.parquet",
+                statistics=False,
+            )
+
     def _read_overall_sql_file(self, predictor_type: _PREDICTOR_TYPE):
+        if self.incremental:
+            return self._read_combine_sql_file(predictor_type)
+
         sql_file = (
             _TABLE_NAME.NUMERIC_OVERALL
             if predictor_type == _PREDICTOR_TYPE.NUMERIC
@@ -345,6 +631,9 @@ class Preprocess(LazyNamespace):
         )
 
     def _read_batch_sql_file(self, predictor_type: _PREDICTOR_TYPE):
+        if self.incremental:
+            return self._read_combine_sql_file(predictor_type)
+
         sql_file = (
             _TABLE_NAME.NUMERIC
             if predictor_type == _PREDICTOR_TYPE.NUMERIC
@@ -355,6 +644,17 @@ class Preprocess(LazyNamespace):
             package_name=queries_data, filename_w_ext=f"{sql_file.value}.sql"
         )
 
+    def _read_combine_sql_file(self, predictor_type: _PREDICTOR_TYPE):
+        sql_file = (
+            _TABLE_NAME.NUMERIC_COMBINE
+            if predictor_type == _PREDICTOR_TYPE.NUMERIC
+            else _TABLE_NAME.SYMBOLIC_COMBINE
+        )
+
+        return self._read_resource_file(
+            package_name=queries_data, filename_w_ext=f"{sql_file.value}.sql"
+        )
+
     def _read_resource_file(self, package_name, filename_w_ext):
         return (
             resources_files(package_name)
@@ -362,10 +662,14 @@ class Preprocess(LazyNamespace):
             .read_text(encoding="utf-8")
         )
 
-    def _get_model_contexts_sql_formatted(self, tbl_name: _TABLE_NAME):
+    def _get_model_contexts_sql_formatted(
+        self,
+        tbl_name: _TABLE_NAME,
+        sql_name: _TABLE_NAME = _TABLE_NAME.MODEL_CONTEXTS,
+    ):
         sql = self._read_resource_file(
             package_name=queries_data,
-            filename_w_ext=f"{_TABLE_NAME.MODEL_CONTEXTS.value}.sql",
+            filename_w_ext=f"{sql_name.value}.sql",
         )
 
         f_sql = f"""{
@@ -390,6 +694,8 @@ class Preprocess(LazyNamespace):
                 ENABLE_PROGRESS_BAR="true" if self.progress_bar else "false",
                 TABLE_NAME=tbl_name.value,
                 WHERE_CONDITION=where_condition,
+                PARTITION="'whole_model'",
+                BIN_CONTENTS=f"IFNULL(NULLIF({self.LEFT_PREFIX}.symbolic_value, ''), 'MISSING')",
             )
         }"""
 
@@ -407,16 +713,20 @@ class Preprocess(LazyNamespace):
                 ENABLE_PROGRESS_BAR="true" if self.progress_bar else "false",
                 TABLE_NAME=tbl_name.value,
                 WHERE_CONDITION=where_condition,
+                PARTITION=f"{self.LEFT_PREFIX}.{_COL.PARTITON.value}",
+                BIN_CONTENTS=f"IFNULL(NULLIF(trim({self.LEFT_PREFIX}.symbolic_value), ''), 'MISSING')",
             )
         }"""
 
         return self._clean_query(f_sql)
 
-    def _get_selected_files(self):
-        if len(self.selected_files) == 0:
-            self._populate_selected_files()
+    def _get_selected_files(self, selected_files: Optional[list[str]] = None):
+        if selected_files is None:
+            if len(self.selected_files) == 0:
+                self._populate_selected_files()
+            selected_files = self.selected_files
 
-        q = ", ".join([f"'{x}'" for x in self.selected_files])
+        q = ", ".join([f"'{x}'" for x in selected_files])
         return q
 
     def _populate_selected_files(self):
@@ -467,6 +777,7 @@ class Preprocess(LazyNamespace):
                 )
                 if pathlib.Path(latest_file).exists():
                     files_.append(latest_file)
+                    self.selected_files_by_date[date] = latest_file
 
         logger.info("Selected files:= \n %s", files_)
         self.selected_files = files_
@@ -491,13 +802,15 @@ class Preprocess(LazyNamespace):
         except Exception as e:
             raise ValueError(f"Failed to download file from {file_url}: {e}")
 
-    def _execute_query(self, query: str):
-        """Execute a query on the in-memory DuckDB connection."""
+    def _execute_query(
+        self, query: str, conn: Optional[duckdb.DuckDBPyConnection] = None
+    ):
+        """Execute a query on the in-memory DuckDB connection, or on a cursor of it."""
         if self._conn is None:
             raise ValueError("DuckDB connection is not initialized.")
 
         try:
-            execution = self._conn.execute(query)
+            execution = (conn or self._conn).execute(query)
         except duckdb.CatalogException as e:
             logger.error("DatabaseException: %s", e)
             raise
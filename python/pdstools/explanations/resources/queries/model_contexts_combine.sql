@@ -0,0 +1,11 @@
+SET memory_limit='{MEMORY_LIMIT}GB';
+SET threads TO {THREAD_COUNT};
+SET enable_progress_bar = {ENABLE_PROGRESS_BAR};
+
+SELECT 
+    t.partition, 
+    SUM(t.nb_samples) AS nb_samples
+FROM {TABLE_NAME} as t
+GROUP BY partition
+ORDER BY nb_samples DESC
+LIMIT {MODEL_CONTEXT_LIMIT};
@@ -0,0 +1,118 @@
+SET threads TO {THREAD_COUNT};
+SET memory_limit = '{MEMORY_LIMIT}GB';
+SET enable_progress_bar = {ENABLE_PROGRESS_BAR};
+
+WITH
+    sketch AS (
+        SELECT
+            {PARTITION} AS partition
+            , {LEFT_PREFIX}.predictor_name
+            , {LEFT_PREFIX}.predictor_type
+            , {LEFT_PREFIX}.contribution_abs_sum
+            , {LEFT_PREFIX}.contribution_sum
+            , {LEFT_PREFIX}.contribution_min
+            , {LEFT_PREFIX}.contribution_max
+            , {LEFT_PREFIX}.frequency
+            , {LEFT_PREFIX}.minimum
+            , {LEFT_PREFIX}.maximum
+        FROM {TABLE_NAME} AS {LEFT_PREFIX}
+        WHERE {WHERE_CONDITION}
+    ),
+    quantiles AS (
+        SELECT
+            *
+            , LEAST(10, 1 + FLOOR(
+                10.0 * (SUM({LEFT_PREFIX}.frequency) OVER (PARTITION BY ({LEFT_PREFIX}.predictor_name, {LEFT_PREFIX}.partition) ORDER BY {LEFT_PREFIX}.minimum, {LEFT_PREFIX}.maximum ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW) - {LEFT_PREFIX}.frequency)
+                / SUM({LEFT_PREFIX}.frequency) OVER (PARTITION BY ({LEFT_PREFIX}.predictor_name, {LEFT_PREFIX}.partition))
+            ))::INT64 AS decile
+        FROM sketch AS {LEFT_PREFIX}
+        WHERE {LEFT_PREFIX}.minimum IS NOT NULL
+    ),
+    grouped_data AS (
+        SELECT
+            {LEFT_PREFIX}.partition
+            , {LEFT_PREFIX}.predictor_name
+            , {LEFT_PREFIX}.predictor_type
+            , {LEFT_PREFIX}.decile
+            , SUM({LEFT_PREFIX}.contribution_abs_sum) / SUM({LEFT_PREFIX}.frequency) AS contribution_abs
+            , SUM({LEFT_PREFIX}.contribution_sum) / SUM({LEFT_PREFIX}.frequency) AS contribution
+            , MIN({LEFT_PREFIX}.contribution_min) AS contribution_min
+            , MAX({LEFT_PREFIX}.contribution_max) AS contribution_max
+            , SUM({LEFT_PREFIX}.frequency) AS frequency
+            , MIN({LEFT_PREFIX}.minimum) AS minimum
+            , MAX({LEFT_PREFIX}.maximum) AS maximum
+        FROM quantiles AS {LEFT_PREFIX}
+        GROUP BY {LEFT_PREFIX}.predictor_name, {LEFT_PREFIX}.predictor_type, {LEFT_PREFIX}.decile, {LEFT_PREFIX}.partition
+    ),
+    re_grouped_data AS (
+        SELECT
+            {LEFT_PREFIX}.partition
+            , {LEFT_PREFIX}.predictor_name
+            , {LEFT_PREFIX}.predictor_type
+            , MIN({LEFT_PREFIX}.decile) AS decile
+            , AVG({LEFT_PREFIX}.contribution_abs) AS contribution_abs
+            , AVG({LEFT_PREFIX}.contribution) AS contribution
+            , MIN({LEFT_PREFIX}.contribution_min) AS contribution_min
+            , MAX({LEFT_PREFIX}.contribution_max) AS contribution_max
+            , SUM(frequency)::INT64 AS frequency
+            , MIN({LEFT_PREFIX}.minimum) AS minimum
+            , MAX({LEFT_PREFIX}.maximum) AS maximum
+        FROM grouped_data AS {LEFT_PREFIX}
+        GROUP BY {LEFT_PREFIX}.predictor_name, {LEFT_PREFIX}.predictor_type, {LEFT_PREFIX}.minimum, {LEFT_PREFIX}.partition
+    ),
+    intervals AS (
+        SELECT
+            {LEFT_PREFIX}.partition
+            , {LEFT_PREFIX}.predictor_name
+            , {LEFT_PREFIX}.decile
+            , LAG(maximum) OVER (PARTITION BY ({LEFT_PREFIX}.predictor_name, {LEFT_PREFIX}.partition) ORDER BY {LEFT_PREFIX}.decile) AS min_interval
+            , LEAD(minimum) OVER (PARTITION BY ({LEFT_PREFIX}.predictor_name, {LEFT_PREFIX}.partition) ORDER BY {LEFT_PREFIX}.decile) AS max_interval
+        FROM re_grouped_data as {LEFT_PREFIX}
+    ),
+    result AS (
+        SELECT
+            {LEFT_PREFIX}.partition
+            , {LEFT_PREFIX}.predictor_name
+            , {LEFT_PREFIX}.predictor_type
+            , CASE 
+                WHEN {RIGHT_PREFIX}.min_interval IS NULL AND {RIGHT_PREFIX}.max_interval IS NOT NULL
+                    THEN '<=' || CAST(CAST(({LEFT_PREFIX}.maximum + {RIGHT_PREFIX}.max_interval) / 2.0 AS DECIMAL) AS VARCHAR)
+                WHEN {RIGHT_PREFIX}.max_interval IS NULL AND {RIGHT_PREFIX}.min_interval IS NOT NULL
+                    THEN '>' || CAST(CAST(({LEFT_PREFIX}.minimum + {RIGHT_PREFIX}.min_interval) / 2.0 AS DECIMAL) AS VARCHAR)
+                WHEN {RIGHT_PREFIX}.max_interval IS NULL AND {RIGHT_PREFIX}.min_interval IS NULL
+                    THEN '[' || CAST({LEFT_PREFIX}.minimum AS VARCHAR) || ':' || CAST({LEFT_PREFIX}.maximum AS VARCHAR) || ']'
+                ELSE '[' || CAST(CAST(({LEFT_PREFIX}.minimum + {RIGHT_PREFIX}.min_interval) / 2.0 AS DECIMAL) AS VARCHAR) || ':' || CAST(CAST(({LEFT_PREFIX}.maximum + {RIGHT_PREFIX}.max_interval) / 2.0 AS DECIMAL) AS VARCHAR) || ']'
+            END AS bin_contents
+            , {LEFT_PREFIX}.decile AS bin_order
+            , {LEFT_PREFIX}.contribution_abs
+            , {LEFT_PREFIX}.contribution
+            , {LEFT_PREFIX}.contribution_min
+            , {LEFT_PREFIX}.contribution_max
+            , {LEFT_PREFIX}.frequency
+            
+        FROM re_grouped_data AS {LEFT_PREFIX}
+        JOIN intervals AS {RIGHT_PREFIX}
+        ON {LEFT_PREFIX}.predictor_name={RIGHT_PREFIX}.predictor_name AND {LEFT_PREFIX}.decile={RIGHT_PREFIX}.decile AND {LEFT_PREFIX}.partition = {RIGHT_PREFIX}.partition
+    ),
+    result_missing AS (
+        SELECT
+            {LEFT_PREFIX}.partition
+            , {LEFT_PREFIX}.predictor_name
+            , {LEFT_PREFIX}.predictor_type
+            , 'MISSING' AS bin_contents
+            , 0 AS bin_order
+            , SUM({LEFT_PREFIX}.contribution_abs_sum) / SUM({LEFT_PREFIX}.frequency) AS contribution_abs
+            , SUM({LEFT_PREFIX}.contribution_sum) / SUM({LEFT_PREFIX}.frequency) AS contribution
+            , MIN({LEFT_PREFIX}.contribution_min) AS contribution_min
+            , MAX({LEFT_PREFIX}.contribution_max) AS contribution_max
+            , SUM({LEFT_PREFIX}.frequency)::INT64 AS frequency
+        FROM sketch AS {LEFT_PREFIX} WHERE {LEFT_PREFIX}.minimum IS NULL
+        GROUP BY {LEFT_PREFIX}.predictor_name, {LEFT_PREFIX}.predictor_type, {LEFT_PREFIX}.partition
+    )
+SELECT
+    *
+FROM result
+UNION
+SELECT
+    * 
+FROM result_missing
@@ -0,0 +1,50 @@
+SET threads TO {THREAD_COUNT};
+SET memory_limit = '{MEMORY_LIMIT}GB';
+SET enable_progress_bar = {ENABLE_PROGRESS_BAR};
+
+WITH
+    sketch AS (
+        SELECT
+            *
+            , NTILE({SKETCH_BINS}) OVER (PARTITION BY ({LEFT_PREFIX}.predictor_name, {LEFT_PREFIX}.partition) ORDER BY {LEFT_PREFIX}.numeric_value ASC) AS sketch_bin
+        FROM {TABLE_NAME} AS {LEFT_PREFIX}
+        WHERE {LEFT_PREFIX}.numeric_value IS NOT NULL
+    ),
+    partial AS (
+        SELECT
+            {LEFT_PREFIX}.partition
+            , {LEFT_PREFIX}.predictor_name
+            , {LEFT_PREFIX}.predictor_type
+            , SUM(ABS({LEFT_PREFIX}.shap_coeff)) AS contribution_abs_sum
+            , SUM({LEFT_PREFIX}.shap_coeff) AS contribution_sum
+            , MIN({LEFT_PREFIX}.shap_coeff) AS contribution_min
+            , MAX({LEFT_PREFIX}.shap_coeff) AS contribution_max
+            , COUNT(*) AS frequency
+            , MIN({LEFT_PREFIX}.numeric_value) AS minimum
+            , MAX({LEFT_PREFIX}.numeric_value) AS maximum
+        FROM sketch AS {LEFT_PREFIX}
+        GROUP BY {LEFT_PREFIX}.predictor_name, {LEFT_PREFIX}.predictor_type, {LEFT_PREFIX}.sketch_bin, {LEFT_PREFIX}.partition
+    ),
+    partial_missing AS (
+        SELECT
+            {LEFT_PREFIX}.partition
+            , {LEFT_PREFIX}.predictor_name
+            , {LEFT_PREFIX}.predictor_type
+            , SUM(ABS({LEFT_PREFIX}.shap_coeff)) AS contribution_abs_sum
+            , SUM({LEFT_PREFIX}.shap_coeff) AS contribution_sum
+            , MIN({LEFT_PREFIX}.shap_coeff) AS contribution_min
+            , MAX({LEFT_PREFIX}.shap_coeff) AS contribution_max
+            , COUNT(*) AS frequency
+            , NULL::DOUBLE AS minimum
+            , NULL::DOUBLE AS maximum
+        FROM {TABLE_NAME} AS {LEFT_PREFIX}
+        WHERE {LEFT_PREFIX}.numeric_value IS NULL
+        GROUP BY {LEFT_PREFIX}.predictor_name, {LEFT_PREFIX}.predictor_type, {LEFT_PREFIX}.partition
+    )
+SELECT
+    *
+FROM partial
+UNION ALL
+SELECT
+    *
+FROM partial_missing
@@ -0,0 +1,35 @@
+SET threads TO {THREAD_COUNT};
+SET memory_limit = '{MEMORY_LIMIT}GB';
+SET enable_progress_bar = {ENABLE_PROGRESS_BAR};
+
+WITH sym_grp AS (
+  SELECT 
+        {PARTITION} AS partition
+      , {LEFT_PREFIX}.predictor_name
+      , {LEFT_PREFIX}.predictor_type
+      , {BIN_CONTENTS} AS bin_contents
+      , SUM({LEFT_PREFIX}.contribution_abs_sum) / SUM({LEFT_PREFIX}.frequency) AS contribution_abs
+      , SUM({LEFT_PREFIX}.contribution_sum) / SUM({LEFT_PREFIX}.frequency) AS contribution
+      , MIN({LEFT_PREFIX}.contribution_min) AS contribution_min
+      , MAX({LEFT_PREFIX}.contribution_max) AS contribution_max
+      , SUM({LEFT_PREFIX}.frequency)::INT64 AS frequency
+  FROM {TABLE_NAME} AS {LEFT_PREFIX} 
+  WHERE {WHERE_CONDITION}
+  GROUP BY 
+      1
+    , {LEFT_PREFIX}.predictor_name
+    , {LEFT_PREFIX}.predictor_type
+    , {LEFT_PREFIX}.symbolic_value
+)
+SELECT
+  {LEFT_PREFIX}.partition
+, predictor_name
+, predictor_type
+, bin_contents
+, ROW_NUMBER() OVER(PARTITION BY {LEFT_PREFIX}.partition, predictor_name ORDER BY frequency DESC) AS bin_order
+, contribution_abs
+, contribution
+, contribution_min
+, contribution_max
+, frequency
+FROM sym_grp AS {LEFT_PREFIX}
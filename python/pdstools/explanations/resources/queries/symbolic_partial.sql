@@ -0,0 +1,20 @@
+SET threads TO {THREAD_COUNT};
+SET memory_limit = '{MEMORY_LIMIT}GB';
+SET enable_progress_bar = {ENABLE_PROGRESS_BAR};
+
+SELECT
+      {LEFT_PREFIX}.partition
+    , {LEFT_PREFIX}.predictor_name
+    , {LEFT_PREFIX}.predictor_type
+    , {LEFT_PREFIX}.symbolic_value
+    , SUM(ABS({LEFT_PREFIX}.shap_coeff)) AS contribution_abs_sum
+    , SUM({LEFT_PREFIX}.shap_coeff) AS contribution_sum
+    , MIN({LEFT_PREFIX}.shap_coeff) AS contribution_min
+    , MAX({LEFT_PREFIX}.shap_coeff) AS contribution_max
+    , COUNT(*) AS frequency
+FROM {TABLE_NAME} AS {LEFT_PREFIX}
+GROUP BY
+      {LEFT_PREFIX}.partition
+    , {LEFT_PREFIX}.predictor_name
+    , {LEFT_PREFIX}.predictor_type
+    , {LEFT_PREFIX}.symbolic_value
@@ -638,11 +638,8 @@ class Plots(LazyNamespace):
             )
             .group_by(cdh_utils.safe_flatten_list([by, facet, "OutcomeTime"]))
             .agg(
-                pl.map_groups(
-                    exprs=[f"Interaction_Outcome_{metric}", "Propensity"],
-                    function=lambda data: cdh_utils.auc_from_probs(data[0], data[1]),
-                    return_dtype=pl.Float64,
-                    returns_scalar=True,
+                cdh_utils.auc_from_probs_polars(
+                    f"Interaction_Outcome_{metric}", "Propensity"
                 ).alias("Performance")
             )
             .sort(["OutcomeTime"])
@@ -1,14 +1,32 @@
+import atexit
+import hashlib
 import logging
 import os
 import pathlib
 import re
+import shutil
+import tempfile
 import warnings
 import zipfile
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timezone
 from glob import glob
 from io import BytesIO
 from pathlib import Path
-from typing import Iterable, List, Literal, Optional, Tuple, Union, overload
+from typing import (
+    IO,
+    Deque,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+    overload,
+)
 
 import polars as pl
 import polars.selectors as cs
@@ -17,6 +35,8 @@ from ..utils.cdh_utils import from_prpc_date_time
 
 logger = logging.getLogger(__name__)
 
+F = TypeVar("F", pl.DataFrame, pl.LazyFrame)
+
 
 def read_ds_export(
     filename: Union[str, os.PathLike, BytesIO],
@@ -53,6 +73,11 @@ def read_ds_export(
 
     Keyword arguments
     -----------------
+    stream_to_disk: bool
+        Whether zipped and gzipped files are decompressed to a temporary file,
+        see :func:`import_file`.
+    temp_dir: Union[str, os.PathLike]
+        The directory to decompress to, see :func:`import_file`.
     Any:
         Any arguments to plug into the scan_* function from Polars.
 
@@ -142,6 +167,16 @@ def import_file(
 ) -> pl.LazyFrame:
     """Imports a file using Polars
 
+    Zipped and gzipped files are decompressed in chunks to a temporary file,
+    which is then scanned lazily, so the uncompressed data never has to fit
+    in memory. Because the returned frame keeps reading from it, the temporary
+    file is kept until the interpreter exits. Long-running processes can free
+    the disk space earlier by passing their own `temp_dir` and removing it
+    when done, or by calling :func:`remove_temp_files`.
+    Files that are already in memory (BytesIO), like uploads, are decompressed
+    in memory instead, so long-running processes do not collect temporary files.
+    Pass `stream_to_disk` to override this.
+
     Parameters
     ----------
     File: str
@@ -149,20 +184,34 @@ def import_file(
     extension: str
         The extension of the file, used to determine which function to use
 
+    Keyword arguments
+    -----------------
+    stream_to_disk: bool
+        Whether to decompress zipped and gzipped files to a temporary file.
+        Defaults to True, unless the file is a BytesIO object
+    temp_dir: Union[str, os.PathLike], default = None
+        The directory to write the temporary files to.
+        Defaults to the system's temporary directory
+
     Returns
     -------
     pl.LazyFrame
         The (imported) lazy dataframe
     """
+    stream_to_disk = reading_opts.pop(
+        "stream_to_disk", not isinstance(file, BytesIO)
+    )
+    temp_dir = reading_opts.pop("temp_dir", None)
     if extension == ".zip":
-        logger.debug("Zip file found, extracting data.json to BytesIO.")
-        file, extension = read_zipped_file(file)
+        logger.debug("Zip file found, extracting data.json.")
+        file, extension = read_zipped_file(
+            file, to_file=stream_to_disk, temp_dir=temp_dir
+        )
     elif extension == ".gz":
         import gzip
 
         if isinstance(file, str):
             extension = os.path.splitext(os.path.splitext(file)[0])[1]
-            file = BytesIO(gzip.GzipFile(file).read())
         else:
             # For BytesIO objects, extract extension from name attribute if available
             if hasattr(file, "name"):
@@ -170,7 +219,11 @@ def import_file(
             else:
                 extension = ""  # Default to empty if we can't determine
             file.seek(0)
-            file = BytesIO(gzip.decompress(file.read()))
+        with gzip.open(file) as unzipped:
+            if stream_to_disk:
+                file = _spill_to_temp_file(unzipped, extension, temp_dir)
+            else:
+                file = BytesIO(unzipped.read())
 
     if extension == ".csv":
         csv_opts = dict(
@@ -228,8 +281,11 @@ def import_file(
 
 
 def read_zipped_file(
-    file: Union[str, BytesIO], verbose: bool = False
-) -> Tuple[BytesIO, str]:
+    file: Union[str, BytesIO],
+    verbose: bool = False,
+    to_file: bool = False,
+    temp_dir: Optional[Union[str, os.PathLike]] = None,
+) -> Tuple[Union[BytesIO, str], str]:
     """Read a zipped NDJSON file.
     Reads a dataset export file as exported and downloaded from Pega. The export
     file is formatted as a zipped multi-line JSON file. It reads the file,
@@ -241,11 +297,19 @@ def read_zipped_file(
         The full path to the file
     verbose : str, default=False
         Whether to print the names of the files within the unzipped file for debugging purposes
+    to_file : bool, default=False
+        Whether to decompress the data in chunks to a temporary file
+        and return its path, rather than reading it into memory.
+        The temporary file is kept until the interpreter exits,
+        or until :func:`remove_temp_files` is called
+    temp_dir : Union[str, os.PathLike], optional
+        The directory to write the temporary file to.
+        Defaults to the system's temporary directory
 
     Returns
     -------
-    os.BytesIO
-        The raw bytes object to pass through to Polars
+    Union[os.BytesIO, str]
+        The raw bytes object, or the path to the temporary file, to pass through to Polars
     """
 
     def get_valid_files(files: List[str]):
@@ -274,41 +338,115 @@ def read_zipped_file(
                     )
                 )
             with z.open(zfile) as zippedfile:
+                if to_file:
+                    return (
+                        _spill_to_temp_file(zippedfile, ".json", temp_dir),
+                        ".json",
+                    )
                 return (BytesIO(zippedfile.read()), ".json")
         else:  # pragma: no cover
             raise FileNotFoundError("Cannot find a 'data.json' file in the zip folder.")
 
 
+_temp_files: List[str] = []
+
+
+@atexit.register
+def remove_temp_files() -> None:
+    """Removes the temporary files that zipped and gzipped exports were
+    decompressed to.
+
+    This runs automatically when the interpreter exits. Long-running processes
+    can call it earlier to free the disk space, once the frames read from
+    these exports have been collected: scanning them afterwards fails.
+    """
+    while _temp_files:
+        try:
+            os.remove(_temp_files.pop())
+        except OSError:  # pragma: no cover
+            pass
+
+
+def _spill_to_temp_file(
+    fileobj: IO[bytes],
+    suffix: str,
+    temp_dir: Optional[Union[str, os.PathLike]] = None,
+) -> str:
+    """Copies a (decompressing) file object in chunks to a temporary file.
+
+    Because the returned path is scanned lazily, the file is kept until
+    :func:`remove_temp_files` is called or the interpreter exits.
+    """
+    with tempfile.NamedTemporaryFile(
+        prefix="pdstools-", suffix=suffix, dir=temp_dir, delete=False
+    ) as temp_file:
+        shutil.copyfileobj(fileobj, temp_file, length=1 << 20)
+    _temp_files.append(temp_file.name)
+    return temp_file.name
+
+
 def read_multi_zip(
     files: Iterable[str],
     zip_type: Literal["gzip"] = "gzip",
     add_original_file_name: bool = False,
     verbose: bool = True,
+    *,
+    n_workers: Optional[int] = None,
+    max_in_flight: Optional[int] = None,
+    sink: Optional[Union[str, os.PathLike]] = None,
 ) -> pl.LazyFrame:
     """Reads multiple zipped ndjson files, and concats them to one Polars dataframe.
 
+    The files are decompressed and parsed in a thread pool, keeping at most
+    `max_in_flight` files in flight at a time. The schemas of all files are
+    unified once, after which the files are concatenated without further
+    casting.
+
     Parameters
     ----------
     files : list
         The list of files to concat
     zip_type : Literal['gzip']
         At this point, only 'gzip' is supported
+    add_original_file_name : bool, default = False
+        Whether to add a `file` column with the name of the file each row came from
     verbose : bool, default = True
         Whether to print out the progress of the import
+    n_workers : int, optional
+        The number of threads to read the files with.
+        By default, uses the same number of threads as a ThreadPoolExecutor.
+    max_in_flight : int, optional
+        The number of files that are read ahead of the ones being combined,
+        by default twice the number of workers. When writing to `sink`,
+        this bounds the number of files kept in memory at once: half of them
+        are read ahead, the others wait to be written (at least one of each).
+    sink : os.PathLike, optional
+        If given, writes the combined data to a parquet file at this path
+        instead of keeping it in memory, and returns a scan of that file.
     """
-    import gzip
-
     if zip_type != "gzip":
         raise NotImplementedError("Only supports gzip for now")
 
-    table = []
-    total_files = len(files) if isinstance(files, (list, tuple)) else None
-
+    files = list(files)
+    if n_workers is None:
+        n_workers = min(32, (os.cpu_count() or 1) + 4)
+    if max_in_flight is None:
+        max_in_flight = 2 * n_workers
+    if max_in_flight < 1:
+        raise ValueError(f"max_in_flight should be at least 1, got {max_in_flight}")
+    # When writing to sink, the files waiting to be written share the budget
+    # with the files that are read ahead
+    read_ahead = max_in_flight if sink is None else max(1, max_in_flight // 2)
+    batch_size = max(1, max_in_flight - read_ahead)
+
+    frames = _read_gzipped_ndjson_files(
+        files, add_original_file_name, n_workers, read_ahead
+    )
     try:
         from tqdm import tqdm
 
-        files_iterator = tqdm(
-            files, desc="Reading files...", disable=not verbose, total=total_files
+        frames = tqdm(
+            frames, desc="Reading files...", disable=not verbose, total=len(files)
         )
     except ImportError:
         if verbose:
@@ -316,20 +454,84 @@ def read_multi_zip(
                 "tqdm is not installed. For a progress bar, install tqdm: pip install tqdm",
                 UserWarning,
             )
-        files_iterator = files
-        if verbose:
             print("Reading files...")
 
-    for file in files_iterator:
-        data = pl.read_ndjson(gzip.open(file).read())
-        if add_original_file_name:
-            data = data.with_columns(file=pl.lit(file))
-        table.append(data)
-
-    df = pl.concat(table, how="diagonal")
+    if sink is None:
+        table = list(frames)
+        schema = _unified_schema([frame.schema for frame in table])
+        df = pl.concat([_align_schema(frame, schema) for frame in table])
+        if verbose:
+            print("Combining completed")
+        return df.lazy()
+
+    with tempfile.TemporaryDirectory(dir=Path(sink).parent) as tmp:
+        parts: List[Path] = []
+        batch: List[pl.DataFrame] = []
+
+        def flush():
+            parts.append(Path(tmp) / f"part-{len(parts)}.parquet")
+            pl.concat(batch, how="diagonal_relaxed").write_parquet(parts[-1])
+            batch.clear()
+
+        for frame in frames:
+            batch.append(frame)
+            if len(batch) >= batch_size:
+                flush()
+        if batch or not parts:
+            flush()
+        schema = _unified_schema([pl.read_parquet_schema(part) for part in parts])
+        pl.concat(
+            [_align_schema(pl.scan_parquet(part), schema) for part in parts]
+        ).sink_parquet(sink)
     if verbose:
         print("Combining completed")
-    return df.lazy()
+    return pl.scan_parquet(sink)
+
+
+def _read_gzipped_ndjson(file: str, add_original_file_name: bool) -> pl.DataFrame:
+    import gzip
+
+    with gzip.open(file) as f:
+        data = pl.read_ndjson(f.read())
+    if add_original_file_name:
+        data = data.with_columns(file=pl.lit(file))
+    return data
+
+
+def _read_gzipped_ndjson_files(
+    files: List[str], add_original_file_name: bool, n_workers: int, max_in_flight: int
+) -> Iterator[pl.DataFrame]:
+    """Reads the files in a thread pool, yielding them in order."""
+    if n_workers < 2:
+        for file in files:
+            yield _read_gzipped_ndjson(file, add_original_file_name)
+        return
+
+    with ThreadPoolExecutor(max_workers=n_workers) as pool:
+        pending: Deque[Future] = deque()
+        for file in files:
+            if len(pending) >= max_in_flight:
+                yield pending.popleft().result()
+            pending.append(
+                pool.submit(_read_gzipped_ndjson, file, add_original_file_name)
+            )
+        while pending:
+            yield pending.popleft().result()
+
+
+def _unified_schema(schemas: List[pl.Schema]) -> pl.Schema:
+    """Combines the schemas into one, using the supertype of any conflicting types."""
+    return pl.concat(
+        [pl.DataFrame(schema=schema) for schema in schemas], how="diagonal_relaxed"
+    ).schema
+
+
+def _align_schema(df: F, schema: pl.Schema) -> F:
+    columns = df.collect_schema().names()
+    return df.select(
+        pl.col(name).cast(dtype) if name in columns else pl.lit(None, dtype).alias(name)
+        for name, dtype in schema.items()
+    )
 
 
 def get_latest_file(
@@ -507,6 +709,7 @@ def read_dataflow_output(
     extension: Literal["json"] = "json",
     compression: Literal["gzip"] = "gzip",
     cache_directory: Union[str, os.PathLike] = "cache",
+    max_fragments: int = 16,
 ):
     """Reads the file output of a dataflow run.
 
@@ -520,11 +723,15 @@ def read_dataflow_output(
     and read in all of the files.
 
     If `cache_file_name` is specified, this function caches the data it read before
-    as a `parquet` file. This not only reduces the file size, it is also very fast.
-    When this function is run and there is a pre-existing parquet file with the name
-    specified in `cache_file_name`, it will read all of the files that weren't read in
-    before and add it to the parquet file. If no new files are found, it simply returns
-    the contents of that parquet file - significantly speeding up operations.
+    in a directory with that name. The cache is append-only: every refresh
+    writes the files that weren't read in before to a new `parquet` fragment,
+    and a manifest keeps track of the name, size and modification time of each
+    source file and the fragment it was written to. Refreshing therefore only
+    reads and writes the new files. Source files that changed since they were
+    cached are read in again, and files that were removed are dropped from the
+    manifest. Once there are more than `max_fragments` fragments, they are
+    compacted into one. If no new files are found, it simply returns
+    the contents of the cache - significantly speeding up operations.
 
     In a future version, the functionality of this function will be extended to also
     read from S3 or other remote file systems directly using the same caching method.
@@ -535,7 +742,7 @@ def read_dataflow_output(
         An iterable (list or a glob) of file strings to read.
         If a string is provided, we call glob() on it to find all files corresponding
     cache_file_name : str, Optional
-        If given, caches the files to a file with the given name.
+        If given, caches the files to a directory with the given name.
         If None, does not use the cache at all
     extension : Literal["json"]
         The extension of the files, by default "json"
@@ -543,6 +750,8 @@ def read_dataflow_output(
         The compression of the files, by default "gzip"
     cache_directory : os.PathLike
         The file path to cache the previously read files
+    max_fragments : int, default = 16
+        The number of cache fragments after which they are compacted into one
 
     Usage
     -----
@@ -553,43 +762,121 @@ def read_dataflow_output(
         files = glob(files)
     original_files = list(files)
 
-    def has_cache():
-        return os.path.isfile(cache_file) if cache_file_name else False
-
-    if cache_file_name:
-        cache_file = Path(cache_directory) / f"{cache_file_name}.parquet"
-        if has_cache():
-            cached_data = pl.scan_parquet(cache_file)
-            files = (
-                pl.LazyFrame({"file": files})
-                .join(cached_data, on="file", how="anti")
-                .collect()["file"]
-                .to_list()
-            )
-            if not files:
-                return (
-                    cached_data.filter(pl.col("file").is_in(original_files))
-                    .drop("file")
-                    .lazy()
-                )
+    if not cache_file_name:
+        new_data = read_multi_zip(
+            files=original_files,
+            zip_type=compression,
+            add_original_file_name=True,
+        )
+        return new_data.filter(pl.col("file").is_in(original_files)).lazy()
+
+    cache = Path(cache_directory) / cache_file_name
+    cache.mkdir(parents=True, exist_ok=True)
+    manifest = _read_manifest(cache)
 
-    if files:
+    sources = pl.DataFrame(
+        [(file, *_file_signature(file)) for file in dict.fromkeys(original_files)],
+        schema=_MANIFEST_SCHEMA[:3],
+        orient="row",
+    )
+    removed = [file for file in manifest["file"] if not os.path.isfile(file)]
+    changed = (
+        manifest.join(sources, on="file", suffix="_source")
+        .filter(
+            (pl.col("size") != pl.col("size_source"))
+            | (pl.col("mtime") != pl.col("mtime_source"))
+        )["file"]
+        .to_list()
+    )
+    if removed:
+        logger.info(f"{len(removed)} cached source files were removed")
+    if changed:
+        logger.info(f"{len(changed)} cached source files changed, reading them again")
+    manifest = manifest.filter(~pl.col("file").is_in(removed + changed))
+    updated = bool(removed or changed) or manifest.height == 0
+
+    to_read = sources.join(manifest, on="file", how="anti")
+    if to_read.height > 0:
         new_data = read_multi_zip(
-            files=files,
+            files=to_read["file"].to_list(),
             zip_type=compression,
             add_original_file_name=True,
+        ).collect()
+        fragment = _write_fragment(cache, new_data, to_read)
+        manifest = pl.concat(
+            [manifest, to_read.with_columns(fragment=pl.lit(fragment))]
         )
+        updated = True
 
-    if has_cache():
-        cached_data = pl.scan_parquet(cache_file)
-        combined_data = pl.concat([cached_data, new_data], how="diagonal")
-    else:
-        combined_data = new_data
+    if manifest["fragment"].n_unique() > max_fragments:
+        logger.info("Compacting the cache fragments")
+        data = _scan_fragments(cache, manifest).collect()
+        fragment = _write_fragment(cache, data, manifest)
+        manifest = manifest.with_columns(fragment=pl.lit(fragment))
+        updated = True
 
-    if not cache_file_name:
-        return new_data.filter(pl.col("file").is_in(original_files)).lazy()
+    if updated:
+        _write_manifest(cache, manifest)
+        for stale in set(cache.glob("part-*.parquet")) - {
+            cache / fragment for fragment in manifest["fragment"].unique()
+        }:
+            stale.unlink()
 
-    combined_data.collect().write_parquet(cache_file)
-    return (
-        combined_data.filter(pl.col("file").is_in(original_files)).drop("file").lazy()
-    )
+    return _scan_fragments(
+        cache, manifest.filter(pl.col("file").is_in(original_files))
+    ).drop("file")
+
+
+_MANIFEST_SCHEMA = [
+    ("file", pl.Utf8),
+    ("size", pl.Int64),
+    ("mtime", pl.Int64),
+    ("fragment", pl.Utf8),
+]
+
+
+def _file_signature(file: str) -> Tuple[int, int]:
+    stat = os.stat(file)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _read_manifest(cache: Path) -> pl.DataFrame:
+    manifest_file = cache / "_manifest.parquet"
+    if manifest_file.is_file():
+        return pl.read_parquet(manifest_file)
+    return pl.DataFrame(schema=_MANIFEST_SCHEMA)
+
+
+def _write_manifest(cache: Path, manifest: pl.DataFrame):
+    tmp = cache / "_manifest.parquet.tmp"
+    manifest.write_parquet(tmp)
+    os.replace(tmp, cache / "_manifest.parquet")
+
+
+def _write_fragment(cache: Path, data: pl.DataFrame, sources: pl.DataFrame) -> str:
+    """Writes a cache fragment, named after the digest of the source files in it."""
+    digest = hashlib.sha256()
+    for file, size, mtime in sources.select("file", "size", "mtime").iter_rows():
+        digest.update(f"{file}\t{size}\t{mtime}\n".encode())
+    fragment = f"part-{digest.hexdigest()[:16]}.parquet"
+    tmp = cache / f"{fragment}.tmp"
+    data.write_parquet(tmp)
+    os.replace(tmp, cache / fragment)
+    return fragment
+
+
+def _scan_fragments(cache: Path, manifest: pl.DataFrame) -> pl.LazyFrame:
+    """Scans the rows of the files in the manifest from the fragment they are in.
+
+    Fragments can still contain older versions of changed files until they are
+    compacted, so each fragment is filtered to the files it is current for.
+    """
+    frames = [
+        pl.scan_parquet(cache / fragment).filter(
+            pl.col("file").is_in(group["file"].to_list())
+        )
+        for (fragment,), group in manifest.group_by("fragment", maintain_order=True)
+    ]
+    if not frames:
+        return pl.LazyFrame(schema={"file": pl.Utf8})
+    return pl.concat(frames, how="diagonal")
@@ -8,6 +8,7 @@ from .File import (
     read_ds_export,
     read_multi_zip,
     read_zipped_file,
+    remove_temp_files,
 )
 from .S3 import S3Data
 
@@ -19,6 +20,7 @@ __all__ = [
     "read_ds_export",
     "read_multi_zip",
     "read_zipped_file",
+    "remove_temp_files",
     "S3Data",
     "cache_to_file",
     "get_latest_file",
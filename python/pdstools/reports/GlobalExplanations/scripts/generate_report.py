@@ -160,7 +160,6 @@ Report generation initialized with the following parameters:
             template.format(
                 ROOT_DIR=self.root_dir,
                 DATA_FOLDER=self.data_folder,
-                DATA_PATTERN=f"*_BATCH_{file_batch_nb}.parquet",
                 TOP_N=self.top_n,
                 CONTRIBUTION_TEXT=self.contribution_text,
             )
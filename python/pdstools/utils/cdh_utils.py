@@ -27,6 +27,7 @@ from typing import (
 import polars as pl
 from polars._typing import PolarsTemporalType
 
+from .namespaces import MissingDependenciesException
 from .types import QUERY
 
 F = TypeVar("F", pl.DataFrame, pl.LazyFrame)
@@ -142,6 +143,7 @@ def _extract_keys(
     df: F,
     key: str = "Name",
     capitalize: bool = True,
+    cache_file: Optional[Union[str, PathLike]] = None,
 ) -> F:
     """Extracts keys out of the pyName column
 
@@ -168,6 +170,11 @@ def _extract_keys(
     rows that are JSON. In previous versions all values were overwritten
     resulting in many nulls.
 
+    If a `cache_file` is given, the decoded keys are stored in that parquet
+    file, keyed by the original JSON string. Subsequent calls only decode the
+    values that are not in the cache yet, so repeated loads of a growing
+    datamart only pay for the new models.
+
     Parameters
     ----------
     df: Union[pl.DataFrame, pl.LazyFrame]
@@ -177,6 +184,8 @@ def _extract_keys(
     capitalize: bool
         If True (default) normalizes the names of the embedded columns
         otherwise keeps the names as-is.
+    cache_file: Optional[Union[str, PathLike]]
+        Path to a parquet file to cache the decoded keys in
     """
     # Checking for the 'column is None/Null' case
     if df.collect_schema()[key] != pl.Utf8:
@@ -195,26 +204,48 @@ def _extract_keys(
     ):
         return df
 
-    keys_decoded = (
-        df.filter(pl.col(key).str.starts_with("{"))
+    names = (
+        df.lazy()
+        .filter(pl.col(key).str.starts_with("{"))
         .select(
             pl.col(key).alias("__original").unique(maintain_order=True),
         )
-        .select(
-            pl.col("__original"),
-            pl.col("__original").cast(pl.Utf8).alias("__keys"),
-            # .str.json_decode(infer_schema_length=None),
-            # safe_name("__original").str.json_decode(infer_schema_length=None),
-        )
-        .lazy()
-        .collect()
-        .map_columns(
-            ["__keys"], lambda s: s.str.json_decode(infer_schema_length=1_000_000_000)
-        )
-        .unnest("__keys")
-        .lazy()
         .collect()
     )
+    cached = None
+    if cache_file is not None and Path(cache_file).is_file():
+        cached = pl.read_parquet(cache_file).join(names, on="__original", how="semi")
+        names = names.join(cached, on="__original", how="anti")
+
+    keys_decoded = names
+    if len(names) > 0:
+        keys_decoded = (
+            names.select(
+                pl.col("__original"),
+                pl.col("__original").cast(pl.Utf8).alias("__keys"),
+                # .str.json_decode(infer_schema_length=None),
+                # safe_name("__original").str.json_decode(infer_schema_length=None),
+            )
+            .map_columns(
+                ["__keys"],
+                lambda s: s.str.json_decode(infer_schema_length=1_000_000_000),
+            )
+            .unnest("__keys")
+        )
+    if cache_file is not None and len(keys_decoded) > 0:
+        _update_keys_cache(cache_file, keys_decoded)
+    if cached is not None:
+        # The cache holds the keys of other models too, so drop keys that
+        # none of the names in this dataframe have
+        keys_decoded = pl.concat([cached, keys_decoded], how="diagonal_relaxed")
+        keys_decoded = keys_decoded.select(
+            "__original",
+            *[
+                c
+                for c, n in keys_decoded.null_count().row(0, named=True).items()
+                if n < len(keys_decoded) and c != "__original"
+            ],
+        )
     if capitalize:
         keys_decoded = _polars_capitalize(keys_decoded)
 
@@ -244,6 +275,18 @@ def _extract_keys(
     )
 
 
+def _update_keys_cache(cache_file: Union[str, PathLike], keys_decoded: pl.DataFrame):
+    cache_file = Path(cache_file)
+    if cache_file.is_file():
+        keys_decoded = pl.concat(
+            [pl.read_parquet(cache_file), keys_decoded], how="diagonal_relaxed"
+        ).unique("__original", keep="last", maintain_order=True)
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    temp_file = cache_file.with_name(f"{cache_file.name}.tmp")
+    keys_decoded.write_parquet(temp_file)
+    temp_file.replace(cache_file)
+
+
 def parse_pega_date_time_formats(
     timestamp_col="SnapshotTime",
     timestamp_fmt: Optional[str] = None,
@@ -493,6 +536,187 @@ def aucpr_from_bincounts(
     return np.sum(area[1:])
 
 
+def _bin_order(
+    pos: pl.Expr, neg: pl.Expr, probs: Optional[Union[str, pl.Expr]] = None
+) -> pl.Expr:
+    """Sort key for the bins, the (descending) propensity unless given explicitly."""
+    if probs is None:
+        probs = pos / (pos + neg)
+    elif isinstance(probs, str):
+        probs = pl.col(probs)
+    # Empty bins have a NaN propensity, these go last like they do in numpy
+    return probs.cast(pl.Float64).fill_nan(None)
+
+
+def auc_from_bincounts_polars(
+    pos: Union[str, pl.Expr] = "BinPositives",
+    neg: Union[str, pl.Expr] = "BinNegatives",
+    probs: Optional[Union[str, pl.Expr]] = None,
+) -> pl.Expr:
+    """Polars expression version of :func:`auc_from_bincounts`.
+
+    Calculates the area under the ROC curve from the counts of positives and
+    negatives per bin, without leaving the Polars engine. The expression
+    aggregates to a single value, so use it in a `group_by().agg()` to get the
+    AUC per group or with `.over()` to add it to every row of the group. Like
+    :func:`auc_from_bincounts` it returns a value between 0.5 and 1.0 and 0.5 when
+    there is just one groundtruth label.
+
+    Parameters
+    ----------
+    pos : Union[str, pl.Expr], default = "BinPositives"
+        The column with the counts of the positive responses
+    neg : Union[str, pl.Expr], default = "BinNegatives"
+        The column with the counts of the negative responses
+    probs : Optional[Union[str, pl.Expr]], optional
+        Optional column with probabilities which will be used to set the order
+        of the bins. If missing defaults to pos/(pos+neg).
+
+    Returns
+    -------
+    pl.Expr
+        The AUC as a value between 0.5 and 1.
+
+    Examples
+    --------
+    >>> binning.group_by("ModelID", "PredictorName").agg(
+            AUC=auc_from_bincounts_polars("BinPositives", "BinNegatives")
+        )
+
+    When the bins are stored as lists, explode them inside the aggregation:
+
+    >>> df.group_by("ModelID").agg(
+            AUC=auc_from_bincounts_polars(
+                pl.col("pos").explode(), pl.col("neg").explode()
+            )
+        )
+    """
+    if isinstance(pos, str):
+        pos = pl.col(pos)
+    if isinstance(neg, str):
+        neg = pl.col(neg)
+    pos = pos.cast(pl.Float64)
+    neg = neg.cast(pl.Float64)
+
+    order = _bin_order(pos, neg, probs)
+    sorted_pos = pos.sort_by(order, descending=True, nulls_last=True)
+    sorted_neg = neg.sort_by(order, descending=True, nulls_last=True)
+
+    # Trapezoid rule over the ROC curve. With cumulative positives cp, the
+    # segment of bin i has width neg_i/N and mean height (cp_i + cp_i - pos_i)/2P.
+    area = (sorted_neg * (2 * sorted_pos.cum_sum() - sorted_pos)).sum() / (
+        2 * pos.sum() * neg.sum()
+    )
+    return (
+        pl.when((pos.sum() == 0) | (neg.sum() == 0) | area.is_nan())
+        .then(0.5)
+        .otherwise(0.5 + (0.5 - area).abs())
+        .alias("AUC")
+    )
+
+
+def auc_from_probs_polars(
+    groundtruth: Union[str, pl.Expr], probs: Union[str, pl.Expr]
+) -> pl.Expr:
+    """Polars expression version of :func:`auc_from_probs`.
+
+    Calculates the area under the ROC curve from the truth values and predictions,
+    via the rank-sum (Mann-Whitney) formulation which handles tied predictions the
+    same way as binning on the unique predictions does. The expression aggregates
+    to a single value, use in a `group_by().agg()` or with `.over()`.
+
+    Parameters
+    ----------
+    groundtruth : Union[str, pl.Expr]
+        The 'true' values, Positive values must be represented as
+        True or 1. Negative values must be represented as False or 0.
+    probs : Union[str, pl.Expr]
+        The predictions
+
+    Returns
+    -------
+    pl.Expr
+        The AUC as a value between 0.5 and 1.
+
+    Examples
+    --------
+    >>> ih.group_by("Channel").agg(
+            AUC=auc_from_probs_polars("Outcome", "Propensity")
+        )
+    """
+    if isinstance(groundtruth, str):
+        groundtruth = pl.col(groundtruth)
+    if isinstance(probs, str):
+        probs = pl.col(probs)
+
+    is_positive = groundtruth.cast(pl.Int8) == 1
+    n_pos = is_positive.sum().cast(pl.Float64)
+    n_neg = (groundtruth.cast(pl.Int8) == 0).sum().cast(pl.Float64)
+    auc = (
+        probs.rank("average").filter(is_positive).sum() - n_pos * (n_pos + 1) / 2
+    ) / (n_pos * n_neg)
+    return (
+        pl.when((n_pos == 0) | (n_neg == 0))
+        .then(0.5)
+        .otherwise(0.5 + (0.5 - auc).abs())
+        .alias("AUC")
+    )
+
+
+def aucpr_from_bincounts_polars(
+    pos: Union[str, pl.Expr] = "BinPositives",
+    neg: Union[str, pl.Expr] = "BinNegatives",
+    probs: Optional[Union[str, pl.Expr]] = None,
+) -> pl.Expr:
+    """Polars expression version of :func:`aucpr_from_bincounts`.
+
+    Calculates the area under the PR (precision-recall) curve from the counts
+    of positives and negatives per bin. The expression aggregates to a single
+    value, so use it in a `group_by().agg()` or with `.over()`, like
+    :func:`auc_from_bincounts_polars`.
+
+    Parameters
+    ----------
+    pos : Union[str, pl.Expr], default = "BinPositives"
+        The column with the counts of the positive responses
+    neg : Union[str, pl.Expr], default = "BinNegatives"
+        The column with the counts of the negative responses
+    probs : Optional[Union[str, pl.Expr]], optional
+        Optional column with probabilities which will be used to set the order
+        of the bins. If missing defaults to pos/(pos+neg).
+
+    Returns
+    -------
+    pl.Expr
+        The PR AUC as a value between 0.0 and 1.
+
+    Examples
+    --------
+    >>> binning.group_by("ModelID", "PredictorName").agg(
+            AUCPR=aucpr_from_bincounts_polars("BinPositives", "BinNegatives")
+        )
+    """
+    if isinstance(pos, str):
+        pos = pl.col(pos)
+    if isinstance(neg, str):
+        neg = pl.col(neg)
+    pos = pos.cast(pl.Float64)
+    neg = neg.cast(pl.Float64)
+
+    order = _bin_order(pos, neg, probs)
+    cum_pos = pos.sort_by(order, descending=True, nulls_last=True).cum_sum()
+    cum_neg = neg.sort_by(order, descending=True, nulls_last=True).cum_sum()
+    recall = cum_pos / pos.sum()
+    precision = cum_pos / (cum_pos + cum_neg)
+    area = (
+        (recall - recall.shift(1, fill_value=0.0))
+        * (precision + precision.shift(1, fill_value=0.0))
+        / 2
+    )
+    # Like aucpr_from_bincounts, the segment up to the first bin is not counted
+    return area.slice(1).sum().alias("AUCPR")
+
+
 def auc_to_gini(auc: float) -> float:
     """
     Convert AUC performance metric to GINI
@@ -813,32 +1037,68 @@ def overlap_matrix(
     └───────────────────┴───────────────┴───────────────┴─────────┘
     """
     list_col = df[list_col]
-    nrows = list_col.len()
-    result = []
-    for i in range(nrows):
-        set_i = set(list_col[i].to_list())
-        if show_fraction:
-            overlap_w_other_rows = [
-                (
-                    len(set_i & set(list_col[j].to_list()))
-                    / len(set(list_col[j].to_list()))
-                    if i != j
-                    else None
-                )
-                for j in range(nrows)
-            ]
-        else:
-            overlap_w_other_rows = [
-                len(set_i & set(list_col[j].to_list())) for j in range(nrows)
-            ]
-        result.append(
-            pl.Series(
-                name=f"Overlap_{list_col.name}_{df[by][i]}", values=overlap_w_other_rows
-            )
-        )
+    counts = _overlap_counts(list_col)
+    if show_fraction:
+        sizes = list_col.list.unique().list.len()
+        counts = [(c / sizes).scatter(i, None) for i, c in enumerate(counts)]
+    result = [
+        c.alias(f"Overlap_{list_col.name}_{name}") for c, name in zip(counts, df[by])
+    ]
     return pl.DataFrame(result).with_columns(pl.Series(df[by]))
 
 
+def _list_membership(col: pl.Series) -> pl.DataFrame:
+    """Explodes a list column into its unique (row, item) pairs, with the items
+    encoded as integers."""
+    members = (
+        pl.DataFrame({"item": col})
+        .with_row_index("row")
+        .filter(pl.col("item").list.len() > 0)
+        .with_columns(pl.col("item").list.unique())
+        .explode("item")
+    )
+    codes = members.select(pl.col("item").unique()).with_row_index("code")
+    return members.join(codes, on="item", nulls_equal=True).select("row", item="code")
+
+
+def _overlap_counts(col: pl.Series) -> List[pl.Series]:
+    """Calculates the size of the intersection of every pair of lists in a column.
+
+    Multiplies the sparse (row x item) incidence matrix with its transpose, so
+    memory grows with the number of list entries rather than with the number of
+    lists times the number of distinct items. When most lists share most items,
+    a dense product over blocks of items is much faster and is used instead.
+    Returns one Series per list, with its intersection sizes with all lists.
+    """
+    import numpy as np
+
+    try:
+        from scipy import sparse
+    except ImportError:  # pragma: no cover
+        raise MissingDependenciesException(["scipy"], "overlap_matrix", "adm")
+
+    n = col.len()
+    members = _list_membership(col)
+    # Without any items (e.g. only empty lists) nothing overlaps
+    n_items = 0 if members.is_empty() else members["item"].max() + 1
+    incidence = sparse.csc_matrix(
+        (
+            np.ones(members.height, dtype=np.float32),
+            (members["row"].to_numpy(), members["item"].to_numpy()),
+        ),
+        shape=(n, n_items),
+    )
+    if members.height < 0.05 * n * n_items:
+        counts = (incidence @ incidence.T).toarray()
+    else:
+        counts = np.zeros((n, n), dtype=np.float32)
+        block = max(1, 2**22 // max(n, 1))
+        for start in range(0, n_items, block):
+            dense = incidence[:, start : start + block].toarray()
+            counts += dense @ dense.T
+    return [pl.Series(np.rint(counts[i]).astype(np.int64)) for i in range(n)]
+
+
 def overlap_lists_polars(col: pl.Series) -> pl.Series:
     """Calculate the average overlap ratio of each list element with all other list elements into a single Series.
 
@@ -892,21 +1152,26 @@ def overlap_lists_polars(col: pl.Series) -> pl.Series:
     │ Email   │ 0.25    │
     └─────────┴─────────┘
     """
+    # The summed intersection of a list with all other lists is the number
+    # of other lists each of its items appears in, summed over its items
     nrows = col.len()
-    average_overlap = []
-    for i in range(nrows):
-        set_i = set(col[i].to_list())
-        overlap_w_other_rows = [
-            len(set_i & set(col[j].to_list())) for j in range(nrows) if i != j
-        ]
-        if len(overlap_w_other_rows) > 0 and len(set_i) > 0:
-            average_overlap += [
-                sum(overlap_w_other_rows) / len(overlap_w_other_rows) / len(set_i)
-            ]
-        else:
-            average_overlap += [0.0]
-
-    return pl.Series(average_overlap)  # ,dtype=pl.List(inner=pl.Float64))
+    overlap = (
+        _list_membership(col)
+        .with_columns(shared=pl.len().over("item") - 1)
+        .group_by("row")
+        .agg(pl.col("shared").sum(), size=pl.len())
+    )
+    average_overlap = (
+        pl.DataFrame({"row": pl.arange(nrows, eager=True, dtype=pl.UInt32)})
+        .join(overlap, on="row", how="left")
+        .select(
+            pl.when(nrows > 1, pl.col("size") > 0)
+            .then(pl.col("shared") / (nrows - 1) / pl.col("size"))
+            .otherwise(0.0)
+        )
+        .to_series()
+    )
+    return average_overlap.alias("")
 
 
 # TODO all these should perhaps be consistently named _polars
@@ -7,12 +7,17 @@ import logging
 import re
 import shutil
 import subprocess
+import threading
+import time
 import traceback
+from contextlib import closing
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Literal, Optional, Tuple
+from typing import Dict, List, Literal, Optional, Tuple, Union
 
 import polars as pl
 
+from ..utils.namespaces import MissingDependenciesException
 from ..utils.types import QUERY
 
 # Re-export RAG functions from metric_limits for convenience in Quarto reports.
@@ -33,6 +38,8 @@ from .metric_limits import MetricFormats, MetricLimits  # noqa: F401
 
 logger = logging.getLogger(__name__)
 
+EXCEL_ROW_LIMIT = 1048576
+
 
 def get_output_filename(
     name: Optional[str],  # going to be the full file name
@@ -146,6 +153,7 @@ def run_quarto(
     verbose: bool = False,
     *,
     size_reduction_method: Optional[Literal["strip", "cdn"]] = None,
+    executor: Optional["ReportExecutor"] = None,
 ) -> int:
     """Run the Quarto command to generate the report.
 
@@ -171,6 +179,9 @@ def run_quarto(
         When None will fully embed all resources into the HTML output.
         When "cdn" will pass this on to Quarto and Plotly so Javascript libraries will be loaded from the internet.
         When "strip" the HTML will be post-processed to remove duplicate Javascript that would otherwise get embedded multiple times.
+    executor : ReportExecutor, optional
+        When given, the document is executed in the warm kernel of the executor
+        and Quarto is only used to render the executed notebook.
 
     Returns
     -------
@@ -187,6 +198,19 @@ def run_quarto(
         If required files are not found
     """
 
+    if executor is not None:
+        return executor.render(
+            qmd_file=qmd_file,
+            output_filename=output_filename,
+            output_type=output_type,
+            params=params,
+            project=project,
+            analysis=analysis,
+            temp_dir=temp_dir,
+            verbose=verbose,
+            size_reduction_method=size_reduction_method,
+        )
+
     def get_command() -> List[str]:
         quarto_exec, _ = get_quarto_with_version(verbose)
         _command = [str(quarto_exec), "render"]
@@ -215,6 +239,32 @@ def run_quarto(
     # render file or render project with options
     command = get_command()
 
+    return_code = _run_quarto_command(command, temp_dir, verbose)
+
+    # Post-process HTML files to deduplicate JavaScript libraries
+    if output_type == "html" and size_reduction_method == "strip":
+        _strip_duplicate_scripts(temp_dir, output_filename, verbose)
+
+    return return_code
+
+
+def _run_quarto_command(command: List[str], temp_dir: Path, verbose: bool) -> int:
+    """Run a Quarto command in `temp_dir`, raising when it fails.
+
+    Parameters
+    ----------
+    command : List[str]
+        The full Quarto command line
+    temp_dir : Path
+        The working directory to run Quarto in
+    verbose : bool
+        Whether to print the output of Quarto
+
+    Returns
+    -------
+    int
+        Return code from the Quarto process (0 for success)
+    """
     if verbose:
         print(f"Executing: {' '.join(command)} in temp directory {temp_dir}")
 
@@ -260,26 +310,335 @@ def run_quarto(
             f"Quarto rendering failed with return code {return_code}.\n"
             f"Output:\n{captured_output}"
         )
+    return return_code
 
-    # Post-process HTML files to deduplicate JavaScript libraries
-    if (
-        return_code == 0
-        and output_type == "html"
-        and size_reduction_method == "strip"
-        and output_filename is not None
-    ):
+
+def _strip_duplicate_scripts(
+    temp_dir: Path, output_filename: Optional[str], verbose: bool
+) -> None:
+    """Remove duplicate Javascript from a rendered HTML report, in place."""
+    if output_filename is None:
+        return
+    try:
+        html_file_path = temp_dir / output_filename
+        if html_file_path.exists():
+            html_content = html_file_path.read_text(encoding="utf-8")
+            deduplicated_content = remove_duplicate_html_scripts(html_content, verbose)
+            html_file_path.write_text(deduplicated_content, encoding="utf-8")
+    except Exception as e:
+        logger.warning(f"HTML post-processing failed: {e}")
+
+
+def qmd_to_notebook(qmd: str):
+    """Convert the text of a Quarto document to a Jupyter notebook.
+
+    The YAML front matter becomes a raw cell, every ``{python}`` chunk a code
+    cell (keeping its ``#|`` options) and everything in between markdown.
+    This covers the documents shipped with pdstools, it is not meant as a
+    full replacement for ``quarto convert``.
+
+    Parameters
+    ----------
+    qmd : str
+        The content of the .qmd file
+
+    Returns
+    -------
+    nbformat.NotebookNode
+        The (unexecuted) notebook
+    """
+    import nbformat
+
+    nb = nbformat.v4.new_notebook()
+    lines = qmd.splitlines()
+    if lines and lines[0].strip() == "---":
+        end = next(i for i in range(1, len(lines)) if lines[i].strip() == "---")
+        nb.cells.append(nbformat.v4.new_raw_cell("\n".join(lines[: end + 1])))
+        lines = lines[end + 1 :]
+
+    def flush(block: List[str]):
+        text = "\n".join(block).strip("\n")
+        if text.strip():
+            nb.cells.append(nbformat.v4.new_markdown_cell(text))
+
+    block: List[str] = []
+    in_code = False
+    for line in lines:
+        if not in_code and re.match(r"^```\s*\{python[^}]*\}\s*$", line):
+            flush(block)
+            block, in_code = [], True
+        elif in_code and line.strip() == "```":
+            nb.cells.append(nbformat.v4.new_code_cell("\n".join(block)))
+            block, in_code = [], False
+        else:
+            block.append(line)
+    flush(block)
+    return nb
+
+
+def inject_parameters(nb, params: Dict) -> None:
+    """Add a cell with the report parameters after the ``parameters`` cell.
+
+    Mirrors what Quarto does for ``--execute-params``: the values are
+    assigned in a new cell, right after the cell tagged with ``parameters``,
+    so they override the defaults in the document.
+
+    Parameters
+    ----------
+    nb : nbformat.NotebookNode
+        The notebook to parameterize, modified in place
+    params : dict
+        The parameter names and values
+    """
+    import nbformat
+
+    def is_parameters_cell(cell) -> bool:
+        if "parameters" in cell.get("metadata", {}).get("tags", []):
+            return True
+        return bool(
+            re.search(r"^#\s*\|\s*tags:.*\bparameters\b", cell.source, re.MULTILINE)
+        )
+
+    position = next(
+        (
+            i + 1
+            for i, cell in enumerate(nb.cells)
+            if cell.cell_type == "code" and is_parameters_cell(cell)
+        ),
+        # Without a parameters cell, parameters go before the first code cell
+        next(
+            (i for i, cell in enumerate(nb.cells) if cell.cell_type == "code"),
+            len(nb.cells),
+        ),
+    )
+    source = "\n".join(f"{name} = {value!r}" for name, value in params.items())
+    cell = nbformat.v4.new_code_cell(source)
+    cell.metadata["tags"] = ["injected-parameters"]
+    nb.cells.insert(position, cell)
+
+
+@dataclass
+class ReportTiming:
+    """Time spent on a single report rendered by a `ReportExecutor`, in seconds.
+
+    `startup` covers starting the kernel (only for the first report) and
+    preparing the notebook, `compute` the execution of the notebook and
+    `render` the conversion to the output format by Quarto.
+    """
+
+    report: str
+    startup: float = 0.0
+    compute: float = 0.0
+    render: float = 0.0
+
+    @property
+    def total(self) -> float:
+        return self.startup + self.compute + self.render
+
+
+class ReportExecutor:
+    """Renders reports using one Python kernel that stays alive across reports.
+
+    `run_quarto` lets Quarto start a fresh kernel for every report, which
+    means paying for the kernel startup and for importing pdstools, polars
+    and plotly each time. With an executor, the notebook is executed in a
+    kernel that is kept warm between reports and Quarto is only used to turn
+    the executed notebook into the final document.
+
+    The namespace of the kernel is reset before every report, so no
+    variables leak from one report into the next. Imported modules are
+    kept, which is where most of the time is saved.
+
+    Parameters
+    ----------
+    kernel_name : str, default="python3"
+        The Jupyter kernel to execute the reports with
+    timeout : int, optional
+        The maximum time in seconds a single cell may take, no limit by default
+
+    Examples
+    --------
+    >>> with ReportExecutor() as executor:
+    >>>     datamart.generate.model_reports(model_ids, executor=executor)
+    >>>     datamart.generate.health_check(executor=executor)
+    >>> print(executor.timings_summary())
+    """
+
+    def __init__(self, kernel_name: str = "python3", timeout: Optional[int] = None):
+        self.kernel_name = kernel_name
+        self.timeout = timeout
+        self.timings: List[ReportTiming] = []
+        self._km = None
+        self._kc = None
+        # A kernel executes one notebook at a time
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "ReportExecutor":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _start_kernel(self) -> None:
         try:
-            html_file_path = temp_dir / output_filename
-            if html_file_path.exists():
-                html_content = html_file_path.read_text(encoding="utf-8")
-                deduplicated_content = remove_duplicate_html_scripts(
-                    html_content, verbose
-                )
-                html_file_path.write_text(deduplicated_content, encoding="utf-8")
-        except Exception as e:
-            logger.warning(f"HTML post-processing failed: {e}")
+            from jupyter_client.manager import start_new_kernel
+        except ImportError:  # pragma: no cover
+            raise MissingDependenciesException(
+                ["jupyter_client", "nbclient", "nbformat"],
+                "ReportExecutor",
+                "healthcheck",
+            )
+        env = os.environ.copy()
+        env.setdefault("PYDEVD_DISABLE_FILE_VALIDATION", "1")
+        self._km, self._kc = start_new_kernel(kernel_name=self.kernel_name, env=env)
+
+    def execute(self, nb, cwd: Path):
+        """Execute a notebook in the warm kernel, with `cwd` as working directory.
+
+        Parameters
+        ----------
+        nb : nbformat.NotebookNode
+            The notebook to execute, modified in place
+        cwd : Path
+            The working directory for the code in the notebook
+
+        Returns
+        -------
+        nbformat.NotebookNode
+            The executed notebook
+        """
+        import nbformat
+        from nbclient import NotebookClient
+
+        if self._km is None:
+            self._start_kernel()
+        # Start every report with a clean namespace in the right directory,
+        # this cell is removed again from the executed notebook
+        reset = nbformat.v4.new_code_cell(
+            "get_ipython().run_line_magic('reset', '-f')\n"
+            f"import os as _os; _os.chdir({str(Path(cwd).resolve())!r}); del _os"
+        )
+        nb.cells.insert(0, reset)
+        client = NotebookClient(
+            nb,
+            km=self._km,
+            kc=self._kc,
+            timeout=self.timeout,
+            kernel_name=self.kernel_name,
+            resources={"metadata": {"path": str(cwd)}},
+        )
+        try:
+            client.execute()
+        finally:
+            nb.cells.remove(reset)
+        return nb
+
+    def render(
+        self,
+        qmd_file: Optional[str],
+        output_filename: Optional[str] = None,
+        output_type: Optional[str] = "html",
+        params: Optional[Dict] = None,
+        project: Dict = {"type": "default"},
+        analysis: Optional[Dict] = None,
+        temp_dir: Path = Path("."),
+        verbose: bool = False,
+        *,
+        size_reduction_method: Optional[Literal["strip", "cdn"]] = None,
+    ) -> int:
+        """Execute a Quarto document in the warm kernel, then render it with Quarto.
+
+        Takes the same arguments as `run_quarto`, so it can be used as a
+        drop-in replacement. The timing of every report is added to
+        `timings`.
+
+        Returns
+        -------
+        int
+            Return code from the Quarto process (0 for success)
+        """
+        import nbformat
+
+        if qmd_file is None:
+            raise ValueError("ReportExecutor can only render a single qmd_file")
+        timing = ReportTiming(report=output_filename or qmd_file)
+        with self._lock:
+            start = time.perf_counter()
+            if self._km is None:
+                self._start_kernel()
+            _write_params_files(
+                temp_dir,
+                params=params,
+                project=project,
+                analysis=analysis,
+                size_reduction_method=size_reduction_method,
+            )
+            nb = qmd_to_notebook((temp_dir / qmd_file).read_text(encoding="utf-8"))
+            if params is not None:
+                inject_parameters(nb, params)
+            timing.startup = time.perf_counter() - start
+
+            start = time.perf_counter()
+            try:
+                self.execute(nb, temp_dir)
+            except Exception as e:
+                raise RuntimeError(f"Executing {qmd_file} failed:\n{e}") from e
+            timing.compute = time.perf_counter() - start
+
+        start = time.perf_counter()
+        notebook_file = Path(qmd_file).with_suffix(".ipynb").name
+        nbformat.write(nb, temp_dir / notebook_file)
+        quarto_exec, _ = get_quarto_with_version(verbose)
+        command = [str(quarto_exec), "render", notebook_file, "--no-execute"]
+        command.extend(
+            _set_command_options(
+                output_type=output_type, output_filename=output_filename
+            )
+        )
+        return_code = _run_quarto_command(command, temp_dir, verbose)
+        if output_type == "html" and size_reduction_method == "strip":
+            _strip_duplicate_scripts(temp_dir, output_filename, verbose)
+        timing.render = time.perf_counter() - start
+
+        self.timings.append(timing)
+        logger.info(
+            f"Rendered {timing.report} in {timing.total:.2f}s (startup "
+            f"{timing.startup:.2f}s, compute {timing.compute:.2f}s, "
+            f"render {timing.render:.2f}s)"
+        )
+        return return_code
+
+    def timings_summary(self) -> pl.DataFrame:
+        """The time spent per report, broken down in startup, compute and render."""
+        return pl.DataFrame(
+            [
+                {
+                    "Report": t.report,
+                    "Startup": t.startup,
+                    "Compute": t.compute,
+                    "Render": t.render,
+                    "Total": t.total,
+                }
+                for t in self.timings
+            ],
+            schema={
+                "Report": pl.Utf8,
+                "Startup": pl.Float64,
+                "Compute": pl.Float64,
+                "Render": pl.Float64,
+                "Total": pl.Float64,
+            },
+        )
 
-    return return_code
+    def close(self) -> None:
+        """Shut down the kernel. The executor can still be used afterwards,
+        it will start a new kernel when needed."""
+        if self._kc is not None:
+            self._kc.stop_channels()
+            self._kc = None
+        if self._km is not None:
+            self._km.shutdown_kernel(now=True)
+            self._km = None
 
 
 def _set_command_options(
@@ -984,6 +1343,253 @@ def deserialize_query(serialized_query: Optional[Dict]) -> Optional[QUERY]:
     raise ValueError(f"Unknown query type: {serialized_query['type']}")
 
 
+def health_check_last_data(datamart) -> pl.LazyFrame:
+    """The last snapshot of every model, as used throughout the Health Check.
+
+    Parameters
+    ----------
+    datamart : ADMDatamart
+        The datamart to take the last snapshots from
+
+    Returns
+    -------
+    pl.LazyFrame
+        The last snapshots with categoricals as strings and missing values filled in
+    """
+    return (
+        datamart.aggregates.last()
+        .with_columns(pl.col(pl.Categorical).cast(pl.Utf8))
+        .with_columns(
+            [
+                pl.col(pl.Utf8).fill_null("NA"),
+                pl.col(pl.Null).fill_null("NA"),
+                pl.col("SuccessRate").fill_nan(0).fill_null(0),
+                pl.col("Performance").fill_nan(0).fill_null(0),
+                pl.col("ResponseCount").fill_null(0),
+                (pl.concat_str("Channel/Direction".split("/"), separator="/")).alias(
+                    "Channel/Direction"
+                ),
+            ]
+        )
+    )
+
+
+def health_check_active_models_filter(threshold_updated_days: int) -> pl.Expr:
+    """Filter on the models that were updated in the last `threshold_updated_days`
+    days of the data. Models without an update time are considered active."""
+    threshold_date = pl.col("LastUpdate").max() - datetime.timedelta(
+        days=threshold_updated_days
+    )
+    return (pl.col("LastUpdate") > threshold_date).fill_null(True)
+
+
+def health_check_excluded_filter(excluded: pl.DataFrame, on: List[str]) -> pl.Expr:
+    """Filter out the rows of which the `on` columns match a row in `excluded`.
+
+    Like an anti-join with `excluded`, rows with a null in any of the `on`
+    columns are kept."""
+    key = pl.concat_str(on, separator="/")
+    excluded_keys = excluded.select(key).to_series().to_list()
+    return key.is_in(excluded_keys).fill_null(False).not_()
+
+
+def write_health_check_bundle(
+    tables: Dict[str, pl.DataFrame], path: Union[str, os.PathLike]
+) -> Path:
+    """Write precomputed Health Check tables to a single parquet file.
+
+    Every table is stored as one row, with its name in ``Table`` and the
+    table itself serialized as Arrow IPC in ``Data``.
+
+    Parameters
+    ----------
+    tables : Dict[str, pl.DataFrame]
+        The tables by name
+    path : Union[str, os.PathLike]
+        The file to write to
+
+    Returns
+    -------
+    Path
+        The path to the bundle
+    """
+
+    def serialize(df: pl.DataFrame) -> bytes:
+        buffer = io.BytesIO()
+        df.write_ipc(buffer, compression="zstd")
+        return buffer.getvalue()
+
+    path = Path(path)
+    pl.DataFrame(
+        {
+            "Table": list(tables.keys()),
+            "Data": [serialize(df) for df in tables.values()],
+        },
+        schema={"Table": pl.Utf8, "Data": pl.Binary},
+    ).write_parquet(path, compression="uncompressed")
+    return path
+
+
+def read_health_check_bundle(
+    path: Optional[Union[str, os.PathLike]],
+    names: Optional[List[str]] = None,
+) -> Dict[str, pl.DataFrame]:
+    """Read the tables written by `write_health_check_bundle`.
+
+    Parameters
+    ----------
+    path : Union[str, os.PathLike], optional
+        The bundle to read. When empty, an empty dictionary is returned so
+        the caller can fall back to computing the tables itself.
+    names : List[str], optional
+        Only read the tables with these names, by default all tables
+
+    Returns
+    -------
+    Dict[str, pl.DataFrame]
+        The tables by name
+    """
+    if not path:
+        return {}
+    bundle = pl.scan_parquet(path)
+    if names is not None:
+        bundle = bundle.filter(pl.col("Table").is_in(names))
+    bundle = bundle.collect()
+    return {
+        name: pl.read_ipc(io.BytesIO(data))
+        for name, data in zip(bundle["Table"], bundle["Data"])
+    }
+
+
+def _iter_batches(data: pl.LazyFrame, batch_size: int):
+    """Yield the result of a query in batches of about `batch_size` rows."""
+    if not hasattr(pl.LazyFrame, "collect_batches"):  # pragma: no cover
+        yield from data.collect().iter_slices(batch_size)
+        return
+    batches = data.collect_batches(chunk_size=batch_size)
+    try:
+        yield from batches
+    finally:
+        # Stop the query when the caller does not need the remaining rows
+        stop = getattr(batches, "stop", None)
+        if stop is not None:
+            stop()
+
+
+def _stringify_nested(batch: pl.DataFrame) -> pl.DataFrame:
+    """Excel has no nested types, so write lists and structs as their string
+    representation, like `pl.DataFrame.write_excel` does."""
+    return batch.with_columns(
+        pl.Series(name, [None if v is None else str(v) for v in batch[name].to_list()])
+        for name, dtype in batch.schema.items()
+        if dtype.is_nested() or dtype == pl.Object
+    )
+
+
+def write_excel_streaming(
+    tabs: Dict[str, pl.LazyFrame],
+    path: Union[str, os.PathLike],
+    *,
+    batch_size: int = 50_000,
+    overflow: Literal["sheets", "parquet", "csv"] = "sheets",
+) -> List[str]:
+    """Write tables to an Excel file without holding them in memory.
+
+    The tables are pulled from their queries in batches and written row by
+    row, with xlsxwriter in constant memory mode, so peak memory depends on
+    `batch_size` rather than on the size of the tables. List and struct
+    columns are written as strings.
+
+    Excel sheets hold at most 1,048,576 rows. Tables that do not fit either
+    continue on extra sheets (``tab_2``, ``tab_3``, ...) or, for `overflow`
+    "parquet" or "csv", keep the rows that fit in the sheet and are written
+    in full to a companion file next to the Excel file.
+
+    Parameters
+    ----------
+    tabs : Dict[str, pl.LazyFrame]
+        The tables to write, by sheet name
+    path : Union[str, os.PathLike]
+        The Excel file to write
+    batch_size : int, default=50_000
+        The number of rows to collect at a time
+    overflow : Literal["sheets", "parquet", "csv"], default="sheets"
+        What to do with tables that do not fit in a single sheet
+
+    Returns
+    -------
+    List[str]
+        Messages about tables that did not fit in a single sheet
+    """
+    from xlsxwriter import Workbook
+
+    path = Path(path)
+    warning_messages: List[str] = []
+    with Workbook(
+        path,
+        options={
+            "constant_memory": True,
+            "nan_inf_to_errors": True,
+            "remove_timezone": True,
+            "default_date_format": "yyyy-mm-dd hh:mm:ss",
+        },
+    ) as wb:
+        # Enable ZIP64 extensions to handle large files
+        wb.use_zip64()
+        header_format = wb.add_format({"bold": True})
+
+        for tab, data in tabs.items():
+            columns = data.collect_schema().names()
+            sheet_count, row, worksheet, overflowed = 0, EXCEL_ROW_LIMIT, None, False
+            with closing(_iter_batches(data, batch_size)) as batches:
+                for batch in batches:
+                    batch = _stringify_nested(batch)
+                    offset = 0
+                    while offset < batch.height:
+                        if row == EXCEL_ROW_LIMIT:
+                            if worksheet is not None and overflow != "sheets":
+                                overflowed = True
+                                break
+                            sheet_count += 1
+                            # Sheet names are limited to 31 characters
+                            suffix = "" if sheet_count == 1 else f"_{sheet_count}"
+                            worksheet = wb.add_worksheet(
+                                tab[: 31 - len(suffix)] + suffix
+                            )
+                            worksheet.write_row(0, 0, columns, header_format)
+                            worksheet.freeze_panes(1, 0)
+                            row = 1
+                        rows = batch.slice(offset, EXCEL_ROW_LIMIT - row).rows()
+                        for values in rows:
+                            worksheet.write_row(row, 0, values)
+                            row += 1
+                        offset += len(rows)
+                    if overflowed:
+                        break
+
+            if worksheet is None:
+                # Keep empty tables visible, with just their header
+                worksheet = wb.add_worksheet(tab[:31])
+                worksheet.write_row(0, 0, columns, header_format)
+            elif sheet_count > 1:
+                warning_messages.append(
+                    f"The data for sheet '{tab}' exceeds Excel's row limit "
+                    f"({EXCEL_ROW_LIMIT:,} rows) and is split over {sheet_count} sheets."
+                )
+            elif overflowed:
+                companion = path.with_name(f"{path.stem}_{tab}.{overflow}")
+                if overflow == "parquet":
+                    data.sink_parquet(companion)
+                else:
+                    data.sink_csv(companion)
+                warning_messages.append(
+                    f"The data for sheet '{tab}' exceeds Excel's row limit "
+                    f"({EXCEL_ROW_LIMIT:,} rows). The sheet only has the first rows, "
+                    f"the full table is written to {companion}."
+                )
+    return warning_messages
+
+
 def remove_duplicate_html_scripts(html_content: str, verbose: bool = False) -> str:
     """Remove duplicate script tags from HTML to reduce file size.
 
@@ -219,6 +219,38 @@ class TestAggregatePredictorValueContributions:
                 context=selected_context,
                 top_k=-1)
 
+class TestAggregateContextStore:
+    """Test cases for reading the per context aggregates."""
+
+    def test_context_index_loaded(self, aggregate):
+        """Test the context index is read and covers all contexts."""
+        aggregate._load_data()
+
+        assert aggregate.context_index is not None
+        assert sorted(aggregate.get_context_partitions()) == sorted(
+            aggregate.df_contextual.select("partition").unique().collect().to_series().to_list()
+        )
+
+    def test_context_lookup_matches_full_scan(self, aggregate, predictors, selected_context):
+        """Test a context lookup from the store gives the same result as scanning all contexts."""
+        from_store = aggregate.get_predictor_value_contributions(
+            predictors=predictors, context=selected_context
+        )
+
+        context_index = aggregate.context_index
+        aggregate.context_index = None
+        try:
+            from_full_scan = aggregate.get_predictor_value_contributions(
+                predictors=predictors, context=selected_context
+            )
+        finally:
+            aggregate.context_index = context_index
+
+        assert from_store.sort(from_store.columns).equals(
+            from_full_scan.sort(from_store.columns)
+        )
+
+
 def assert_df_has_top_n(df, top_n):
     """Assert that the DataFrame has at least top_n rows."""
     assert df.shape[0] >= top_n, f"DataFrame should have at least {top_n} rows, but has {df.shape[0]} rows."
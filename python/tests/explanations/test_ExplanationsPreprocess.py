@@ -70,6 +70,7 @@ def dummy_explanations_data():
 @pytest.fixture
 def dummy_aggregate_data():
     """Fixture to create a dummy aggregate data folder."""
+    shutil.rmtree(".tmp/aggregated_data", ignore_errors=True)
     os.makedirs(".tmp/aggregated_data", exist_ok=True)
     file_path = ".tmp/aggregated_data/dummy_aggregate.parquet"
     with open(file_path, "w", encoding="utf-8") as f:
@@ -124,6 +125,79 @@ class TestAggregatesGenerate:
             Explanations(data_folder="explanations_data")
 
 
+class TestAggregatesStreaming:
+    """Test generating the aggregates without loading the files into memory"""
+
+    def test_generate_streaming(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("STREAMING", "1")
+        monkeypatch.setenv("QUERY_BATCH_LIMIT", "3")
+        explanations = Explanations(
+            root_dir=str(tmp_path),
+            data_folder=f"{basePath}/data/explanations",
+            model_name="AdaptiveBoostCT",
+            from_date=datetime(2025, 3, 28),
+            to_date=datetime(2025, 3, 28),
+        )
+        preprocess = explanations.preprocess
+        assert preprocess.streaming is True
+
+        folder = preprocess.data_folderpath
+        assert (folder / "NUMERIC_OVERALL.parquet").exists()
+        assert (folder / "SYMBOLIC_OVERALL.parquet").exists()
+        context_folders = list((folder / "contexts").iterdir())
+        assert len(context_folders) == len(preprocess.context_ids)
+        assert all(
+            (context_folder / "SYMBOLIC.parquet").exists()
+            for context_folder in context_folders
+        )
+
+        df = explanations.aggregate.get_predictor_contributions()
+        assert df.shape[0] > 0
+
+
+class TestAggregatesIncremental:
+    """Test generating the aggregates from daily partial aggregates"""
+
+    def test_generate_incremental(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("INCREMENTAL", "1")
+        explanations = Explanations(
+            root_dir=str(tmp_path),
+            data_folder=f"{basePath}/data/explanations",
+            model_name="AdaptiveBoostCT",
+            from_date=datetime(2025, 3, 28),
+            to_date=datetime(2025, 3, 28),
+        )
+        preprocess = explanations.preprocess
+        assert preprocess.incremental is True
+
+        partials_folder = preprocess.partials_folderpath / "date=20250328"
+        for partial_name in ["CONTEXTS", "NUMERIC", "SYMBOLIC"]:
+            assert (partials_folder / f"{partial_name}.parquet").exists()
+        assert (preprocess.data_folderpath / "NUMERIC_OVERALL.parquet").exists()
+
+        df = explanations.aggregate.get_predictor_contributions()
+        assert df.shape[0] > 0
+
+    def test_partials_reused_for_new_date_range(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("INCREMENTAL", "1")
+        kwargs = dict(
+            root_dir=str(tmp_path),
+            data_folder=f"{basePath}/data/explanations",
+            model_name="AdaptiveBoostCT",
+            to_date=datetime(2025, 3, 28),
+        )
+        explanations = Explanations(from_date=datetime(2025, 3, 28), **kwargs)
+        partial_file = (
+            explanations.preprocess.partials_folderpath / "date=20250328" / "NUMERIC.parquet"
+        )
+        mtime = partial_file.stat().st_mtime
+
+        explanations = Explanations(from_date=datetime(2025, 3, 27), **kwargs)
+        assert partial_file.stat().st_mtime == mtime
+        with open(explanations.preprocess.aggregates_info_filename) as f:
+            assert '"from_date": "20250327"' in f.read()
+
+
 class TestAggregatesQueryOperations:
     """Test query execution and database operations"""
 
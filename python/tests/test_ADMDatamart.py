@@ -7,7 +7,7 @@ import pathlib
 
 import polars as pl
 import pytest
-from pdstools import ADMDatamart
+from pdstools import ADMDatamart, pega_io
 
 basePath = pathlib.Path(__file__).parent.parent.parent
 
@@ -60,6 +60,67 @@ def test_init_without_model_data(sample: ADMDatamart):
     os.remove(predictordata_cache)
 
 
+@pytest.mark.parametrize("mode", ["memory", "ipc"])
+def test_materialize(sample: ADMDatamart, mode, tmp_path):
+    model_data = sample.model_data.collect()
+    predictor_data = sample.predictor_data.collect()
+
+    assert sample.materialize(mode=mode, cache_dir=tmp_path) is sample
+    assert sample.model_data.collect().equals(model_data)
+    assert sample.predictor_data.collect().equals(predictor_data)
+    assert sample.combined_data.collect().height > 0
+    if mode == "ipc":
+        assert {f.name for f in tmp_path.iterdir()} == {
+            "model_data.arrow",
+            "predictor_data.arrow",
+        }
+        sample.materialize(mode=mode, cache_dir=tmp_path)
+        assert sample.model_data.collect().equals(model_data)
+
+    with pytest.raises(ValueError):
+        sample.materialize(mode="disk")
+
+
+@pytest.mark.parametrize("mode", ["memory", "ipc"])
+def test_materialize_on_init(sample: ADMDatamart, mode):
+    dm = ADMDatamart(
+        model_df=pega_io.read_ds_export(
+            "Data-Decision-ADM-ModelSnapshot_pyModelSnapshots_20210526T131808_GMT.zip",
+            f"{basePath}/data",
+        ),
+        materialize=mode,
+    )
+    assert dm.model_data.collect().equals(sample.model_data.collect())
+    assert dm.unique_channels == sample.unique_channels
+    if mode == "ipc":
+        # The source is spilled to disk too, rather than collected in memory
+        assert (dm._materialize_dir / "source_model_data.arrow").exists()
+
+
+def test_filter(sample: ADMDatamart):
+    web = sample.filter(pl.col("Channel") == "Web")
+    assert web is not sample
+    assert web.unique_channels == {"Web"}
+    assert sample.unique_channels == {"Email", "SMS", "Web"}
+
+    models = web.model_data.select(pl.col("ModelID").unique()).collect()["ModelID"]
+    predictor_models = web.predictor_data.select(pl.col("ModelID").unique()).collect()
+    assert set(predictor_models["ModelID"]) <= set(models)
+    assert (
+        web.combined_data.select(pl.col("Channel").unique()).collect().item() == "Web"
+    )
+    assert (
+        web.aggregates.last().collect().height
+        < sample.aggregates.last().collect().height
+    )
+
+    inbound = web.filter({"Direction": ["Inbound"]})
+    assert inbound.unique_channel_direction == {"Web/Inbound"}
+
+    with pytest.raises(ValueError):
+        sample.filter(pl.col("Channel") == "Carrier pigeon")
+
+
 def test_active_range_Pega7():
     # In this test data, the datamart is often wrong. This data pre-dates (and inspired) the fixes to the calculations in Pega.
     test_data_mdls = f"{basePath}/data/active_range/dmModels.csv.gz"
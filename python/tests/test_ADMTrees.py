@@ -66,3 +66,92 @@ def test_plotContributionPerTree(tree_sample, sampledX):
 @pytest.mark.skip(reason="Test disabled - needs investigation")
 def test_plotSplitsPerVariableType(tree_sample):
     tree_sample.plot_splits_per_variable_type()
+
+
+def test_score_batch(tree_sample: ADMTreesModel):
+    import polars as pl
+
+    xs = [sample_x(tree_sample) for _ in range(25)]
+    scores = tree_sample.score_batch(pl.DataFrame(xs))
+    assert scores.len() == 25
+    assert scores.to_list() == pytest.approx([tree_sample.score(x) for x in xs])
+
+
+def test_score_batch_missing_predictor(tree_sample: ADMTreesModel):
+    import polars as pl
+
+    with pytest.raises(ValueError):
+        tree_sample.score_batch(pl.DataFrame({"NotAPredictor": [1]}))
+
+
+def _encoded_agb_model(score: float) -> str:
+    import base64
+    import json
+    import zlib
+
+    model = {
+        "_serialClass": "com.pega.decision.adm.client.GbModel",
+        "configuration": {"parameters": {"learningRateEta": 0.3}, "contextKeys": []},
+        "model": {
+            "boosters": [
+                {
+                    "trees": [
+                        {
+                            "score": 0.0,
+                            "gain": 1.0,
+                            "split": "0 LT 2",
+                            "left": {"score": score},
+                            "right": {"score": -score},
+                        }
+                    ]
+                }
+            ],
+            "inputsEncoder": {
+                "encoders": [
+                    {
+                        "key": "Age",
+                        "value": {
+                            "index": 0,
+                            "encoder": {
+                                "quantileArray": {
+                                    "summaryType": "INITIAL_SUMMARY",
+                                    "summary": {"initialValues": [10, 20, 30]},
+                                }
+                            },
+                        },
+                    }
+                ]
+            },
+        },
+    }
+    return base64.b64encode(zlib.compress(json.dumps(model).encode())).decode()
+
+
+def test_get_multi_trees_streaming(tmp_path):
+    from datetime import datetime
+
+    import polars as pl
+    from pdstools.adm.ADMTrees import MultiTrees
+
+    df = pl.DataFrame(
+        {
+            "Configuration": ["AGB", "AGB", "AGB", "Other"],
+            "SnapshotTime": [datetime(2024, 1, day) for day in (1, 2, 3, 1)],
+            "Modeldata": [_encoded_agb_model(s) for s in (0.1, 0.1, 0.2, 0.1)],
+        }
+    )
+    cache_dir = tmp_path / "agb"
+    out = ADMTrees.get_multi_trees(df, verbose=False, cache_dir=cache_dir)
+    assert set(out) == {"AGB", "Other"}
+    assert isinstance(out["AGB"], MultiTrees)
+    assert len(out["AGB"]) == 3
+    first, second, third = out["AGB"].trees.values()
+    assert first is second
+    assert first is out["Other"][0][1]
+    assert first.model[0]["split"] == "Age < 30"
+    assert third.model[0]["left"]["score"] == 0.2
+    assert len(list(cache_dir.glob("*.json"))) == 2
+
+    cached = ADMTrees.get_multi_trees(df, verbose=False, cache_dir=cache_dir)
+    assert cached["AGB"].trees.keys() == out["AGB"].trees.keys()
+    assert cached["AGB"][2][1].model == third.model
@@ -7,6 +7,7 @@ from datetime import date, datetime, timedelta
 
 import polars as pl
 import pytest
+from polars.testing import assert_frame_equal
 from pdstools import ADMDatamart
 from pdstools.adm.Aggregates import Aggregates
 
@@ -606,3 +607,38 @@ def test_new_actions_issue_455():
     assert agg["Actions"].item() == 5
     assert agg["Used Actions"].item() == 5
     assert agg["New Actions"].item() == 5
+
+
+def test_compute_many(dm_aggregates):
+    summaries = dm_aggregates.compute_many(
+        {
+            "channels": "summary_by_channel",
+            "trend": ("overall_summary", {"every": "1w"}),
+            "configurations": "summary_by_configuration",
+            "predictors": "predictors_global_overview",
+        }
+    )
+    assert list(summaries) == ["channels", "trend", "configurations", "predictors"]
+    assert_frame_equal(
+        summaries["channels"], dm_aggregates.summary_by_channel().collect()
+    )
+    assert_frame_equal(
+        summaries["trend"], dm_aggregates.overall_summary(every="1w").collect()
+    )
+    assert_frame_equal(
+        summaries["predictors"],
+        dm_aggregates.predictors_global_overview().collect(),
+    )
+
+    assert list(dm_aggregates.compute_many(["last"])) == ["last"]
+    with pytest.raises(ValueError, match="Can not compute"):
+        dm_aggregates.compute_many(["predictor_performance_pivot"])
+
+
+def test_compute_many_without_predictors():
+    datamart = ADMDatamart(model_df=modeldata_from_scratch(Name=["A", "B"]))
+    summaries = datamart.aggregates.compute_many(
+        ["summary_by_configuration", "predictors_overview"]
+    )
+    assert summaries["summary_by_configuration"].height > 0
+    assert summaries["predictors_overview"] is None
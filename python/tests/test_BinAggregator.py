@@ -169,6 +169,91 @@ def test_combine_two_numbinnings(cdhsample_binaggregator):
     assert combined["BinCoverage"].to_list() == pytest.approx([1, 1, 1, 0.66667], 1e-5)
 
 
+def test_combine_numbinnings(cdhsample_binaggregator):
+    target = cdhsample_binaggregator.create_empty_numbinning(
+        "Customer.Age", 4, minimum=20, maximum=80
+    )
+    source = pl.DataFrame(
+        {
+            "ModelID": [1] * 3,
+            "PredictorName": ["Customer.Age"] * 3,
+            "BinIndex": [1, 2, 3],
+            "BinLowerBound": [10.0, 25.0, 50.0],
+            "BinUpperBound": [25.0, 50.0, 75.0],
+            "Lift": [0.4, -0.1, 2.0],
+            "BinResponses": [100, 1000, 400],
+        }
+    )
+    combined = cdhsample_binaggregator.combine_numbinnings(source, target, n_models=1)
+    expected = cdhsample_binaggregator.combine_two_numbinnings(source, target)
+    assert combined["Lift"].to_list() == pytest.approx(expected["Lift"].to_list())
+    assert combined["BinCoverage"].to_list() == pytest.approx(
+        expected["BinCoverage"].to_list()
+    )
+    assert combined["BinResponses"].to_list() == pytest.approx(
+        expected["BinResponses"].to_list()
+    )
+
+    # Zero-width and inverted (clamped) source bins do not overlap anything
+    degenerate = pl.DataFrame(
+        {
+            "ModelID": [1] * 4,
+            "PredictorName": ["Customer.Age"] * 4,
+            "BinIndex": [1, 2, 3, 4],
+            "BinLowerBound": [10.0, 30.0, 30.0, 78.0],
+            "BinUpperBound": [30.0, 30.0, 75.0, 76.0],
+            "Lift": [0.4, 1.5, 2.0, -1.0],
+            "BinResponses": [100, 50, 400, 20],
+        }
+    )
+    combined = cdhsample_binaggregator.combine_numbinnings(
+        degenerate, target, n_models=1
+    )
+    expected = cdhsample_binaggregator.combine_two_numbinnings(degenerate, target)
+    for col in ["Lift", "BinCoverage", "BinResponses"]:
+        assert not combined[col].is_nan().any()
+        assert combined[col].to_list() == pytest.approx(expected[col].to_list())
+
+
+def test_vectorized_num_rollup(cdhsample_binaggregator):
+    iterative = cdhsample_binaggregator.roll_up(
+        "Customer.AnnualIncome", aggregation="Configuration", return_df=True
+    )
+    vectorized = cdhsample_binaggregator.roll_up(
+        "Customer.AnnualIncome",
+        aggregation="Configuration",
+        method="vectorized",
+        return_df=True,
+    )
+    assert vectorized.columns == iterative.columns
+    for col in ["Lift", "BinResponses", "BinCoverage", "Models"]:
+        assert vectorized[col].to_list() == pytest.approx(iterative[col].to_list())
+
+    with pytest.raises(ValueError):
+        cdhsample_binaggregator.roll_up("Customer.AnnualIncome", method="unknown")
+
+
+def test_roll_up_many(cdhsample_binaggregator):
+    predictors = ["Customer.AnnualIncome", "Customer.MaritalStatus", "Customer.Age"]
+    single = cdhsample_binaggregator.roll_up(
+        predictors, aggregation="Configuration", return_df=True
+    )
+    batch = cdhsample_binaggregator.roll_up_many(
+        predictors, aggregation="Configuration", max_workers=2
+    )
+    assert batch.columns == single.columns
+    assert batch["PredictorName"].unique(maintain_order=True).to_list() == predictors
+    # Symbols with equal lift may be ordered differently, so compare by symbol
+    key = ["PredictorName", "Configuration", "BinSymbol"]
+    single = single.sort(key)
+    batch = batch.sort(key)
+    for col in ["Lift", "BinResponses", "BinCoverage", "Models"]:
+        assert batch[col].to_list() == pytest.approx(single[col].to_list())
+
+    with pytest.raises(ValueError):
+        cdhsample_binaggregator.roll_up_many(["Customer.Age", "NotAPredictor"])
+
+
 @pytest.mark.skip(
     reason="query argument to binaggregator currently no longer supported"
 )
@@ -250,3 +335,26 @@ def test_verbose_mode(cdhsample_binaggregator: BinAggregator, capsys):
 # then test a roll up over Group
 
 # and a roll up over Group and two predictors
+
+
+def test_roll_up_many_degenerate_bins(cdhsample_binaggregator):
+    # A zero-width bin, like a NON-MISSING bin of a predictor with one value
+    cdhsample_binaggregator.all_predictorbinning = (
+        cdhsample_binaggregator.all_predictorbinning.with_columns(
+            BinUpperBound=pl.when(
+                (pl.col("PredictorName") == "Customer.AnnualIncome")
+                & (pl.col("BinIndex") == 2)
+            )
+            .then(pl.col("BinLowerBound"))
+            .otherwise(pl.col("BinUpperBound"))
+        )
+    )
+    single = cdhsample_binaggregator.roll_up(
+        "Customer.AnnualIncome", aggregation="Configuration", return_df=True
+    )
+    batch = cdhsample_binaggregator.roll_up_many(
+        "Customer.AnnualIncome", aggregation="Configuration"
+    )
+    for col in ["Lift", "BinResponses", "BinCoverage"]:
+        assert not batch[col].is_nan().any()
+        assert batch[col].to_list() == pytest.approx(single[col].to_list())
@@ -252,3 +252,150 @@ def test_cache_to_file():
     assert input_df.collect().equals(pl.read_parquet(cached_path_parquet))
     for file in [cached_path_parquet, cached_path_arrow]:
         os.remove(file)
+
+
+def _write_dataflow_file(path, rows):
+    import gzip
+    import json
+
+    with gzip.open(path, "wt") as f:
+        f.write("\n".join(json.dumps(row) for row in rows))
+    return str(path)
+
+
+def test_read_dataflow_output_incremental_cache(tmp_path, mocker):
+    from pdstools.pega_io import File
+
+    cache = tmp_path / "cache"
+    files = [
+        _write_dataflow_file(tmp_path / f"data_{i}.json.gz", [{"id": i, "value": i}])
+        for i in range(3)
+    ]
+    read = mocker.spy(File, "read_multi_zip")
+
+    def read_cached(files, **kwargs):
+        return pega_io.read_dataflow_output(
+            files, "snapshots", cache_directory=cache, **kwargs
+        ).collect()
+
+    assert read_cached(files[:2])["id"].sort().to_list() == [0, 1]
+    assert read_cached(files)["id"].sort().to_list() == [0, 1, 2]
+    assert read.call_args.kwargs["files"] == [files[2]]
+    assert len(list((cache / "snapshots").glob("part-*.parquet"))) == 2
+
+    read.reset_mock()
+    assert read_cached(files).height == 3
+    read.assert_not_called()
+
+    _write_dataflow_file(files[0], [{"id": 0, "value": 10}, {"id": 3, "value": 3}])
+    os.remove(files[1])
+    df = read_cached(files[0::2])
+    assert read.call_args.kwargs["files"] == [files[0]]
+    assert df.sort("id").to_dict(as_series=False) == {
+        "id": [0, 2, 3],
+        "value": [10, 2, 3],
+    }
+    manifest = pl.read_parquet(cache / "snapshots" / "_manifest.parquet")
+    assert sorted(manifest["file"]) == [files[0], files[2]]
+
+    df = read_cached(files[0::2], max_fragments=1)
+    assert df.sort("id")["value"].to_list() == [10, 2, 3]
+    assert len(list((cache / "snapshots").glob("part-*.parquet"))) == 1
+
+
+@pytest.mark.parametrize("max_in_flight", [1, 2, 5])
+@pytest.mark.parametrize("n_workers", [1, 4])
+def test_read_multi_zip(tmp_path, n_workers, max_in_flight):
+    files = [
+        _write_dataflow_file(tmp_path / f"data_{i}.json.gz", rows)
+        for i, rows in enumerate(
+            [
+                [{"id": 0, "value": 1}],
+                [{"id": 1, "value": 1.5, "name": "a"}],
+                [{"id": 2, "name": "b"}, {"id": 3, "value": 2}],
+            ]
+            * 5
+        )
+    ]
+    expected = {
+        "id": [0, 1, 2, 3] * 5,
+        "value": [1.0, 1.5, None, 2.0] * 5,
+        "name": [None, "a", "b", None] * 5,
+    }
+    df = pega_io.read_multi_zip(
+        files, verbose=False, n_workers=n_workers, max_in_flight=max_in_flight
+    )
+    assert df.collect().to_dict(as_series=False) == expected
+
+    sink = tmp_path / "combined.parquet"
+    df = pega_io.read_multi_zip(
+        files,
+        add_original_file_name=True,
+        verbose=False,
+        n_workers=n_workers,
+        max_in_flight=max_in_flight,
+        sink=sink,
+    )
+    assert sink.exists()
+    assert df.drop("file").collect().to_dict(as_series=False) == expected
+    assert df.collect()["file"].to_list()[:2] == files[:2]
+
+
+def test_read_multi_zip_max_in_flight(tmp_path):
+    files = [_write_dataflow_file(tmp_path / "data.json.gz", [{"id": 0}])]
+    with pytest.raises(ValueError, match="max_in_flight"):
+        pega_io.read_multi_zip(files, verbose=False, n_workers=4, max_in_flight=0)
+
+
+def test_import_compressed_files_streams_to_disk(test_data, tmp_path):
+    import gzip
+
+    df = test_data.collect()
+    gz_file = tmp_path / "data.json.gz"
+    with gzip.open(gz_file, "wb") as f:
+        df.write_ndjson(f)
+    zip_file = tmp_path / "data.zip"
+    with zipfile.ZipFile(zip_file, "w") as z:
+        z.writestr("data.json", df.write_ndjson())
+
+    for file, extension in [(str(gz_file), ".gz"), (str(zip_file), ".zip")]:
+        streamed = pega_io.File.import_file(file, extension)
+        in_memory = pega_io.File.import_file(file, extension, stream_to_disk=False)
+        assert streamed.collect().equals(in_memory.collect())
+
+    with open(gz_file, "rb") as f:
+        uploaded = BytesIO(f.read())
+    uploaded.name = "data.json.gz"
+    temp_files = len(pega_io.File._temp_files)
+    assert pega_io.File.import_file(uploaded, ".gz").collect().equals(df)
+    # Uploads stay in memory, rather than leaving a temporary file per upload
+    assert len(pega_io.File._temp_files) == temp_files
+    uploaded.seek(0)
+    streamed = pega_io.File.import_file(uploaded, ".gz", stream_to_disk=True)
+    assert streamed.collect().equals(df)
+    assert len(pega_io.File._temp_files) == temp_files + 1
+
+    path, extension = pega_io.read_zipped_file(str(zip_file), to_file=True)
+    assert extension == ".json"
+    assert os.path.isfile(path)
+    assert pl.read_ndjson(path).equals(df)
+
+
+def test_temp_files_in_own_dir_and_removed(test_data, tmp_path):
+    import gzip
+
+    df = test_data.collect()
+    gz_file = tmp_path / "data.json.gz"
+    with gzip.open(gz_file, "wb") as f:
+        df.write_ndjson(f)
+    temp_dir = tmp_path / "temp"
+    temp_dir.mkdir()
+
+    streamed = pega_io.read_ds_export(str(gz_file), temp_dir=temp_dir)
+    assert streamed.collect().equals(df)
+    temp_files = list(temp_dir.iterdir())
+    assert len(temp_files) == 1
+
+    pega_io.remove_temp_files()
+    assert not temp_files[0].exists()
+    assert pega_io.File._temp_files == []
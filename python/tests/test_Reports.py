@@ -202,3 +202,120 @@ def test_size_reduction_method_integration():
         assert (
             "Duplicate script removed" not in results["embedded"]["content"]
         ), "Embedded should not have markers"
+
+
+def test_qmd_to_notebook():
+    """Test converting the shipped Quarto documents to notebooks."""
+    from pdstools import __reports__
+    from pdstools.utils.report_utils import inject_parameters, qmd_to_notebook
+
+    qmd = (__reports__ / "ModelReport.qmd").read_text()
+    nb = qmd_to_notebook(qmd)
+
+    assert nb.cells[0].cell_type == "raw"
+    assert nb.cells[0].source.startswith("---\ntitle:")
+    code_cells = [cell for cell in nb.cells if cell.cell_type == "code"]
+    assert len(code_cells) == qmd.count("```{python}")
+    assert all("```" not in cell.source for cell in code_cells)
+
+    inject_parameters(nb, {"model_id": "abc", "only_active_predictors": True})
+    position = next(
+        i for i, cell in enumerate(nb.cells) if "tags: [parameters]" in cell.source
+    )
+    injected = nb.cells[position + 1]
+    assert injected.metadata["tags"] == ["injected-parameters"]
+    assert injected.source == "model_id = 'abc'\nonly_active_predictors = True"
+
+
+SIMPLE_QMD = """---
+title: "Simple"
+jupyter: python3
+---
+
+```{python}
+# | tags: [parameters]
+name = "default"
+```
+
+Some text
+
+```{python}
+assert "leftover" not in globals()
+leftover = name
+print(name)
+```
+"""
+
+
+def _fake_quarto_render(command, temp_dir, verbose):
+    output_filename = command[command.index("--output") + 1]
+    (temp_dir / output_filename).write_text("rendered")
+    return 0
+
+
+def test_report_executor_timings(tmp_path, mocker):
+    """Test the executor flow with the kernel and Quarto mocked out."""
+    import nbformat
+    from pdstools.utils import report_utils
+
+    mocker.patch.object(report_utils.ReportExecutor, "_start_kernel")
+    execute = mocker.patch.object(
+        report_utils.ReportExecutor, "execute", side_effect=lambda nb, cwd: nb
+    )
+    mocker.patch.object(
+        report_utils, "get_quarto_with_version", return_value=("quarto", "1.6")
+    )
+    quarto = mocker.patch.object(
+        report_utils, "_run_quarto_command", side_effect=_fake_quarto_render
+    )
+    (tmp_path / "Simple.qmd").write_text(SIMPLE_QMD)
+
+    executor = report_utils.ReportExecutor()
+    for name in ["first", "second"]:
+        report_utils.run_quarto(
+            qmd_file="Simple.qmd",
+            output_filename=f"{name}.html",
+            params={"name": name},
+            temp_dir=tmp_path,
+            executor=executor,
+        )
+        assert (tmp_path / f"{name}.html").read_text() == "rendered"
+
+    assert execute.call_count == 2
+    command = quarto.call_args.args[0]
+    assert command[1:4] == ["render", "Simple.ipynb", "--no-execute"]
+    nb = nbformat.read(tmp_path / "Simple.ipynb", as_version=4)
+    assert "name = 'second'" in [cell.source for cell in nb.cells]
+
+    timings = executor.timings_summary()
+    assert timings["Report"].to_list() == ["first.html", "second.html"]
+    assert timings.columns == ["Report", "Startup", "Compute", "Render", "Total"]
+    assert (timings["Total"] >= timings["Compute"]).all()
+
+
+def test_report_executor_kernel(tmp_path, mocker):
+    """Test that reports share one kernel but not their variables."""
+    pytest.importorskip("ipykernel")
+    from pdstools.utils import report_utils
+
+    mocker.patch.object(
+        report_utils, "get_quarto_with_version", return_value=("quarto", "1.6")
+    )
+    mocker.patch.object(
+        report_utils, "_run_quarto_command", side_effect=_fake_quarto_render
+    )
+    (tmp_path / "Simple.qmd").write_text(SIMPLE_QMD)
+
+    with report_utils.ReportExecutor(timeout=60) as executor:
+        for name in ["first", "second"]:
+            executor.render(
+                "Simple.qmd",
+                output_filename=f"{name}.html",
+                params={"name": name},
+                temp_dir=tmp_path,
+            )
+        kernel = executor._km
+    assert kernel is not None and executor._km is None
+    first, second = executor.timings
+    # Only the first report pays for starting the kernel
+    assert first.startup > second.startup
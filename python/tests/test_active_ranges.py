@@ -128,3 +128,120 @@ def test_active_ranges_pega7():
     model_id = "4574f1fd-13a7-5703-bf38-9374641f370f"
     ar = dm.active_ranges(model_id).collect()
     assert round(ar["AUC_ActiveRange"].item(), 6) == round(ar["AUC_FullRange"].item(), 6)
+
+
+def _synthetic_datamart(n_models: int, n_bins: int = 10, seed: int = 42):
+    """A datamart with n_models models, each with two active predictors and a classifier."""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    model_ids = [f"model-{i}" for i in range(n_models)]
+    frames = []
+    for predictor, entry_type in [
+        ("Customer.Age", "Active"),
+        ("Customer.Income", "Active"),
+        ("Classifier", "Classifier"),
+    ]:
+        bins = n_bins if entry_type == "Classifier" else 5
+        n = n_models * bins
+        frames.append(
+            pl.DataFrame(
+                {
+                    "ModelID": np.repeat(model_ids, bins),
+                    "PredictorName": predictor,
+                    "EntryType": entry_type,
+                    "BinIndex": np.tile(np.arange(1, bins + 1), n_models),
+                    "BinLowerBound": np.tile(np.linspace(-3, 1, bins), n_models),
+                    "BinPositives": rng.integers(0, 50, n).astype(float),
+                    "BinNegatives": rng.integers(0, 500, n).astype(float),
+                    "Performance": np.repeat(rng.uniform(50, 80, n_models), bins),
+                    "SnapshotTime": "20240101T000000.000 GMT",
+                }
+            )
+        )
+    return ADMDatamart(predictor_df=pl.concat(frames).lazy())
+
+
+def _active_ranges_per_model(dm: ADMDatamart) -> pl.DataFrame:
+    """Reference implementation, one numpy call per model."""
+    import numpy as np
+    from pdstools.utils.cdh_utils import auc_from_bincounts
+
+    scores = dm._minMaxScoresPerModel(dm.predictor_data).collect()
+    classifiers = (
+        dm.predictor_data.filter(EntryType="Classifier")
+        .sort("BinIndex")
+        .group_by("ModelID")
+        .agg(
+            bounds=pl.col("BinLowerBound").cast(pl.Float64),
+            pos=pl.col("BinPositives").cast(pl.Float64),
+            neg=pl.col("BinNegatives").cast(pl.Float64),
+        )
+        .collect()
+        .join(scores, on="ModelID")
+    )
+
+    def find_binindex(bounds, score):
+        if len(bounds) == 1:
+            return 0
+        return min(max(1, np.searchsorted(bounds, score, side="right")), len(bounds))
+
+    results = []
+    for row in classifiers.iter_rows(named=True):
+        idx_min = find_binindex(row["bounds"], row["score_min"]) - 1
+        idx_max = find_binindex(row["bounds"], row["score_max"])
+        results.append(
+            {
+                "ModelID": row["ModelID"],
+                "AUC_FullRange": auc_from_bincounts(row["pos"], row["neg"]),
+                "AUC_ActiveRange": auc_from_bincounts(
+                    row["pos"][idx_min:idx_max], row["neg"][idx_min:idx_max]
+                ),
+                "idx_min": idx_min,
+                "idx_max": idx_max,
+            }
+        )
+    return pl.DataFrame(results).sort("ModelID")
+
+
+def test_active_ranges_match_per_model_reference():
+    dm = _synthetic_datamart(200)
+    ar = dm.active_ranges().collect()
+    reference = _active_ranges_per_model(dm)
+
+    assert ar["ModelID"].to_list() == reference["ModelID"].to_list()
+    assert ar["idx_min"].to_list() == reference["idx_min"].to_list()
+    assert ar["idx_max"].to_list() == reference["idx_max"].to_list()
+    assert ar["AUC_FullRange"].to_list() == pytest.approx(
+        reference["AUC_FullRange"].to_list()
+    )
+    assert ar["AUC_ActiveRange"].to_list() == pytest.approx(
+        reference["AUC_ActiveRange"].to_list()
+    )
+
+
+@pytest.mark.slow
+def test_active_ranges_benchmark():
+    """Compare the expression based active ranges to a per-model numpy loop."""
+    import time
+
+    dm = _synthetic_datamart(50_000)
+    dm.predictor_data = dm.predictor_data.collect().lazy()
+
+    start = time.perf_counter()
+    ar = dm.active_ranges().collect()
+    native_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    reference = _active_ranges_per_model(dm)
+    per_model_time = time.perf_counter() - start
+
+    print(
+        f"active_ranges on {ar.height} models: {native_time:.2f}s native, "
+        f"{per_model_time:.2f}s per-model numpy"
+    )
+    assert ar.height == reference.height == 50_000
+    assert ar["AUC_ActiveRange"].to_list() == pytest.approx(
+        reference["AUC_ActiveRange"].to_list()
+    )
+    assert native_time < per_model_time
@@ -91,6 +91,56 @@ def test_aucpr_from_bincounts():
     )
 
 
+def test_auc_from_bincounts_polars():
+    df = pl.DataFrame(
+        {
+            "ModelID": ["a"] * 3 + ["b"] * 10 + ["c"] * 2,
+            "BinPositives": [3, 1, 0]
+            + [50, 70, 75, 80, 85, 90, 110, 130, 150, 160]
+            + [0, 0],
+            "BinNegatives": [2, 0, 1]
+            + [1440, 1350, 1170, 990, 810, 765, 720, 675, 630, 450]
+            + [5, 3],
+        }
+    )
+    result = (
+        df.group_by("ModelID")
+        .agg(
+            cdh_utils.auc_from_bincounts_polars(),
+            cdh_utils.aucpr_from_bincounts_polars(),
+        )
+        .sort("ModelID")
+    )
+    assert result["AUC"].to_list() == pytest.approx([0.75, 0.6871, 0.5], abs=1e-6)
+    assert result["AUCPR"][:2].to_list() == pytest.approx(
+        [0.625, 0.1489611], abs=1e-6
+    )
+
+    over = df.with_columns(
+        cdh_utils.auc_from_bincounts_polars("BinPositives", "BinNegatives").over(
+            "ModelID"
+        )
+    )
+    assert over.filter(ModelID="a")["AUC"].to_list() == [0.75] * 3
+
+    explicit_order = df.filter(ModelID="a").select(
+        cdh_utils.auc_from_bincounts_polars(probs=pl.Series([0.6, 0.2, 0.4]))
+    )
+    assert explicit_order.item() == cdh_utils.auc_from_bincounts(
+        [3, 1, 0], [2, 0, 1], [0.6, 0.2, 0.4]
+    )
+
+
+def test_auc_from_probs_polars():
+    df = pl.DataFrame(
+        {"Outcome": [1, 1, 0, 1, 1, 1], "Propensity": [0.6, 0.2, 0.2] * 2}
+    )
+    result = df.group_by(pl.int_range(pl.len()) // 3 > 0).agg(
+        cdh_utils.auc_from_probs_polars("Outcome", "Propensity")
+    )
+    assert sorted(result["AUC"].to_list()) == [0.5, 0.75]
+
+
 def test_auc2gini():
     assert abs(cdh_utils.auc_to_gini(0.8232) - 0.6464) < 1e-6
 
@@ -216,6 +266,25 @@ def test_overlap_matrix():
     )
 
 
+def test_overlap_matrix_empty_lists():
+    df = pl.DataFrame(
+        {"Channel": ["Mobile", "Web"], "Actions": [[], []]},
+        schema={"Channel": pl.Utf8, "Actions": pl.List(pl.Int64)},
+    )
+
+    assert cdh_utils.overlap_matrix(
+        df, "Actions", "Channel", show_fraction=False
+    ).equals(
+        pl.DataFrame(
+            {
+                "Overlap_Actions_Mobile": [0, 0],
+                "Overlap_Actions_Web": [0, 0],
+                "Channel": ["Mobile", "Web"],
+            }
+        )
+    )
+
+
 def test_overlap_lists_polars_simple():
     input = pl.Series([[1, 2, 3], [2, 3, 4, 6], [3, 5, 7, 8]])
     assert cdh_utils.overlap_lists_polars(input).to_list() == [0.5, 0.375, 0.25]
@@ -347,6 +416,63 @@ def test_overlap_lists_polars_overall_period_summaries():
     ]
 
 
+def _overlap_reference(lists):
+    sets = [set(lst) for lst in lists]
+    matrix = [[len(a & b) for b in sets] for a in sets]
+    average = [
+        (sum(row) - row[i]) / (len(sets) - 1) / len(sets[i]) if sets[i] else 0.0
+        for i, row in enumerate(matrix)
+    ]
+    return matrix, average
+
+
+def _random_lists(n_groups, n_items, universe, seed=42):
+    rng = np.random.default_rng(seed)
+    return pl.Series(
+        "Actions",
+        [
+            [f"a{i}" for i in rng.integers(0, universe, rng.integers(0, n_items))]
+            for _ in range(n_groups)
+        ],
+    )
+
+
+def test_overlap_matches_reference():
+    lists = _random_lists(40, 15, 30)
+    matrix, average = _overlap_reference(lists.to_list())
+    df = pl.DataFrame({"Group": [f"g{i}" for i in range(len(lists))], "Actions": lists})
+
+    counts = cdh_utils.overlap_matrix(df, "Actions", "Group", show_fraction=False)
+    assert counts.drop("Group").rows() == [tuple(row) for row in matrix]
+    assert cdh_utils.overlap_lists_polars(lists).to_list() == pytest.approx(average)
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize(
+    "n_groups, n_items, universe",
+    [(50, 20, 100), (300, 300, 1000), (3000, 2000, 5000), (2000, 2000, 50000)],
+)
+def test_overlap_benchmark(n_groups, n_items, universe):
+    import time
+
+    lists = _random_lists(n_groups, n_items, universe)
+    df = pl.DataFrame({"Group": [f"g{i}" for i in range(n_groups)], "Actions": lists})
+
+    start = time.perf_counter()
+    counts = cdh_utils.overlap_matrix(df, "Actions", "Group", show_fraction=False)
+    average = cdh_utils.overlap_lists_polars(lists)
+    vectorized_time = time.perf_counter() - start
+    print(f"overlap of {n_groups} groups: {vectorized_time:.2f}s vectorized")
+    assert counts.shape == (n_groups, n_groups + 1)
+
+    if n_groups <= 300:
+        start = time.perf_counter()
+        matrix, reference = _overlap_reference(lists.to_list())
+        print(f"{time.perf_counter() - start:.2f}s with python sets")
+        assert counts.drop("Group").rows() == [tuple(row) for row in matrix]
+        assert average.to_list() == pytest.approx(reference)
+
+
 def test_weighted_performance_polars():
     input = pl.DataFrame(
         {
@@ -851,3 +977,32 @@ def test_parse_pega_date_time_formats():
     assert df.select(pl.col("SnapshotTime").is_not_null().sum()).item() == 6
     assert df["SnapshotTime2"].to_list()[2] is not None
     assert df.select(pl.col("SnapshotTime2").is_not_null().sum()).item() == 7
+
+
+def test_extract_keys_cache(tmp_path):
+    cache_file = tmp_path / "keys.parquet"
+    df = pl.DataFrame(
+        {
+            "Name": [
+                '{"pyName":"Action1", "pyTreatment":"Treatment1"}',
+                '{"pyName":"Cosmetics", "Customer":"Anonymous"}',
+                '{"pyName":"Cosmetics", "Customer":"Known"}',
+                '{"pyName":"Garden", "customer":"Known"}',
+                "GoldCard",
+            ],
+            "Treatment": ["a", "b", "c", "d", "e"],
+        }
+    )
+    expected = cdh_utils._extract_keys(df)
+
+    first = cdh_utils._extract_keys(df[:2], cache_file=cache_file)
+    assert first.equals(cdh_utils._extract_keys(df[:2]))
+    assert pl.read_parquet(cache_file).height == 2
+
+    assert cdh_utils._extract_keys(df, cache_file=cache_file).equals(expected)
+    assert pl.read_parquet(cache_file).height == 4
+
+    # Only cached names left, and keys of other cached names are not added
+    result = cdh_utils._extract_keys(df[:1].lazy(), cache_file=cache_file)
+    assert result.collect().equals(cdh_utils._extract_keys(df[:1]))
+    assert pl.read_parquet(cache_file).height == 4
@@ -0,0 +1,252 @@
+"""
+Testing the functionality of the DecisionAnalyzer
+"""
+
+import pathlib
+
+import polars as pl
+import pytest
+from pdstools.decision_analyzer.decision_data import DecisionAnalyzer
+
+basePath = pathlib.Path(__file__).parent.parent.parent
+
+
+@pytest.fixture(scope="module")
+def decision_analyzer() -> DecisionAnalyzer:
+    return DecisionAnalyzer(pl.scan_parquet(f"{basePath}/data/sample_eev2.parquet"))
+
+
+def _rerank_wins(decision_analyzer, lever_condition, lever, win_rank):
+    ranked = decision_analyzer.reRank(
+        overrides=[
+            pl.when(lever_condition)
+            .then(pl.lit(lever))
+            .otherwise(pl.col("Levers"))
+            .alias("Levers")
+        ],
+        additional_filters=pl.col(decision_analyzer.level).is_in(
+            decision_analyzer.stages_from_arbitration_down
+        ),
+    ).filter(pl.col("rank_PVCL") <= win_rank)
+    return ranked.filter(lever_condition).collect().height, ranked.collect().height
+
+
+@pytest.mark.parametrize("win_rank", [1, 3])
+@pytest.mark.parametrize(
+    "lever_condition",
+    [pl.col("pyIssue") == "Growth", pl.col("pyName") == "Action003"],
+)
+def test_lever_response_curve(decision_analyzer, lever_condition, win_rank):
+    levers = [0.1, 0.5, 1, 1.7, 3, 10, 100]
+    curve = decision_analyzer.get_lever_response_curve(
+        lever_condition, win_rank=win_rank, lever_values=levers
+    )
+    assert curve["Lever"].to_list() == levers
+    for lever, wins, percentage in curve.iter_rows():
+        selected_wins, total = _rerank_wins(
+            decision_analyzer, lever_condition, lever, win_rank
+        )
+        assert wins == selected_wins
+        assert percentage == pytest.approx(selected_wins / total * 100)
+
+    full_curve = decision_analyzer.get_lever_response_curve(
+        lever_condition, win_rank=win_rank
+    )
+    assert full_curve["Lever"].is_sorted()
+    assert full_curve["Wins"].is_sorted()
+
+
+@pytest.mark.parametrize("value", [0.0, -1.0])
+def test_lever_response_curve_without_positive_priority(value):
+    """Without priority the lever does nothing, a negative one makes actions lose"""
+    lever_condition = pl.col("pyIssue") == "Growth"
+    # With negative values for all actions, the selected ones win at low levers
+    value_condition = lever_condition if value == 0 else pl.lit(True)
+    decision_analyzer = DecisionAnalyzer(
+        pl.scan_parquet(f"{basePath}/data/sample_eev2.parquet").with_columns(
+            Value=pl.when(value_condition).then(value).otherwise(pl.col("Value"))
+        )
+    )
+    levers = [0.1, 0.5, 1, 3, 100]
+    curve = decision_analyzer.get_lever_response_curve(
+        lever_condition, lever_values=levers
+    )
+    for lever, wins, _ in curve.iter_rows():
+        selected_wins, _ = _rerank_wins(decision_analyzer, lever_condition, lever, 1)
+        assert wins == selected_wins
+    if value == 0:
+        assert curve["Wins"].n_unique() == 1
+    else:
+        assert curve["Wins"].is_sorted(descending=True)
+        assert curve["Wins"][0] > curve["Wins"][-1]
+
+
+def test_find_lever_value(decision_analyzer):
+    lever_condition = pl.col("pyIssue") == "Growth"
+    lever = decision_analyzer.find_lever_value(lever_condition, 50)
+    below, total = _rerank_wins(decision_analyzer, lever_condition, lever * 0.999, 1)
+    above, _ = _rerank_wins(decision_analyzer, lever_condition, lever * 1.001, 1)
+    assert below / total * 100 < 50 <= above / total * 100
+
+    with pytest.raises(ValueError):
+        decision_analyzer.find_lever_value(lever_condition, 100, high=1)
+
+
+def test_preaggregated_filter_view_from_cube():
+    da = DecisionAnalyzer(pl.scan_parquet(f"{basePath}/data/sample_eev2.parquet"))
+    sort_cols = sorted(da._preaggregation_dimensions)
+    deterministic = pl.exclude("Propensity", "Priority")
+
+    unfiltered = da.getPreaggregatedFilterView.collect()
+    cube = da._preaggregation_cube
+
+    da.applyGlobalDataFilters(pl.col("pyIssue") == "Sales")
+    assert da._filters_on_preaggregation_dimensions(da._global_filters)
+    from_cube = da.getPreaggregatedFilterView.collect()
+    from_raw = da._preaggregate_filter_view(da.decision_data).collect()
+    assert da._preaggregation_cube is cube
+    assert 0 < from_cube.height < unfiltered.height
+    assert (
+        from_cube.select(deterministic)
+        .sort(sort_cols)
+        .equals(from_raw.select(deterministic).sort(sort_cols))
+    )
+
+    # Filters on other columns fall back to the raw data
+    da.applyGlobalDataFilters(pl.col("Priority") > 0.5)
+    assert not da._filters_on_preaggregation_dimensions(da._global_filters)
+    assert (
+        da.getPreaggregatedFilterView.select(pl.sum("Decisions")).collect().item()
+        == da.decision_data.select(pl.len()).collect().item()
+    )
+
+    da.resetGlobalDataFilters()
+    assert (
+        da.getPreaggregatedFilterView.select(deterministic)
+        .collect()
+        .sort(sort_cols)
+        .equals(unfiltered.select(deterministic).sort(sort_cols))
+    )
+
+
+
+@pytest.mark.parametrize(
+    "filter",
+    [
+        pl.len() > 5,
+        pl.lit(True),
+        pl.col("pyChannel").n_unique().over("pyIssue") > 1,
+        pl.col("pyName").count().over("pyIssue") > 1000,
+    ],
+)
+def test_preaggregated_filter_view_not_rowwise(filter):
+    da = DecisionAnalyzer(pl.scan_parquet(f"{basePath}/data/sample_eev2.parquet"))
+    da.getPreaggregatedFilterView.collect()
+
+    # Filters without columns, aggregations and windows fall back to the raw data
+    da.applyGlobalDataFilters(filter)
+    assert not da._filters_on_preaggregation_dimensions(da._global_filters)
+    assert (
+        da.getPreaggregatedFilterView.select(pl.sum("Decisions")).collect().item()
+        == da.decision_data.select(pl.len()).collect().item()
+    )
+
+def test_nested_samples(mocker):
+    da = DecisionAnalyzer(pl.scan_parquet(f"{basePath}/data/sample_eev2.parquet"))
+    large = da.draw_sample(500).collect()
+    assert large.get_column("pxInteractionID").n_unique() == 500
+
+    # Smaller samples are subsets, derived from the large one without a rescan
+    mocker.patch.object(da, "decision_data", None)
+    small = da.draw_sample(100).collect()
+    mocker.stopall()
+    small_ids = set(small.get_column("pxInteractionID"))
+    assert len(small_ids) == 100
+    assert small_ids <= set(large.get_column("pxInteractionID"))
+    assert small.equals(large.filter(pl.col("pxInteractionID").is_in(list(small_ids))))
+
+    # Reproducible across instances
+    other = DecisionAnalyzer(pl.scan_parquet(f"{basePath}/data/sample_eev2.parquet"))
+    assert (
+        set(other.draw_sample(100).collect().get_column("pxInteractionID")) == small_ids
+    )
+
+    assert da.sample.select(pl.n_unique("pxInteractionID")).collect().item() == 1000
+    assert da.num_sample_interactions == 1000
+
+
+def test_stratified_sample_selection():
+    candidates = pl.DataFrame(
+        {
+            "pxInteractionID": [str(i) for i in range(1000)],
+            "pyChannel": ["Web"] * 800 + ["Email"] * 200,
+        }
+    ).with_columns(SampleHash=pl.col("pxInteractionID").hash(seed=0))
+
+    selected = {}
+    for size in [10, 100]:
+        ids = DecisionAnalyzer._select_sample_interactions(
+            candidates, size, ["pyChannel"]
+        )
+        selected[size] = set(ids)
+        counts = dict(
+            candidates.filter(pl.col("pxInteractionID").is_in(ids.implode()))
+            .get_column("pyChannel")
+            .value_counts()
+            .iter_rows()
+        )
+        assert counts == {"Web": size * 0.8, "Email": size * 0.2}
+    assert selected[10] <= selected[100]
+
+
+def test_progressive_sample():
+    da = DecisionAnalyzer(pl.scan_parquet(f"{basePath}/data/sample_eev2.parquet"))
+    initial, full = da.progressive_sample(initial_size=50, size=400)
+    initial_ids = set(initial.collect().get_column("pxInteractionID"))
+    full_ids = set(full.result().collect().get_column("pxInteractionID"))
+    assert len(initial_ids) == 50
+    assert len(full_ids) == 400
+    assert initial_ids <= full_ids
+
+
+def test_rerank_matches_struct_ranking():
+    da = DecisionAnalyzer(
+        pl.scan_parquet(f"{basePath}/data/sample_eev2.parquet"),
+        mandatory_expr=pl.col("pyIssue") == "Growth",
+    )
+    overrides = [
+        pl.when(pl.col("pyIssue") == "Sales")
+        .then(pl.lit(2.0))
+        .otherwise(pl.col("Levers"))
+        .alias("Levers")
+    ]
+    ranked = da.reRank(overrides=overrides).collect()
+    tie_break = [
+        "is_mandatory",
+        "StageOrder",
+        pl.col("pyIssue").rank() * -1,
+        pl.col("pyGroup").rank() * -1,
+        pl.col("pyName").rank() * -1,
+    ]
+    for variant in ["PVCL", "VCL", "PCL", "PVL", "PVC"]:
+        expected = ranked.with_columns(
+            expected=pl.struct(tie_break[:1] + [f"prio_{variant}"] + tie_break[1:])
+            .rank(descending=True, method="ordinal")
+            .over("pxInteractionID")
+            .cast(pl.Int16)
+        )
+        # Complete ties may be ranked in either order
+        mismatches = expected.group_by(
+            "pxInteractionID",
+            "is_mandatory",
+            f"prio_{variant}",
+            "StageOrder",
+            "pyIssue",
+            "pyGroup",
+            "pyName",
+        ).agg(pl.col(f"rank_{variant}").sort(), pl.col("expected").sort())
+        assert (
+            mismatches.filter(pl.col(f"rank_{variant}") != pl.col("expected")).height
+            == 0
+        )
+    assert "RankTieBreaker" not in ranked.columns
@@ -1,8 +1,15 @@
 import pathlib
+import zipfile
 
+import polars as pl
 import pytest
+from polars.testing import assert_frame_equal
 from openpyxl import load_workbook
 from pdstools import ADMDatamart, datasets, read_ds_export, Prediction
+from pdstools.utils.report_utils import (
+    health_check_last_data,
+    read_health_check_bundle,
+)
 
 basePath = pathlib.Path(__file__).parent.parent.parent
 
@@ -12,6 +19,15 @@ def sample() -> ADMDatamart:
     return datasets.cdh_sample()
 
 
+@pytest.fixture
+def local_sample() -> ADMDatamart:
+    return ADMDatamart.from_ds_export(
+        model_filename="Data-Decision-ADM-ModelSnapshot_pyModelSnapshots_20210526T131808_GMT.zip",
+        predictor_filename="Data-Decision-ADM-PredictorBinningSnapshot_pyADMPredictorSnapshots_20210526T133622_GMT.zip",
+        base_path=f"{basePath}/data",
+    )
+
+
 @pytest.fixture
 def sample_without_predictor_binning() -> ADMDatamart:
     """Fixture to serve as class to call functions from."""
@@ -135,6 +151,59 @@ def test_ExportTables_NoBinning(sample: ADMDatamart):
     assert not pathlib.Path(excel).exists()
 
 
+def test_ExportTables_streaming(local_sample: ADMDatamart, tmp_path):
+    excel, warning_messages = local_sample.generate.excel_report(
+        tmp_path / "Tables.xlsx", predictor_binning=True, streaming=True
+    )
+    assert warning_messages == []
+    spreadsheet = load_workbook(excel, read_only=True)
+    assert spreadsheet.sheetnames == [
+        "adm_models",
+        "predictors_detail",
+        "predictors_overview",
+        "predictor_binning",
+    ]
+    models = local_sample.aggregates.last(table="model_data").collect()
+    rows = list(spreadsheet["adm_models"].values)
+    assert len(rows) == models.height + 1
+    assert set(rows[0]) == set(models.columns)
+
+
+@pytest.mark.parametrize("overflow", ["sheets", "parquet"])
+def test_ExportTables_streaming_overflow(
+    local_sample: ADMDatamart, tmp_path, monkeypatch, overflow
+):
+    from pdstools.utils import report_utils
+
+    monkeypatch.setattr(report_utils, "EXCEL_ROW_LIMIT", 1000)
+    excel, warning_messages = local_sample.generate.excel_report(
+        tmp_path / "Tables.xlsx",
+        predictor_binning=True,
+        streaming=True,
+        batch_size=300,
+        overflow=overflow,
+    )
+    binning_rows = (
+        local_sample.aggregates.last(table="predictor_data")
+        .filter(pl.col("PredictorName") != "Classifier")
+        .select(pl.len())
+        .collect()
+        .item()
+    )
+    spreadsheet = load_workbook(excel, read_only=True)
+    binning_sheets = [s for s in spreadsheet.sheetnames if "binning" in s]
+    sheet_rows = [len(list(spreadsheet[s].values)) - 1 for s in binning_sheets]
+    assert all(n <= 999 for n in sheet_rows)
+    if overflow == "sheets":
+        assert binning_sheets[:2] == ["predictor_binning", "predictor_binning_2"]
+        assert sum(sheet_rows) == binning_rows
+    else:
+        assert binning_sheets == ["predictor_binning"]
+        companion = tmp_path / "Tables_predictor_binning.parquet"
+        assert pl.read_parquet(companion).height == binning_rows
+    assert any("predictor_binning" in msg for msg in warning_messages)
+
+
 def test_GenerateHealthCheck_ModelDataOnly(
     sample_without_predictor_binning: ADMDatamart,
 ):
@@ -188,6 +257,120 @@ def test_GenerateModelReport(sample: ADMDatamart):
     assert not pathlib.Path(report).exists()
 
 
+@pytest.mark.parametrize("max_workers", [1, 3])
+def test_ModelReports_parallel(
+    local_sample: ADMDatamart, tmp_path, mocker, max_workers
+):
+    model_ids = (
+        local_sample.model_data.select(pl.col("ModelID").unique().sort())
+        .head(4)
+        .collect()["ModelID"]
+        .to_list()
+    )
+    rendered = {}
+
+    def fake_run_quarto(output_filename, params, temp_dir, **kwargs):
+        model_ids_in_data = pl.read_parquet(params["model_file_path"])["ModelID"]
+        rendered[params["model_id"]] = (temp_dir, model_ids_in_data.unique().to_list())
+        (temp_dir / output_filename).write_text(params["model_id"])
+        return 0
+
+    mocker.patch("pdstools.adm.Reports.run_quarto", side_effect=fake_run_quarto)
+    progress = []
+    report = local_sample.generate.model_reports(
+        model_ids=model_ids,
+        name="Parallel",
+        output_dir=tmp_path,
+        max_workers=max_workers,
+        progress_callback=lambda i, n: progress.append((i, n)),
+    )
+    assert report.suffix == ".zip"
+    with zipfile.ZipFile(report) as zipf:
+        assert sorted(zipf.namelist()) == sorted(
+            f"ModelReport_Parallel_{model_id}.html" for model_id in model_ids
+        )
+    assert progress == [(i, len(model_ids)) for i in range(1, len(model_ids) + 1)]
+    # Every report only sees the rows of its own model
+    assert {k: v[1] for k, v in rendered.items()} == {m: [m] for m in model_ids}
+    work_dirs = {v[0] for v in rendered.values()}
+    assert len(work_dirs) == (len(model_ids) if max_workers > 1 else 1)
+
+
+def test_ModelReports_parallel_failure(local_sample: ADMDatamart, tmp_path, mocker):
+    mocker.patch("pdstools.adm.Reports.run_quarto", return_value=0)
+    with pytest.raises(ValueError, match="Failed to write the report"):
+        local_sample.generate.model_reports(
+            model_ids=["bd70a915-697a-5d43-ab2c-53b0557c85a0"],
+            output_dir=tmp_path,
+            max_workers=2,
+        )
+    with pytest.raises(ValueError, match="max_workers"):
+        local_sample.generate.model_reports(
+            model_ids=["bd70a915-697a-5d43-ab2c-53b0557c85a0"], max_workers=0
+        )
+
+
+def test_health_check_bundle(local_sample: ADMDatamart, tmp_path, mocker):
+    bundle_file = local_sample.generate.health_check_bundle(tmp_path / "hc.parquet")
+    bundle = read_health_check_bundle(bundle_file)
+    assert set(bundle) == {
+        "channel_overview",
+        "overall_summary",
+        "model_overview",
+        "configuration_overview",
+        "predictors_global_overview",
+        "last_data_all",
+        "parameters",
+    }
+    assert_frame_equal(
+        bundle["overall_summary"],
+        local_sample.aggregates.overall_summary(every="1w").collect(),
+    )
+    assert_frame_equal(
+        bundle["last_data_all"], health_check_last_data(local_sample).collect()
+    )
+
+    # Without positives, SMS becomes an invalid channel that the report excludes
+    local_sample.model_data = local_sample.model_data.with_columns(
+        Positives=pl.when(pl.col("Channel") == "SMS")
+        .then(0)
+        .otherwise(pl.col("Positives"))
+    )
+    bundle = read_health_check_bundle(
+        local_sample.generate.health_check_bundle(tmp_path / "hc.parquet")
+    )
+    assert {"last_data_all", "last_data_valid_channels"} <= set(bundle)
+    assert "SMS" in bundle["last_data_all"]["Channel"]
+    assert "SMS" not in bundle["last_data_valid_channels"]["Channel"]
+
+    # Models without a channel or configuration are kept, like an anti-join would
+    local_sample.model_data = local_sample.model_data.with_columns(
+        Channel=pl.when(pl.col("Name") == "AutoNew84Months").then(None).otherwise("Channel"),
+        Configuration=pl.when(pl.col("Name") == "AutoNew36Months")
+        .then(None)
+        .otherwise("Configuration"),
+    )
+    bundle_file = local_sample.generate.health_check_bundle(
+        tmp_path / "hc.parquet", configuration_responses_threshold=20000
+    )
+    bundle = read_health_check_bundle(bundle_file)
+    last_data = bundle["last_data_valid_configurations"]
+    assert "NA" in last_data["Channel"]  # the last data shows nulls as NA
+    assert "NA" in last_data["Configuration"]
+
+    render = mocker.patch("pdstools.adm.Reports.run_quarto", return_value=0)
+    with pytest.raises(ValueError):  # nothing got rendered
+        local_sample.generate.health_check(
+            output_dir=tmp_path, bundle_file_path=bundle_file
+        )
+    params = render.call_args.kwargs["params"]
+    assert params["bundle_file_path"] == str(bundle_file.resolve())
+    assert params["materialize"] == ""  # the report stays lazy by default
+    # The report follows the thresholds the bundle was created with
+    assert params["threshold_updated_days"] == 30
+    assert params["configuration_responses_threshold"] == 20000
+
+
 @pytest.mark.slow
 def test_ModelReport_size_reduction_methods(sample: ADMDatamart, tmp_path):
     """Test model report file sizes for all size_reduction_method options."""
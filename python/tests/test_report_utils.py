@@ -234,3 +234,52 @@ def test_write_params_files_size_reduction_method(tmp_path):
     with open(tmp_path / "_quarto.yml") as f:
         config = yaml.safe_load(f)
     assert config["format"]["html"]["plotly-connected"] is False
+
+
+def test_health_check_excluded_filter_keeps_nulls():
+    models = pl.DataFrame(
+        {
+            "Channel": ["Web", None, "Email", "Web"],
+            "Direction": ["Inbound", "Inbound", "Outbound", "Outbound"],
+            "Configuration": ["A", "B", None, "B"],
+        }
+    )
+
+    unused_channels = pl.DataFrame({"Channel": ["Web"], "Direction": ["Inbound"]})
+    kept = models.filter(
+        report_utils.health_check_excluded_filter(
+            unused_channels, on=["Channel", "Direction"]
+        )
+    )
+    expected = models.join(unused_channels, on=["Channel", "Direction"], how="anti")
+    assert kept.height == 3
+    assert kept.equals(expected)
+
+    unused_configurations = pl.DataFrame({"Configuration": ["B"]})
+    kept = models.filter(
+        report_utils.health_check_excluded_filter(
+            unused_configurations, on=["Configuration"]
+        )
+    )
+    assert kept["Configuration"].to_list() == ["A", None]
+
+
+def test_write_excel_streaming_nested_columns(tmp_path):
+    """Test that list and struct columns are written as strings."""
+    from openpyxl import load_workbook
+
+    df = pl.DataFrame(
+        {
+            "Name": ["a", "b"],
+            "Items": [[1, 2], None],
+            "Info": [{"x": 1, "y": "p"}, {"x": 2, "y": None}],
+        }
+    )
+    path = tmp_path / "Tables.xlsx"
+    assert report_utils.write_excel_streaming({"tab": df.lazy()}, path) == []
+    streamed = list(load_workbook(path, read_only=True)["tab"].values)
+
+    df.write_excel(tmp_path / "Reference.xlsx", worksheet="tab", autofit=False)
+    reference = list(load_workbook(tmp_path / "Reference.xlsx")["tab"].values)
+    assert streamed == reference
+    assert streamed[1] == ("a", "[1, 2]", "{'x': 1, 'y': 'p'}")